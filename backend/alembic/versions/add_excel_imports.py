@@ -0,0 +1,42 @@
+"""Add excel_imports table for content-hash deduplication
+
+Revision ID: add_excel_imports
+Revises: fix_student_id_string
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_excel_imports'
+down_revision: Union[str, None] = 'fix_student_id_string'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "excel_imports",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("sheet_name", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("statistics", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_excel_imports_id"), "excel_imports", ["id"], unique=False)
+    op.create_index(op.f("ix_excel_imports_content_hash"), "excel_imports", ["content_hash"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_excel_imports_content_hash"), table_name="excel_imports")
+    op.drop_index(op.f("ix_excel_imports_id"), table_name="excel_imports")
+    op.drop_table("excel_imports")
@@ -0,0 +1,37 @@
+"""Add status and checkpoint columns to excel_imports for resumable loads
+
+Revision ID: add_import_checkpoints
+Revises: add_student_data_snapshots
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_import_checkpoints'
+down_revision: Union[str, None] = 'add_student_data_snapshots'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las cargas registradas hasta ahora están completas
+    op.add_column("excel_imports", sa.Column("status", sa.String(), server_default="completed", nullable=False))
+    op.add_column("excel_imports", sa.Column("checkpoint", sa.JSON(), nullable=True))
+    op.add_column("excel_imports", sa.Column("source_path", sa.String(), nullable=True))
+    op.add_column("excel_imports", sa.Column("job_id", sa.String(), nullable=True))
+    op.add_column("excel_imports", sa.Column("error_message", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("excel_imports", "error_message")
+    op.drop_column("excel_imports", "job_id")
+    op.drop_column("excel_imports", "source_path")
+    op.drop_column("excel_imports", "checkpoint")
+    op.drop_column("excel_imports", "status")
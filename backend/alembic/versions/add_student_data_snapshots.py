@@ -0,0 +1,38 @@
+"""Add period-partitioned student_data_snapshots table
+
+Revision ID: add_student_data_snapshots
+Revises: add_student_row_fingerprint
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_student_data_snapshots'
+down_revision: Union[str, None] = 'add_student_row_fingerprint'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Mismas columnas que student_data (sin los campos de validación), más el periodo.
+    # Las particiones por periodo se crean al importar cada periodo.
+    op.execute("""
+        CREATE TABLE student_data_snapshots (
+            period VARCHAR NOT NULL,
+            LIKE student_data INCLUDING DEFAULTS,
+            loaded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (period, id)
+        ) PARTITION BY LIST (period)
+    """)
+    op.execute("ALTER TABLE student_data_snapshots DROP COLUMN is_validated, DROP COLUMN validation_date")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Elimina también todas las particiones
+    op.execute("DROP TABLE student_data_snapshots")
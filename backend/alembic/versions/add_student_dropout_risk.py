@@ -0,0 +1,38 @@
+"""Add riesgo_desercion to student_data for stored dropout-risk scores
+
+Revision ID: add_student_dropout_risk
+Revises: add_student_period_rollups
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_student_dropout_risk'
+down_revision: Union[str, None] = 'add_student_period_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los estudiantes existentes quedan pendientes (riesgo nulo); se puntúan con
+    # la siguiente carga o con POST /api/admin/analytics/dropout-risk/rescore. Mientras
+    # tanto, los conteos en riesgo usan el PGA acumulado (ver at_risk_condition)
+    op.add_column("student_data", sa.Column("riesgo_desercion", sa.Float(), nullable=True))
+    op.create_index("ix_student_data_riesgo_desercion", "student_data", ["riesgo_desercion"])
+    op.create_index(
+        "ix_student_data_riesgo_pendiente", "student_data", ["id"],
+        postgresql_where=sa.text("riesgo_desercion IS NULL")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_student_data_riesgo_pendiente", table_name="student_data")
+    op.drop_index("ix_student_data_riesgo_desercion", table_name="student_data")
+    op.drop_column("student_data", "riesgo_desercion")
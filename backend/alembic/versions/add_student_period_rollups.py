@@ -0,0 +1,59 @@
+"""Add student_period_rollups with per-period, per-program GPA aggregates
+
+Revision ID: add_student_period_rollups
+Revises: add_import_checkpoints
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.student_data import ROLLUP_METRICS as METRICS, ROLLUP_STATISTICS as STATISTICS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_student_period_rollups'
+down_revision: Union[str, None] = 'add_import_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "student_period_rollups",
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("programa", sa.String(), nullable=True),
+        sa.Column("student_count", sa.Integer(), nullable=False),
+        *(
+            sa.Column(f"{metric}_{statistic}", sa.Integer() if statistic == "count" else sa.Float(), nullable=True)
+            for metric in METRICS
+            for statistic in STATISTICS
+        ),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_student_period_rollups_period_programa", "student_period_rollups", ["period", "programa"])
+
+    # Agregados de los periodos ya importados
+    aggregates = ", ".join(
+        f"count({metric}), avg({metric}), var_samp({metric}), "
+        f"percentile_cont(0.25) WITHIN GROUP (ORDER BY {metric}), "
+        f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {metric}), "
+        f"percentile_cont(0.75) WITHIN GROUP (ORDER BY {metric})"
+        for metric in METRICS
+    )
+    columns = ", ".join(f"{metric}_{statistic}" for metric in METRICS for statistic in STATISTICS)
+    op.execute(f"""
+        INSERT INTO student_period_rollups (period, programa, student_count, {columns})
+        SELECT period, programa, count(*), {aggregates}
+        FROM student_data_snapshots
+        GROUP BY period, programa
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_student_period_rollups_period_programa", table_name="student_period_rollups")
+    op.drop_table("student_period_rollups")
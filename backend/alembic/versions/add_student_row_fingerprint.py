@@ -0,0 +1,28 @@
+"""Add row_fingerprint to student_data for incremental imports
+
+Revision ID: add_student_row_fingerprint
+Revises: add_excel_imports
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_student_row_fingerprint'
+down_revision: Union[str, None] = 'add_excel_imports'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("student_data", sa.Column("row_fingerprint", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("student_data", "row_fingerprint")
@@ -47,6 +47,35 @@ class Settings(BaseSettings):
     ATTACHMENTS_DIR: str = "static/attachments"
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
     
+    # Número de hilos para los trabajos de carga de Excel en segundo plano
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    
+    # Número de procesos para leer en paralelo las hojas de una carga multi-hoja
+    INGESTION_PROCESSES: int = int(os.getenv("INGESTION_PROCESSES", str(os.cpu_count() or 2)))
+    
+    # Caché en disco de archivos Excel subidos y sus hojas leídas (ver app/utils/upload_cache.py)
+    UPLOAD_CACHE_DIR: str = os.getenv("UPLOAD_CACHE_DIR", "temp_uploads/cache")
+    UPLOAD_CACHE_MAX_MB: int = int(os.getenv("UPLOAD_CACHE_MAX_MB", "1024"))
+    UPLOAD_CACHE_TTL_SECONDS: int = int(os.getenv("UPLOAD_CACHE_TTL_SECONDS", "1800"))
+    
+    # Copias de los archivos de cargas en curso, para reanudarlas si se interrumpen
+    INGESTION_RESUME_DIR: str = os.getenv("INGESTION_RESUME_DIR", "temp_uploads/imports")
+    
+    # Vigencia máxima de las estadísticas del dashboard en caché; las escrituras
+    # conocidas (cargas, registros, validaciones) las invalidan antes
+    DASHBOARD_STATS_TTL_SECONDS: int = int(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "60"))
+    
+    # Intervalo con que se envían las estadísticas a los WebSocket del dashboard
+    DASHBOARD_STREAM_INTERVAL_SECONDS: float = float(os.getenv("DASHBOARD_STREAM_INTERVAL_SECONDS", "30"))
+    
+    # Mensajes pendientes por cliente WebSocket y tiempo máximo de un envío;
+    # al superarlos el cliente se desconecta (ver ConnectionManager)
+    WEBSOCKET_QUEUE_SIZE: int = int(os.getenv("WEBSOCKET_QUEUE_SIZE", "32"))
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WEBSOCKET_SEND_TIMEOUT_SECONDS", "10"))
+    
+    # Riesgo de deserción (entre 0 y 1) desde el que un estudiante se cuenta en riesgo
+    DROPOUT_RISK_THRESHOLD: float = float(os.getenv("DROPOUT_RISK_THRESHOLD", "0.5"))
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
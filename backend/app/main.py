@@ -1,14 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import os
 
 # Importar todos los modelos para que SQLAlchemy los registre
-from app.models.models import Base, User, StudentData, AcademicRecord, Course, Enrollment, Survey, Question, Option, SurveyResponse, AnswerDetail, Notification, SupportTicket, TicketAttachment
+from app.models.models import Base, User, StudentData, AcademicRecord, Course, Enrollment, Survey, Question, Option, SurveyResponse, AnswerDetail, Notification, SupportTicket, TicketAttachment, ExcelImport
 
 # Importar rutas
 from app.routes import users, surveys, support, dashboard
 from app.routes import auth, admin
+from app.utils.ingestion_metrics import ingestion_metrics
 
 app = FastAPI(
     title="Sistema de Prevención de Deserción Estudiantil",
@@ -46,3 +48,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "version": "2.0.0"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas de las cargas de datos y de los WebSocket en formato de texto de Prometheus."""
+    return ingestion_metrics.render() + admin.manager.render_metrics()
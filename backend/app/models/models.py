@@ -1,9 +1,14 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Text, Enum
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Text, Enum, JSON, Index
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
+from app.models.student_data import (
+    student_data_snapshots as _student_data_snapshots,
+    student_period_rollups as _student_period_rollups,
+)
+
 Base = declarative_base()
 
 class UserRole(str, enum.Enum):
@@ -91,9 +96,25 @@ class StudentData(Base):
     periodo_ingreso = Column(String)
     peri_in_prog_vigente = Column(String)
     
+    # Huella del contenido de la fila importada, para detectar cambios en recargas
+    row_fingerprint = Column(BigInteger)
+    
+    # Riesgo de deserción entre 0 y 1 (ver app/utils/dropout_risk.py); nulo
+    # mientras el estudiante esté pendiente de puntuar
+    riesgo_desercion = Column(Float, index=True)
+    
+    __table_args__ = (
+        Index("ix_student_data_riesgo_pendiente", "id", postgresql_where=riesgo_desercion.is_(None)),
+    )
+    
     # Relación con User
     user = relationship("User", back_populates="student_data", uselist=False)
 
+# Las tablas de fotos y agregados por periodo se declaran en
+# app/models/student_data.py; aquí solo se registran en los metadatos de Alembic
+student_data_snapshots = _student_data_snapshots.to_metadata(Base.metadata)
+student_period_rollups = _student_period_rollups.to_metadata(Base.metadata)
+
 # AHORA DEFINIR User
 class User(Base):
     __tablename__ = "users"
@@ -289,3 +310,25 @@ class TicketAttachment(Base):
     
     # Relaciones
     ticket = relationship("SupportTicket", back_populates="attachments")
+
+class ExcelImport(Base):
+    """
+    Registro de cargas de Excel, identificadas por el hash del archivo y la hoja.
+    
+    Mientras la carga corre guarda un punto de control (filas confirmadas por
+    hoja) para poder reanudarla si se interrumpe.
+    """
+    __tablename__ = "excel_imports"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256(archivo + hoja)
+    sheet_name = Column(String, nullable=False)
+    filename = Column(String)
+    statistics = Column(JSON)
+    status = Column(String, nullable=False, server_default="completed")  # running, completed, failed
+    checkpoint = Column(JSON)  # {"sheets": [...], "rows": {hoja: filas}, "partial": {...}, "completed": {...}}
+    source_path = Column(String)  # copia del archivo para reanudar
+    job_id = Column(String)
+    error_message = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
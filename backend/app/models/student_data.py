@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, Date, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, DateTime, Float, Date, Text, Table, Index
+from sqlalchemy.sql import func
 from app.database import Base
 
 class StudentData(Base):
@@ -95,5 +95,59 @@ class StudentData(Base):
     is_validated = Column(Boolean, default=False)
     validation_date = Column(DateTime)
     
-    # Relación con usuario registrado
-    user = relationship("User", back_populates="student_data", uselist=False)
+    # Huella del contenido de la fila importada, para detectar cambios en recargas
+    row_fingerprint = Column(BigInteger)
+    
+    # Riesgo de deserción entre 0 y 1 (ver app/utils/dropout_risk.py); nulo
+    # mientras el estudiante esté pendiente de puntuar
+    riesgo_desercion = Column(Float, index=True)
+    
+    __table_args__ = (
+        Index("ix_student_data_riesgo_pendiente", "id", postgresql_where=riesgo_desercion.is_(None)),
+    )
+    
+    # Sin relación con User: User pertenece al registro de app.models.models y
+    # una relación por nombre entre registros distintos no se puede resolver
+
+
+# Columnas de StudentData que no forman parte de la foto de un periodo
+SNAPSHOT_EXCLUDED_COLUMNS = ("is_validated", "validation_date", "riesgo_desercion")
+
+# Foto de los datos del Excel por periodo (una fila por estudiante y periodo).
+# Particionada por LIST(period): cada periodo vive en su propia partición,
+# creada al importar ese periodo por primera vez (ver excel_loader).
+student_data_snapshots = Table(
+    "student_data_snapshots",
+    Base.metadata,
+    Column("period", String, primary_key=True),
+    *(
+        Column(column.name, column.type, primary_key=column.primary_key)
+        for column in StudentData.__table__.columns
+        if column.name not in SNAPSHOT_EXCLUDED_COLUMNS
+    ),
+    Column("loaded_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    postgresql_partition_by="LIST (period)",
+)
+
+# Métricas de la foto que se agregan por periodo y programa
+ROLLUP_METRICS = ("pga_acumulado", "promedio_periodo")
+
+# Estadísticos de cada métrica en la tabla de agregados
+ROLLUP_STATISTICS = ("count", "mean", "variance", "p25", "median", "p75")
+
+# Agregados de la foto por periodo y programa, recalculados al importar cada
+# periodo (ver refresh_period_rollup en excel_loader); programa puede ser nulo.
+student_period_rollups = Table(
+    "student_period_rollups",
+    Base.metadata,
+    Column("period", String, nullable=False),
+    Column("programa", String),
+    Column("student_count", Integer, nullable=False),
+    *(
+        Column(f"{metric}_{statistic}", Integer if statistic == "count" else Float)
+        for metric in ROLLUP_METRICS
+        for statistic in ROLLUP_STATISTICS
+    ),
+    Column("refreshed_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Index("ix_student_period_rollups_period_programa", "period", "programa"),
+)
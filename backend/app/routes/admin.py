@@ -1,54 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, UploadFile, File, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Dict, Any
+from sqlalchemy import func, and_, or_, true, tuple_
+from typing import List, Dict, Any, Union
 from datetime import datetime, timedelta
 import json
+import logging
 import os
-import shutil
+import zipfile
 from uuid import uuid4
-from app.database import get_db
-from app.models.models import User, UserRole
-from app.models.student_data import StudentData
+import asyncio
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models.models import ExcelImport, User, UserRole
+from app.models.student_data import StudentData, student_period_rollups
 from app.schemas import AdminDashboardStats, StudentStatsResponse
 from app.auth.jwt import get_current_active_user
-from app.utils.excel_loader import load_excel_to_database
+from app.utils.excel_loader import (
+    IMPORT_COMPLETED, compute_upload_hash, find_completed_import, find_interrupted_import, sheet_upload_hash
+)
+from app.utils.cohort_cube import DIMENSIONS, query_cohort_cube, resolve_dimensions, resolve_measures
+from app.utils.dashboard_stream import ConnectionManager, StatsProducer
+from app.utils.dropout_risk import at_risk_condition, score_students
+from app.utils.excel_reader import COPY_FORMATS, SUPPORTED_EXTENSIONS, list_sheet_names
+from app.utils.ingestion_jobs import JOB_QUEUED, JOB_RUNNING, ingestion_jobs
+from app.utils.score_histograms import (
+    DEFAULT_SUBJECTS, GROUP_COLUMNS, compute_score_histograms, resolve_subjects, validate_edges
+)
+from app.utils.stats_cache import analytics_cache, dashboard_cache
+from app.utils.upload_cache import upload_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Gestión de conexiones WebSocket para actualizaciones en tiempo real
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+manager = ConnectionManager(
+    queue_size=settings.WEBSOCKET_QUEUE_SIZE,
+    send_timeout=settings.WEBSOCKET_SEND_TIMEOUT_SECONDS
+)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+def _dashboard_stats_for_stream() -> Dict[str, Any]:
+    """Estadísticas del dashboard con una sesión propia (corre en un hilo)."""
+    db = SessionLocal()
+    try:
+        return get_dashboard_stats_data(db)
+    finally:
+        db.close()
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+stats_producer = StatsProducer(manager, _dashboard_stats_for_stream, settings.DASHBOARD_STREAM_INTERVAL_SECONDS)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+def _save_upload(source, temp_path: str, sheet_name: str) -> str:
+    """
+    Copia el archivo subido a disco y retorna su hash de contenido más hoja.
+    
+    Es bloqueante, se ejecuta fuera del event loop.
+    """
+    with open(temp_path, "wb") as buffer:
+        return compute_upload_hash(source, sheet_name, copy_to=buffer)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remover conexiones cerradas
-                self.active_connections.remove(connection)
+def _resolve_sheet_selection(temp_path: str, sheet_name: str) -> Union[str, List[str]]:
+    """
+    Interpreta el parámetro sheet_name de la carga.
+    
+    "all" selecciona todas las hojas del libro y una lista separada por comas
+    selecciona varias; en ambos casos retorna la lista de hojas. Cualquier otro
+    valor es una hoja única y se retorna tal cual. En un Excel se comprueba
+    antes de encolar que el libro se pueda leer y tenga las hojas pedidas.
+    """
+    multiple = sheet_name == "all" or "," in sheet_name
+    if os.path.splitext(temp_path)[1].lower() in COPY_FORMATS:
+        if multiple:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La carga de varias hojas solo aplica a archivos Excel"
+            )
+        return sheet_name
+    
+    try:
+        available = list_sheet_names(temp_path)
+    except (ValueError, zipfile.BadZipFile) as e:
+        # Archivo dañado o que no es un libro de Excel: error del cliente, como en /excel-sheets
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No se pudieron leer las hojas del archivo: {str(e)}"
+        )
+    if sheet_name == "all":
+        return available
+    
+    selected = [name.strip() for name in sheet_name.split(",") if name.strip()] if multiple else [sheet_name]
+    missing = [name for name in selected if name not in available]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Hojas no encontradas en el archivo: {', '.join(missing)}"
+        )
+    return selected if multiple else sheet_name
+
+def _is_import_running(record: ExcelImport) -> bool:
+    """Indica si la carga tiene un trabajo activo en este proceso (si no, se interrumpió)."""
+    job = ingestion_jobs.get(record.job_id) if record.job_id else None
+    return job is not None and job["status"] in (JOB_QUEUED, JOB_RUNNING)
 
-manager = ConnectionManager()
+def _job_progress_notifier(loop: asyncio.AbstractEventLoop):
+    """Crea el callback que publica el progreso de un trabajo por WebSocket desde el hilo del trabajo."""
+    def notify(job: Dict[str, Any]):
+        message = json.dumps({
+            "type": "ingestion_progress",
+            "job": job,
+            "timestamp": datetime.now().isoformat()
+        }, default=str)
+        # Los avances de un mismo trabajo se fusionan si un cliente va atrasado
+        asyncio.run_coroutine_threadsafe(manager.broadcast(message, key=f"ingestion_progress:{job['job_id']}"), loop)
+    return notify
 
-@router.post("/upload-excel")
+@router.post("/upload-excel", status_code=status.HTTP_202_ACCEPTED)
 async def upload_excel_data(
+    response: Response,
     file: UploadFile = File(...),
     sheet_name: str = "202430",
+    force: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Carga datos desde un archivo Excel a la base de datos."""
+    """
+    Encola la carga de un archivo Excel, CSV o Parquet a la base de datos.
+    
+    La carga corre como trabajo en segundo plano; el progreso se consulta en
+    /ingestion-jobs/{job_id} y se publica por el WebSocket de administración.
+    Si el mismo archivo y hoja ya se cargaron, se retornan las estadísticas
+    de esa carga sin volver a procesarlo, salvo que se envíe force=true.
+    
+    sheet_name acepta varias hojas separadas por comas, o "all" para todas;
+    las hojas se leen en paralelo y las estadísticas se reportan por hoja.
+    
+    Los archivos Excel pasan por la caché de cargas: si /excel-sheets ya
+    recibió el mismo archivo, sus hojas se toman leídas de la caché.
+    
+    Si una carga anterior del mismo archivo y hoja se interrumpió, continúa
+    desde su punto de control en lugar de empezar de cero (salvo force=true).
+    """
     # Verificar permisos de administrador
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -58,70 +148,217 @@ async def upload_excel_data(
     
 # Safe: ext is validated and temp_filename is not user-controlled
     ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in ('.xlsx', '.xls'):
+    if ext not in SUPPORTED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Solo se permiten archivos Excel (.xlsx, .xls)"
+            detail="Solo se permiten archivos Excel (.xlsx, .xls), CSV (.csv) o Parquet (.parquet)"
         )
 
+    # Crear directorio temporal si no existe
+    temp_dir = "temp_uploads"
+    os.makedirs(temp_dir, exist_ok=True)
+    
+    # Guardar archivo temporalmente con nombre seguro
+    temp_filename = f"{uuid4()}{ext}"
+    temp_path = os.path.join(temp_dir, temp_filename)
+    cache_key = None
+    
     try:
-        # Crear directorio temporal si no existe
-        temp_dir = "temp_uploads"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Guardar archivo temporalmente con nombre seguro
-        temp_filename = f"{uuid4()}{ext}"
-        temp_path = os.path.join(temp_dir, temp_filename)
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        if ext in COPY_FORMATS:
+            content_hash = await asyncio.to_thread(_save_upload, file.file, temp_path, sheet_name)
+            logger.info(f"Archivo guardado temporalmente en: {temp_path}")
+        else:
+            # Excel: el archivo queda en la caché de cargas, que también guarda sus hojas leídas
+            # La entrada queda reservada hasta que el trabajo de carga la libere
+            cached = await asyncio.to_thread(upload_cache.store, file.file, ext, True)
+            cache_key, temp_path = cached["key"], cached["path"]
+            content_hash = sheet_upload_hash(cached["digest"], sheet_name)
+            logger.info(f"Archivo en caché de cargas: {temp_path} (ya estaba: {cached['hit']})")
         
-        print(f"Archivo guardado temporalmente en: {temp_path}")
-        print(f"Intentando leer hoja: {sheet_name}")
+        # Si el archivo ya se cargó, responder con las estadísticas anteriores
+        previous_import = None if force else find_completed_import(db, content_hash)
+        if previous_import:
+            if cache_key:
+                upload_cache.release(cache_key)
+            else:
+                os.remove(temp_path)
+            response.status_code = status.HTTP_200_OK
+            return {
+                "message": "El archivo ya fue cargado previamente",
+                "statistics": previous_import.statistics,
+                "sheet_used": sheet_name,
+                "duplicate": True,
+                "imported_at": previous_import.updated_at or previous_import.created_at
+            }
         
-        # Cargar datos a la base de datos
-        result = load_excel_to_database(temp_path, db, sheet_name)
+        # Una carga interrumpida del mismo archivo y hoja continúa desde su punto de control
+        interrupted = None if force else find_interrupted_import(db, content_hash)
+        if interrupted and _is_import_running(interrupted):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La carga de este archivo ya está en curso"
+            )
         
-        # Limpiar archivo temporal
-        os.remove(temp_path)
+        sheets = await asyncio.to_thread(_resolve_sheet_selection, temp_path, sheet_name)
         
-        # Notificar actualización en tiempo real
-        await notify_admin_update(f"Datos de Excel cargados: {result['successful_inserts']} registros")
+        logger.info(f"Encolando carga de la hoja: {sheet_name}")
         
-        return {
-            "message": "Datos cargados exitosamente",
-            "statistics": result,
-            "sheet_used": sheet_name
-        }
+        # El trabajo elimina el archivo temporal al terminar
+        job = ingestion_jobs.submit(
+            temp_path,
+            sheets,
+            filename=file.filename,
+            content_hash=content_hash,
+            on_progress=_job_progress_notifier(asyncio.get_running_loop()),
+            cache_key=cache_key,
+            resume=interrupted is not None
+        )
         
-    except ValueError as e:
-        # Error específico de hoja no encontrada
-        if "Worksheet" in str(e) or "hoja" in str(e).lower():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"La hoja '{sheet_name}' no existe en el archivo. Verifique el nombre de la hoja."
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Error procesando el archivo: {str(e)}"
-            )
+    except HTTPException:
+        if cache_key:
+            upload_cache.release(cache_key)
+        elif os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     except Exception as e:
-        # Limpiar archivo temporal en caso de error
-        if os.path.exists(temp_path):
+        # Limpiar archivo temporal en caso de error (los de la caché vencen solos)
+        if cache_key:
+            upload_cache.release(cache_key)
+        elif os.path.exists(temp_path):
             os.remove(temp_path)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno procesando el archivo: {str(e)}"
         )
+    
+    return {
+        "message": "Carga de datos encolada",
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/admin/ingestion-jobs/{job['job_id']}",
+        "sheet_used": sheet_name,
+        "sheets": sheets if isinstance(sheets, list) else [sheets],
+        "duplicate": False,
+        "resumed": job["resumed"]
+    }
+
+@router.get("/ingestion-jobs/{job_id}")
+def get_ingestion_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Obtiene el estado de un trabajo de carga de Excel."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta información"
+        )
+    
+    job = ingestion_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo de carga no encontrado"
+        )
+    
+    return job
+
+@router.get("/ingestion-checkpoints")
+def list_ingestion_checkpoints(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Lista las cargas que no terminaron, con su avance guardado por hoja."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta información"
+        )
+    
+    records = db.query(ExcelImport).filter(
+        ExcelImport.status != IMPORT_COMPLETED
+    ).order_by(ExcelImport.updated_at.desc().nullslast()).all()
+    
+    checkpoints = []
+    for record in records:
+        checkpoint = record.checkpoint or {}
+        running = _is_import_running(record)
+        checkpoints.append({
+            "import_id": record.id,
+            "filename": record.filename,
+            "sheet_name": record.sheet_name,
+            "status": record.status if running or record.status != "running" else "interrupted",
+            "rows_committed": checkpoint.get("rows", {}),
+            "completed_sheets": list(checkpoint.get("completed", {})),
+            "error_message": record.error_message,
+            "updated_at": record.updated_at or record.created_at,
+            "resumable": not running and bool(record.source_path) and os.path.exists(record.source_path)
+        })
+    return checkpoints
+
+@router.post("/ingestion-checkpoints/{import_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_ingestion(
+    import_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Reanuda una carga interrumpida desde su punto de control, con la copia guardada del archivo."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden cargar datos"
+        )
+    
+    record = db.query(ExcelImport).filter(ExcelImport.id == import_id).first()
+    if not record or record.status == IMPORT_COMPLETED or not record.checkpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No hay una carga pendiente con ese identificador"
+        )
+    if _is_import_running(record):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La carga ya está en curso"
+        )
+    if not record.source_path or not os.path.exists(record.source_path):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo de la carga ya no está disponible; vuelve a subirlo"
+        )
+    
+    sheets = record.checkpoint["sheets"]
+    job = ingestion_jobs.submit(
+        record.source_path,
+        sheets if len(sheets) > 1 else sheets[0],
+        filename=record.filename,
+        content_hash=record.content_hash,
+        on_progress=_job_progress_notifier(asyncio.get_running_loop()),
+        resume=True
+    )
+    return {
+        "message": "Carga reanudada",
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/admin/ingestion-jobs/{job['job_id']}",
+        "rows_committed": record.checkpoint.get("rows", {}),
+        "completed_sheets": list(record.checkpoint.get("completed", {}))
+    }
 
 @router.get("/excel-sheets")
 async def get_excel_sheets(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Obtiene la lista de hojas disponibles en un archivo Excel."""
+    """
+    Obtiene la lista de hojas disponibles en un archivo Excel.
+    
+    Para .xlsx se leen solo los metadatos del libro e incluye filas y
+    columnas declaradas por hoja. El archivo queda en la caché de cargas y
+    solo la hoja recomendada se empieza a leer en segundo plano, de modo que
+    cargarla después en /upload-excel no vuelve a leer el Excel; las demás
+    hojas se leen cuando se cargan.
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -135,142 +372,152 @@ async def get_excel_sheets(
         )
     
     try:
-        import pandas as pd
-        
-        # Crear directorio temporal
-        temp_dir = "temp_uploads"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Guardar archivo temporalmente
-        temp_filename = f"{uuid4()}_{file.filename}"
-        temp_path = os.path.join(temp_dir, temp_filename)
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Obtener lista de hojas
-        excel_file = pd.ExcelFile(temp_path)
-        sheets = excel_file.sheet_names
-        
-        # Limpiar archivo temporal
-        os.remove(temp_path)
+        ext = os.path.splitext(file.filename)[1].lower()
+        cached = await asyncio.to_thread(upload_cache.store, file.file, ext)
+        sheet_details = await asyncio.to_thread(upload_cache.sheet_details, cached["key"])
+        sheets = [sheet["name"] for sheet in sheet_details]
+        recommended_sheet = "202430" if "202430" in sheets else sheets[0] if sheets else None
+        if recommended_sheet is not None:
+            await asyncio.to_thread(upload_cache.prewarm, cached["key"], [recommended_sheet])
         
         return {
             "sheets": sheets,
+            "sheet_details": sheet_details,
             "total_sheets": len(sheets),
-            "recommended_sheet": "202430" if "202430" in sheets else sheets[0] if sheets else None
+            "recommended_sheet": recommended_sheet
         }
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        # Limpiar archivo temporal en caso de error
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error leyendo el archivo Excel: {str(e)}"
         )
 
+def _parse_resync_request(text: str) -> Union[Dict[str, Any], None]:
+    """Interpreta {"type": "resync", "stream": ..., "version": n}; otros mensajes se ignoran."""
+    try:
+        request = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(request, dict) or request.get("type") != "resync":
+        return None
+    version = request.get("version")
+    return {
+        "since": version if isinstance(version, int) else None,
+        "stream": request.get("stream"),
+    }
+
 @router.websocket("/ws/admin-dashboard")
-async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, stream: Union[str, None] = None, version: Union[int, None] = None):
+    # Las estadísticas las envía stats_producer: una foto al conectar (o las
+    # diferencias desde stream/version, si el cliente reconecta) y después solo
+    # diferencias. Aquí se atienden los pedidos de resync del cliente.
     try:
+        await stats_producer.subscribe(websocket, since=version, stream=stream)
         while True:
-            # Enviar estadísticas actualizadas cada 30 segundos
-            stats = get_dashboard_stats_data(db)
-            await websocket.send_text(json.dumps(stats, default=str))
-            await asyncio.sleep(30)
+            request = _parse_resync_request(await websocket.receive_text())
+            if request is not None:
+                await stats_producer.resync(websocket, **request)
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        # También si la conexión termina con otro error: el canal y su tarea de envío no deben quedar vivos
+        stats_producer.unsubscribe(websocket)
 
 def get_dashboard_stats_data(db: Session) -> Dict[str, Any]:
-    """Obtiene las estadísticas del dashboard en tiempo real."""
-    # Estadísticas básicas
-    total_students = db.query(User).filter(User.role == UserRole.STUDENT).count()
-    active_students = db.query(User).filter(
-        and_(User.role == UserRole.STUDENT, User.is_active == True)
-    ).count()
-    validated_students = db.query(User).filter(
-        and_(User.role == UserRole.STUDENT, User.data_validated == True)
-    ).count()
-    pending_validation = total_students - validated_students
-    
-    # Promedio de PGA
-    avg_gpa_result = db.query(func.avg(StudentData.pga_acumulado)).filter(
-        StudentData.pga_acumulado.isnot(None)
-    ).scalar()
-    average_gpa = round(avg_gpa_result, 2) if avg_gpa_result else 0.0
-    
-    # Promedio de ICFES (matemáticas como ejemplo)
-    avg_icfes_result = db.query(func.avg(StudentData.ptj_matematicas)).filter(
-        StudentData.ptj_matematicas.isnot(None)
-    ).scalar()
-    average_icfes = round(avg_icfes_result, 2) if avg_icfes_result else 0.0
-    
-    # Estudiantes por programa
-    students_by_program = {}
-    program_stats = db.query(
-        StudentData.programa, func.count(User.id)
-    ).join(User, User.student_data_id == StudentData.id).filter(
-        StudentData.programa.isnot(None)
-    ).group_by(StudentData.programa).all()
-    
-    for programa, count in program_stats:
-        students_by_program[programa] = count
-    
-    # Estudiantes por situación académica
-    students_by_situation = {}
-    situation_stats = db.query(
-        StudentData.situacion, func.count(User.id)
-    ).join(User, User.student_data_id == StudentData.id).filter(
-        StudentData.situacion.isnot(None)
-    ).group_by(StudentData.situacion).all()
-    
-    for situacion, count in situation_stats:
-        students_by_situation[situacion] = count
-    
-    # Estudiantes por estrato
-    students_by_stratum = {}
-    stratum_stats = db.query(
-        StudentData.estrato, func.count(User.id)
-    ).join(User, User.student_data_id == StudentData.id).filter(
-        StudentData.estrato.isnot(None)
-    ).group_by(StudentData.estrato).all()
-    
-    for estrato, count in stratum_stats:
-        students_by_stratum[f"Estrato {estrato}"] = count
-    
-    # Registros recientes (últimos 7 días)
+    """
+    Obtiene las estadísticas del dashboard.
+
+    Se sirven desde memoria mientras la versión de los datos no cambie y no
+    venza DASHBOARD_STATS_TTL_SECONDS (ver app/utils/stats_cache.py);
+    last_updated indica cuándo se calcularon.
+    """
+    return dashboard_cache.get_or_compute("dashboard_stats", lambda: compute_dashboard_stats(db))
+
+
+def compute_dashboard_stats(db: Session) -> Dict[str, Any]:
+    """
+    Calcula las estadísticas del dashboard contra la base de datos.
+
+    Todo sale de una sola consulta sobre users ⋈ student_data: los conteos de
+    estudiantes son agregaciones condicionales (COUNT(*) FILTER), los
+    desgloses por programa, situación y estrato son GROUPING SETS de la misma
+    lectura, y los promedios, que abarcan todo student_data, salen de una
+    subconsulta de una sola fila. La consulta parte de esa fila y une users
+    con LEFT JOIN, así los promedios no se pierden cuando no hay usuarios.
+    """
+    is_student = User.role == UserRole.STUDENT
     week_ago = datetime.now() - timedelta(days=7)
-    recent_registrations = db.query(User).filter(
-        and_(
-            User.role == UserRole.STUDENT,
-            User.created_at >= week_ago
-        )
-    ).count()
-    
-    # Estudiantes en riesgo de deserción (ejemplo: PGA < 3.0)
-    dropout_risk_students = db.query(User).join(
+
+    # Los promedios abarcan todo student_data: una fila aparte, de la que parte la consulta
+    averages = db.query(
+        func.avg(StudentData.pga_acumulado).label("average_gpa"),
+        func.avg(StudentData.ptj_matematicas).label("average_icfes"),
+    ).subquery("averages")
+
+    # Máscara de GROUPING(programa, situacion, estrato): un bit en 1 por columna fuera del conjunto
+    grouping = func.grouping(StudentData.programa, StudentData.situacion, StudentData.estrato)
+    rows = db.query(
+        grouping.label("grouping"),
+        StudentData.programa,
+        StudentData.situacion,
+        StudentData.estrato,
+        func.count(User.id).label("users"),
+        func.count(User.id).filter(is_student).label("total_students"),
+        func.count(User.id).filter(and_(is_student, User.is_active == True)).label("active_students"),
+        func.count(User.id).filter(and_(is_student, User.data_validated == True)).label("validated_students"),
+        func.count(User.id).filter(and_(is_student, User.created_at >= week_ago)).label("recent_registrations"),
+        func.count(User.id).filter(
+            and_(is_student, at_risk_condition())
+        ).label("dropout_risk_students"),
+        func.max(averages.c.average_gpa).label("average_gpa"),
+        func.max(averages.c.average_icfes).label("average_icfes"),
+    ).select_from(
+        averages
+    ).outerjoin(
+        User, true()
+    ).outerjoin(
         StudentData, User.student_data_id == StudentData.id
-    ).filter(
-        and_(
-            User.role == UserRole.STUDENT,
-            StudentData.pga_acumulado < 3.0
+    ).group_by(
+        func.grouping_sets(
+            tuple_(),
+            tuple_(StudentData.programa),
+            tuple_(StudentData.situacion),
+            tuple_(StudentData.estrato),
         )
-    ).count()
-    
+    ).all()
+
+    totals = None
+    students_by_program = {}
+    students_by_situation = {}
+    students_by_stratum = {}
+    for row in rows:
+        if row.grouping == 0b111:
+            totals = row
+        elif row.grouping == 0b011 and row.programa is not None:
+            students_by_program[row.programa] = row.users
+        elif row.grouping == 0b101 and row.situacion is not None:
+            students_by_situation[row.situacion] = row.users
+        elif row.grouping == 0b110 and row.estrato is not None:
+            students_by_stratum[f"Estrato {row.estrato}"] = row.users
+
     return {
-        "total_students": total_students,
-        "active_students": active_students,
-        "validated_students": validated_students,
-        "pending_validation": pending_validation,
-        "average_gpa": average_gpa,
-        "average_icfes": average_icfes,
+        "total_students": totals.total_students,
+        "active_students": totals.active_students,
+        "validated_students": totals.validated_students,
+        "pending_validation": totals.total_students - totals.validated_students,
+        "average_gpa": round(totals.average_gpa, 2) if totals.average_gpa else 0.0,
+        "average_icfes": round(totals.average_icfes, 2) if totals.average_icfes else 0.0,
         "students_by_program": students_by_program,
         "students_by_situation": students_by_situation,
         "students_by_stratum": students_by_stratum,
-        "recent_registrations": recent_registrations,
-        "dropout_risk_students": dropout_risk_students,
+        "recent_registrations": totals.recent_registrations,
+        "dropout_risk_students": totals.dropout_risk_students,
         "last_updated": datetime.now().isoformat()
     }
 
@@ -342,6 +589,9 @@ def get_students_list(
     
     return result
 
+def _round_or_none(value, digits: int = 4):
+    return round(value, digits) if value is not None else None
+
 @router.get("/analytics/gpa-trends")
 def get_gpa_trends(
     period_start: str = None,
@@ -350,33 +600,81 @@ def get_gpa_trends(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Obtiene tendencias de PGA para gráficas dinámicas."""
+    """
+    Obtiene tendencias de PGA para gráficas dinámicas.
+    
+    Lee los agregados por periodo y programa de student_period_rollups, que
+    cada carga recalcula para su periodo: la consulta recorre periodos por
+    programas, no estudiantes. Además del promedio y la cantidad de
+    estudiantes con PGA, retorna varianza y cuartiles del PGA acumulado y
+    del promedio del periodo. Si aún no hay fotos cargadas, retorna el
+    promedio actual por programa (periodo None).
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para acceder a esta información"
         )
     
-    query = db.query(
-        StudentData.programa,
-        func.avg(StudentData.pga_acumulado).label('avg_gpa'),
-        func.count(StudentData.id).label('student_count')
-    ).filter(StudentData.pga_acumulado.isnot(None))
+    rollups = student_period_rollups.c
+    query = db.query(student_period_rollups).filter(rollups.pga_acumulado_count > 0)
     
+    if period_start:
+        query = query.filter(rollups.period >= period_start)
+    if period_end:
+        query = query.filter(rollups.period <= period_end)
     if program:
-        query = query.filter(StudentData.programa == program)
+        query = query.filter(rollups.programa == program)
     
-    results = query.group_by(StudentData.programa).all()
+    results = query.order_by(rollups.period, rollups.programa).all()
+    
+    if not results and not (period_start or period_end):
+        query = db.query(
+            StudentData.programa,
+            func.avg(StudentData.pga_acumulado).label('avg_gpa'),
+            func.count(StudentData.id).label('student_count')
+        ).filter(StudentData.pga_acumulado.isnot(None))
+        
+        if program:
+            query = query.filter(StudentData.programa == program)
+        
+        return [
+            {
+                "periodo": None,
+                "programa": result.programa,
+                "promedio_pga": round(result.avg_gpa, 2),
+                "cantidad_estudiantes": result.student_count
+            }
+            for result in query.group_by(StudentData.programa).all()
+        ]
+    
+    def metric_summary(result, metric):
+        return {
+            "cantidad": getattr(result, f"{metric}_count"),
+            **{
+                statistic: _round_or_none(getattr(result, f"{metric}_{statistic}"))
+                for statistic in ("mean", "variance", "p25", "median", "p75")
+            }
+        }
     
     return [
         {
+            "periodo": result.period,
             "programa": result.programa,
-            "promedio_pga": round(result.avg_gpa, 2),
-            "cantidad_estudiantes": result.student_count
+            "promedio_pga": round(result.pga_acumulado_mean, 2),
+            "cantidad_estudiantes": result.pga_acumulado_count,
+            "total_estudiantes": result.student_count,
+            "pga_acumulado": metric_summary(result, "pga_acumulado"),
+            "promedio_periodo": metric_summary(result, "promedio_periodo")
         }
         for result in results
     ]
 
+def _cached_score_histograms(db: Session, subjects: List[str], edges: List[float], group_by: Union[str, None]):
+    """Histogramas de puntaje servidos desde la caché por versión de datos."""
+    key = f"score_histograms:{','.join(subjects)}:{','.join(map(str, edges))}:{group_by}"
+    return analytics_cache.get_or_compute(key, lambda: compute_score_histograms(db, subjects, edges, group_by))
+
 @router.get("/analytics/icfes-distribution")
 def get_icfes_distribution(
     subject: str = "matematicas",
@@ -390,49 +688,204 @@ def get_icfes_distribution(
             detail="No tienes permisos para acceder a esta información"
         )
     
-    # Mapear materias a columnas
-    subject_columns = {
-        "matematicas": StudentData.ptj_matematicas,
-        "lectura_critica": StudentData.ptj_lectura_critica,
-        "ingles": StudentData.ptj_ingles,
-        "ciencias_naturales": StudentData.ptj_ciencias_naturales,
-        "sociales": StudentData.ptj_ciencias_sociales
-    }
-    
-    if subject not in subject_columns:
+    try:
+        subjects = resolve_subjects([subject])
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Materia no válida"
         )
     
-    column = subject_columns[subject]
-    
-    # Obtener distribución por rangos
+    # Obtener distribución por rangos (los bordes del histograma)
     ranges = [
         (0, 40, "Bajo"),
         (40, 60, "Medio"),
         (60, 80, "Alto"),
         (80, 100, "Superior")
     ]
+    edges = [float(min_score) for min_score, _, _ in ranges] + [float(ranges[-1][1])]
+    histogram = _cached_score_histograms(db, subjects, edges, None)[0]
     
-    distribution = []
-    for min_score, max_score, label in ranges:
-        count = db.query(StudentData).filter(
-            and_(
-                column >= min_score,
-                column < max_score,
-                column.isnot(None)
-            )
-        ).count()
-        
-        distribution.append({
+    return [
+        {
             "rango": label,
             "min_puntaje": min_score,
             "max_puntaje": max_score,
             "cantidad": count
-        })
+        }
+        for (min_score, max_score, label), count in zip(ranges, histogram["conteos"])
+    ]
+
+@router.get("/analytics/score-histograms")
+def get_score_histograms(
+    subjects: str = ",".join(DEFAULT_SUBJECTS),
+    edges: str = "0,10,20,30,40,50,60,70,80,90,100",
+    group_by: Union[str, None] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Histogramas de puntaje ICFES de varias materias con bordes arbitrarios.
+    
+    subjects son materias separadas por coma (cualquier columna ptj_*, con o
+    sin el prefijo) y edges los bordes crecientes de los intervalos
+    [borde_i, borde_i+1). Opcionalmente se agrupa por programa o estrato.
+    Todo sale de una sola lectura de student_data y se sirve desde la caché
+    mientras los datos no cambien.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta información"
+        )
     
-    return distribution
+    try:
+        subject_list = resolve_subjects([name for name in subjects.split(",") if name.strip()])
+        edge_list = validate_edges([edge for edge in edges.split(",") if edge.strip()])
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Solo se puede agrupar por: {', '.join(GROUP_COLUMNS)}")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "bordes": edge_list,
+        "agrupado_por": group_by,
+        "histogramas": _cached_score_histograms(db, subject_list, edge_list, group_by)
+    }
+
+@router.get("/analytics/cohort-cube")
+def get_cohort_cube(
+    dimensions: str = "programa",
+    measures: str = "",
+    programa: Union[str, None] = None,
+    situacion: Union[str, None] = None,
+    estrato: Union[str, None] = None,
+    sexo: Union[str, None] = None,
+    ceres: Union[str, None] = None,
+    tipo_estudiante: Union[str, None] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cubo de cohortes: medidas de los estudiantes por cualquier combinación
+    de dimensiones (programa, situacion, estrato, sexo, ceres,
+    tipo_estudiante).
+    
+    dimensions y measures van separadas por coma (medidas: cantidad,
+    promedio_pga, promedio_icfes, en_riesgo; por defecto todas). Cada
+    dimensión acepta además un valor como filtro, para profundizar en un
+    grupo. El cubo sale de una consulta con GROUP BY CUBE y queda en caché
+    por versión de datos; los filtros y agrupaciones contenidos en un cubo
+    ya calculado se responden sin consultar la base de datos.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta información"
+        )
+    
+    values = dict(
+        programa=programa, situacion=situacion, estrato=estrato,
+        sexo=sexo, ceres=ceres, tipo_estudiante=tipo_estudiante
+    )
+    filters = {dimension: values[dimension] for dimension in DIMENSIONS if values[dimension] is not None}
+    try:
+        dimension_list = resolve_dimensions([name for name in dimensions.split(",") if name.strip()])
+        measure_list = resolve_measures([name for name in measures.split(",") if name.strip()])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "dimensiones": dimension_list,
+        "medidas": measure_list,
+        "filtros": filters,
+        **query_cohort_cube(db, dimension_list, measure_list, filters)
+    }
+
+@router.get("/analytics/dropout-risk")
+def get_dropout_risk(
+    min_score: Union[float, None] = None,
+    program: Union[str, None] = None,
+    limit: int = 100,
+    offset: int = 0,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Estudiantes en riesgo de deserción, del mayor al menor riesgo.
+    
+    Lee el riesgo ya calculado en student_data.riesgo_desercion (ver
+    app/utils/dropout_risk.py), así la lista y el conteo son recorridos del
+    índice de esa columna. Por defecto min_score es
+    settings.DROPOUT_RISK_THRESHOLD. pendientes cuenta los estudiantes aún
+    sin puntuar.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta información"
+        )
+    
+    if min_score is None:
+        min_score = settings.DROPOUT_RISK_THRESHOLD
+    if not 0 <= min_score <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_score debe estar entre 0 y 1"
+        )
+    if limit < 1 or limit > 1000 or offset < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit debe estar entre 1 y 1000 y offset no puede ser negativo"
+        )
+    
+    query = db.query(StudentData).filter(StudentData.riesgo_desercion >= min_score)
+    if program:
+        query = query.filter(StudentData.programa == program)
+    
+    students = query.order_by(
+        StudentData.riesgo_desercion.desc(), StudentData.id
+    ).offset(offset).limit(limit).all()
+    
+    return {
+        "umbral": min_score,
+        "total": query.count(),
+        "pendientes": db.query(StudentData).filter(StudentData.riesgo_desercion.is_(None)).count(),
+        "estudiantes": [
+            {
+                "id": student.id,
+                "programa": student.programa,
+                "situacion": student.situacion,
+                "pga_acumulado": student.pga_acumulado,
+                "riesgo_desercion": round(student.riesgo_desercion, 4)
+            }
+            for student in students
+        ]
+    }
+
+@router.post("/analytics/dropout-risk/rescore")
+def rescore_dropout_risk(
+    rescore_all: bool = False,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Calcula el riesgo de los estudiantes pendientes, o de todos con
+    rescore_all (por ejemplo, después de cambiar el modelo de riesgo).
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para realizar esta acción"
+        )
+    
+    return {"puntuados": score_students(db, rescore_all=rescore_all)}
 
 # Función para notificar actualizaciones en tiempo real
 async def notify_admin_update(message: str):
@@ -442,6 +895,3 @@ async def notify_admin_update(message: str):
         "message": message,
         "timestamp": datetime.now().isoformat()
     }))
-
-# Importar asyncio para el WebSocket
-import asyncio
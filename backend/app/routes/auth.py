@@ -11,6 +11,8 @@ from app.schemas import (
 from app.auth.password import verify_password, get_password_hash
 from app.auth.jwt import create_access_token, get_current_active_user
 from app.config import settings
+from app.utils.dropout_risk import score_students
+from app.utils.stats_cache import data_version
 
 router = APIRouter()
 
@@ -104,6 +106,7 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     
     db.add(db_user)
     db.commit()
+    data_version.bump()
     db.refresh(db_user)
     return db_user
 
@@ -149,13 +152,23 @@ def validate_student_data(
     if validation_data.ptj_ingles is not None:
         student_data.ptj_ingles = validation_data.ptj_ingles
     
+    # Estrato y puntajes ICFES entran al riesgo de deserción: recalcularlo
+    student_data.riesgo_desercion = None
+    # La fila ya no coincide con la última carga: sin huella, la próxima carga
+    # del Excel la vuelve a escribir aunque la hoja no haya cambiado
+    student_data.row_fingerprint = None
+    
     # Marcar como validado
     student_data.is_validated = True
     student_data.validation_date = datetime.now()
     current_user.data_validated = True
     current_user.validation_completed_at = datetime.now()
     
+    student_id = student_data.id
     db.commit()
+    data_version.bump()
+    # Solo este estudiante: no recorrer los demás pendientes dentro de la petición
+    score_students(db, ids=[student_id])
     
     return {"message": "Datos validados correctamente"}
 
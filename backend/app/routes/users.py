@@ -8,6 +8,7 @@ from app.schemas import UserCreate,UserList, UserResponse, UserLogin, Token, Use
 from app.auth.password import verify_password, get_password_hash
 from app.auth.jwt import create_access_token, get_current_active_user
 from app.config import settings
+from app.utils.stats_cache import data_version
 import os
 import shutil
 from uuid import uuid4
@@ -69,6 +70,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     
     db.add(db_user)
     db.commit()
+    data_version.bump()
     db.refresh(db_user)
     return db_user
 
@@ -413,6 +415,7 @@ async def update_user(
         db_user.hashed_password = get_password_hash(user_update.password)
     
     db.commit()
+    data_version.bump()
     db.refresh(db_user)
     return db_user
 
@@ -452,6 +455,7 @@ async def delete_user(
     db_user.is_active = False
     
     db.commit()
+    data_version.bump()
     return {"message": "Usuario eliminado correctamente"}
 
 @router.delete("/delete-avatar/{filename}", status_code=status.HTTP_200_OK)
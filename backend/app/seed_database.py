@@ -61,13 +61,15 @@ def get_password_hash(password):
     return hashed.decode('utf-8')
 
 def find_excel_file():
-    """Busca el archivo Excel en la carpeta data."""
+    """Busca el archivo Excel (o su exportación CSV/Parquet) en la carpeta data."""
     data_dir = "data"
     
-    # Buscar archivos Excel en la carpeta data
+    # Buscar archivos Excel, CSV o Parquet en la carpeta data
     excel_patterns = [
         os.path.join(data_dir, "*.xlsx"),
         os.path.join(data_dir, "*.xls"),
+        os.path.join(data_dir, "*.csv"),
+        os.path.join(data_dir, "*.parquet"),
         os.path.join(data_dir, "datos_estudiantes.*"),
         os.path.join(data_dir, "estudiantes.*")
     ]
@@ -146,8 +148,59 @@ def safe_convert_value(value, target_type="string"):
     
     return None
 
-def load_excel_data_to_db(conn, cursor):
-    """Carga datos del Excel a la base de datos."""
+# Filas por bloque al leer el archivo de datos en el seed
+SEED_CHUNK_SIZE = 10000
+
+# Tabla temporal de la carga inicial (se elimina al hacer commit)
+SEED_STAGING_TABLE = "seed_student_staging"
+
+def seed_session(conn):
+    """
+    Sesión de SQLAlchemy sobre la conexión psycopg2 del seed: la carga escribe
+    en la misma conexión que el resto del seed y no repite cada sentencia en
+    consola (a diferencia del engine de app.database en desarrollo).
+    
+    Al cerrar la sesión la conexión no se cierra; eso le corresponde a main().
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+    
+    engine = create_engine("postgresql+psycopg2://", creator=lambda: conn, poolclass=StaticPool)
+    return Session(bind=engine, autoflush=False)
+
+def copy_seed_rows(db, batch):
+    """
+    Copia un bloque convertido a la tabla temporal con COPY FROM STDIN; el
+    índice del bloque (el número de fila) va en seed_row. No hace commit.
+    
+    Se escribe con write_batch_isolated (ver excel_loader), que aísla en
+    rejected_rows las filas con valores inválidos.
+    """
+    import io
+    
+    buffer = io.StringIO()
+    batch.to_csv(buffer, header=False, date_format='%Y-%m-%d')
+    buffer.seek(0)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {SEED_STAGING_TABLE} (seed_row, {', '.join(batch.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return {"staged": len(batch)}
+
+def load_excel_data_to_db(conn):
+    """
+    Carga datos del Excel a la base de datos a través de la conexión del seed.
+    
+    Reutiliza app.utils.excel_loader, cuya importación lee la configuración de
+    la aplicación: DATABASE_URL debe estar definida, igual que para las
+    migraciones de Alembic que se ejecutan antes del seed.
+    """
     print("🔍 Buscando archivo Excel...")
     
     excel_file = find_excel_file()
@@ -159,21 +212,29 @@ def load_excel_data_to_db(conn, cursor):
         # Importar pandas
         import pandas as pd
         import numpy as np
+        from itertools import chain
+        from sqlalchemy import text
+        from app.utils.excel_loader import COLUMN_SCHEMA, clean_dataframe, write_batch_isolated
+        from app.utils.excel_reader import COLUMN_MAPPING, iter_file_chunks
         
         print(f"📖 Leyendo archivo Excel: {excel_file}")
         
-        # Intentar leer con diferentes hojas
+        # Intentar leer con diferentes hojas (en bloques, sin cargar la hoja completa)
         sheet_names_to_try = ["202430", "Hoja1", "Sheet1", 0]  # 0 = primera hoja
         
         df = None
+        chunks = None
         used_sheet = None
         
         for sheet_name in sheet_names_to_try:
             try:
                 print(f"   Intentando leer hoja: {sheet_name}")
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
+                chunks = iter_file_chunks(excel_file, sheet_name=sheet_name, chunk_size=SEED_CHUNK_SIZE)
+                df = next(chunks, None)
+                if df is None:
+                    raise ValueError("la hoja está vacía")
                 used_sheet = sheet_name
-                print(f"   ✅ Hoja '{sheet_name}' leída exitosamente ({len(df)} filas)")
+                print(f"   ✅ Hoja '{sheet_name}' abierta exitosamente")
                 break
             except Exception as e:
                 print(f"   ❌ Error leyendo hoja '{sheet_name}': {str(e)}")
@@ -183,9 +244,9 @@ def load_excel_data_to_db(conn, cursor):
             print("❌ No se pudo leer ninguna hoja del archivo Excel")
             return False
         
-        # Mostrar información de debug
+        # Mostrar información de debug (a partir del primer bloque)
         print(f"\n🔍 INFORMACIÓN DEL EXCEL:")
-        print(f"   📊 Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
+        print(f"   📊 Columnas: {df.shape[1]}")
         print(f"   📝 Primeras 5 columnas: {list(df.columns[:5])}")
         
         # Buscar columna de ID (ahora que sabemos que es string)
@@ -221,212 +282,107 @@ def load_excel_data_to_db(conn, cursor):
                 print(f"   {i+1:2d}. '{col}' = {sample_val}")
             return False
         
-        # Mapear columnas del Excel a campos del modelo
-        column_mapping = {
-            id_column: 'id',  # Usar la columna de ID que encontramos
-            'Codigo_antiguo': 'codigo_antiguo',
-            'Periodo_catalogo': 'periodo_catalogo',
-            'Programa': 'programa',
-            'Snies': 'snies',
-            'Pensum': 'pensum',
-            'Expedida_en': 'expedida_en',
-            'Fecha_exp_doc': 'fecha_exp_doc',
-            'Sexo': 'sexo',
-            'Estado_civil': 'estado_civil',
-            'Fecha_nacimento': 'fecha_nacimiento',  # Nota: typo en el original
-            'Ciudad1': 'ciudad1',
-            'Direccion1': 'direccion1',
-            'Telefono1': 'telefono1',
-            'Ciudad2': 'ciudad2',
-            'Direccion': 'direccion',
-            'Nivel': 'nivel',
-            'Cod_col': 'cod_col',
-            'Colegio': 'colegio',
-            'Dir_colegio': 'dir_colegio',
-            'Ciudad_colegio': 'ciudad_colegio',
-            'Depto_colegio': 'depto_colegio',
-            'Municipio_colegio': 'municipio_colegio',
-            'Pais_colegio': 'pais_colegio',
-            'Fecha_graduacion': 'fecha_graduacion',
-            'Ptj_fisica': 'ptj_fisica',
-            'Ptj_quimica': 'ptj_quimica',
-            'Ptj_geografia': 'ptj_geografia',
-            'Ptj_ciencias_sociales': 'ptj_ciencias_sociales',
-            'Ptj_sociales_ciudadano': 'ptj_sociales_ciudadano',
-            'Ptj_ciencias_naturales': 'ptj_ciencias_naturales',
-            'Ptj_biologia': 'ptj_biologia',
-            'Ptj_filosofia': 'ptj_filosofia',
-            'Ptj_lenguaje': 'ptj_lenguaje',
-            'Ptj_lectura_critica': 'ptj_lectura_critica',
-            'Ptj_ingles': 'ptj_ingles',
-            'Ptj_historia': 'ptj_historia',
-            'Ptj_matematicas': 'ptj_matematicas',
-            'Icfes_antes_del_2000': 'icfes_antes_del_2000',
-            'Ecaes': 'ecaes',
-            'Cod_estado': 'cod_estado',
-            'Estado': 'estado',
-            'Cod_tipo': 'cod_tipo',
-            'Tipo_estudiante': 'tipo_estudiante',
-            'Pga_acomulado': 'pga_acumulado',  # Nota: typo en el original
-            'Pga_acomulado_periodo_busqueda': 'pga_acumulado_periodo_busqueda',
-            'Creditos_matriculados': 'creditos_matriculados',
-            'Creditos_intentadas': 'creditos_intentadas',
-            'Creditos_ganadas': 'creditos_ganadas',
-            'Creditos_pasadas': 'creditos_pasadas',
-            'Creditos_pga': 'creditos_pga',
-            'Puntos_calidad_pga': 'puntos_calidad_pga',
-            'Promedio_periodo': 'promedio_periodo',
-            'Creditos_intentadas_periodo': 'creditos_intentadas_periodo',
-            'Creditos_ganadas_periodo': 'creditos_ganadas_periodo',
-            'Creditos_pasadas_periodo': 'creditos_pasadas_periodo',
-            'Creditos_pga_periodo': 'creditos_pga_periodo',
-            'Puntos_calidad_pga_periodo': 'puntos_calidad_pga_periodo',
-            'Nro_materias_cursadas': 'nro_materias_cursadas',
-            'Nro_materias_reprobadas': 'nro_materias_reprobadas',
-            'Nro_materias_aprobadas': 'nro_materias_aprobadas',
-            'Nro_materias_matriculadas': 'nro_materias_matriculadas',
-            'Nro_materias_finalizadas': 'nro_materias_finalizadas',
-            'Situacion': 'situacion',
-            'Estrato': 'estrato',
-            'Becas': 'becas',
-            'Ceres': 'ceres',
-            'Periodo_ingreso': 'periodo_ingreso',
-            'Peri_in_prog_vigente': 'peri_in_prog_vigente'
-        }
+        # Mapear columnas del Excel a campos del modelo (solo la columna de ID encontrada se mapea a 'id')
+        column_mapping = {k: v for k, v in COLUMN_MAPPING.items() if v != 'id' and k != id_column}
+        column_mapping[id_column] = 'id'
         
         print("🔄 Procesando datos...")
         
         # Renombrar columnas (solo las que existen)
         existing_mapping = {k: v for k, v in column_mapping.items() if k in df.columns}
-        df = df.rename(columns=existing_mapping)
         
         print(f"📋 Columnas mapeadas: {len(existing_mapping)}")
         
-        # Definir tipos de columnas para conversión segura
-        column_types = {
-            'id': 'string',  # CAMBIO: Ahora es string
-            'estrato': 'int',
-            'creditos_matriculados': 'int',
-            'creditos_intentadas': 'int',
-            'creditos_ganadas': 'int',
-            'creditos_pasadas': 'int',
-            'creditos_pga': 'int',
-            'creditos_intentadas_periodo': 'int',
-            'creditos_ganadas_periodo': 'int',
-            'creditos_pasadas_periodo': 'int',
-            'creditos_pga_periodo': 'int',
-            'nro_materias_cursadas': 'int',
-            'nro_materias_reprobadas': 'int',
-            'nro_materias_aprobadas': 'int',
-            'nro_materias_matriculadas': 'int',
-            'nro_materias_finalizadas': 'int',
-            'ptj_fisica': 'float',
-            'ptj_quimica': 'float',
-            'ptj_geografia': 'float',
-            'ptj_ciencias_sociales': 'float',
-            'ptj_sociales_ciudadano': 'float',
-            'ptj_ciencias_naturales': 'float',
-            'ptj_biologia': 'float',
-            'ptj_filosofia': 'float',
-            'ptj_lenguaje': 'float',
-            'ptj_lectura_critica': 'float',
-            'ptj_ingles': 'float',
-            'ptj_historia': 'float',
-            'ptj_matematicas': 'float',
-            'ecaes': 'float',
-            'pga_acumulado': 'float',
-            'pga_acumulado_periodo_busqueda': 'float',
-            'puntos_calidad_pga': 'float',
-            'promedio_periodo': 'float',
-            'puntos_calidad_pga_periodo': 'float',
-            'fecha_exp_doc': 'date',
-            'fecha_nacimiento': 'date',
-            'fecha_graduacion': 'date',
-            'icfes_antes_del_2000': 'bool'
-        }
-        
         # Estadísticas de carga
-        total_rows = len(df)
+        total_rows = 0
         successful_inserts = 0
         errors = 0
+        rejected_rows = []
         
-        print(f"📊 Insertando {total_rows} registros en la base de datos...")
+        print(f"📊 Insertando registros en la base de datos...")
         
         # Mostrar algunos ejemplos de IDs para verificar
         print(f"🔍 Ejemplos de IDs encontrados:")
         for i in range(min(5, len(df))):
-            raw_id = df.iloc[i]['id']
+            raw_id = df.iloc[i][id_column]
             converted_id = safe_convert_value(raw_id, 'string')
             print(f"   Fila {i+1}: '{raw_id}' -> '{converted_id}'")
         
-        # Insertar datos fila por fila con conversión segura
-        for index, row in df.iterrows():
-            try:
-                # Verificar que tenemos un ID válido (string)
-                student_id = safe_convert_value(row.get('id'), 'string')
-                if student_id is None or len(student_id.strip()) == 0:
-                    if index < 10:  # Solo mostrar los primeros 10 errores
-                        print(f"   ⚠️  Fila {index + 1}: ID inválido '{row.get('id')}' (tipo: {type(row.get('id'))})")
-                    errors += 1
-                    continue
-                
-                # Verificar si ya existe el registro
-                cursor.execute("SELECT id FROM student_data WHERE id = %s", (student_id,))
-                existing = cursor.fetchone()
+        # Los datos se convierten y se escriben con las mismas reglas que la carga
+        # administrativa (ver app/utils/excel_loader.py), sobre la conexión del seed
+        db = seed_session(conn)
+        try:
+            # Tabla temporal donde se copian todos los bloques antes de una única fusión
+            db.execute(text(f"""
+                CREATE TEMP TABLE {SEED_STAGING_TABLE} (LIKE student_data INCLUDING DEFAULTS)
+                ON COMMIT DROP
+            """))
+            db.execute(text(f"ALTER TABLE {SEED_STAGING_TABLE} ADD COLUMN seed_row BIGINT"))
+            
+            # Convertir y copiar bloque a bloque; las columnas del Excel que no son del modelo se ignoran
+            staged_columns = set()
+            for chunk in chain([df], chunks):
+                # El índice del bloque es la fila en el archivo (la fila 1 es el encabezado)
+                chunk = chunk.rename(columns=existing_mapping)
+                total_rows += len(chunk)
                 
-                # Preparar datos con conversión segura
-                safe_data = {}
-                for col, value in row.items():
-                    if col in column_types:
-                        safe_data[col] = safe_convert_value(value, column_types[col])
-                    else:
-                        safe_data[col] = safe_convert_value(value, 'string')
+                batch = clean_dataframe(chunk[[col for col in chunk.columns if col in COLUMN_SCHEMA]])
                 
-                if existing:
-                    # Actualizar registro existente
-                    update_fields = []
-                    update_values = []
-                    for key, value in safe_data.items():
-                        if key != 'id' and value is not None:
-                            update_fields.append(f"{key} = %s")
-                            update_values.append(value)
-                    
-                    if update_fields:
-                        update_values.append(student_id)
-                        update_query = f"UPDATE student_data SET {', '.join(update_fields)} WHERE id = %s"
-                        cursor.execute(update_query, update_values)
-                else:
-                    # Crear nuevo registro
-                    columns = list(safe_data.keys()) + ['is_validated']
-                    values = list(safe_data.values()) + [False]
-                    placeholders = ', '.join(['%s'] * len(columns))
-                    
-                    insert_query = f"""
-                        INSERT INTO student_data ({', '.join(columns)}) 
-                        VALUES ({placeholders})
-                    """
-                    cursor.execute(insert_query, values)
-                
-                successful_inserts += 1
+                # Verificar que tenemos un ID válido (string)
+                missing_id = batch['id'].isna()
+                for row in batch.index[missing_id]:
+                    if errors < 10:  # Solo mostrar los primeros 10 errores
+                        print(f"   ⚠️  Fila {row}: ID inválido '{chunk.at[row, 'id']}'")
+                    errors += 1
+                    rejected_rows.append({"row": int(row), "id": None, "reason": "Fila sin ID"})
+                batch = batch[~missing_id]
                 
-                # Mostrar progreso cada 500 registros
-                if (index + 1) % 500 == 0:
-                    conn.commit()
-                    print(f"   ✅ Procesados {index + 1}/{total_rows} registros...")
+                if not batch.empty:
+                    batch_rejects = []
+                    write_batch_isolated(db, batch, copy_seed_rows, batch_rejects)
+                    for reject in batch_rejects:
+                        if errors < 10:
+                            print(f"   ❌ Error insertando fila {reject['row']} (ID: {reject['id']}): {reject['reason']}")
+                        errors += 1
+                    rejected_rows.extend(batch_rejects)
+                    successful_inserts += len(batch) - len(batch_rejects)
+                    staged_columns.update(batch.columns)
                 
+                print(f"   ✅ Procesados {total_rows} registros...")
+            
+            # Una sola fusión: si un ID se repite gana la última fila, y los nulos no sobrescriben
+            if staged_columns:
+                columns = ['id'] + sorted(staged_columns - {'id'})
+                column_list = ", ".join(columns)
+                updates = [
+                    f"{col} = COALESCE(EXCLUDED.{col}, student_data.{col})"
+                    for col in columns if col != 'id'
+                ]
+                # Los datos cambian fuera de la carga administrativa: invalidar la huella
+                updates.append("row_fingerprint = NULL")
+                # El riesgo se recalcula con la siguiente carga o con /analytics/dropout-risk/rescore
+                updates.append("riesgo_desercion = NULL")
+                try:
+                    db.execute(text(f"""
+                        INSERT INTO student_data ({column_list}, is_validated)
+                        SELECT DISTINCT ON (id) {column_list}, FALSE
+                        FROM {SEED_STAGING_TABLE}
+                        ORDER BY id, seed_row DESC
+                        ON CONFLICT (id) DO UPDATE SET {", ".join(updates)}
+                    """))
+                except Exception as e:
+                    print(f"❌ Error fusionando los datos en student_data: {str(e)}")
+                    db.rollback()
+                    return False
+            
+            # Commit final
+            try:
+                db.commit()
             except Exception as e:
-                if errors < 10:  # Solo mostrar los primeros 10 errores
-                    print(f"   ❌ Error insertando fila {index + 1} (ID: {row.get('id', 'unknown')}): {str(e)}")
-                errors += 1
-                conn.rollback()
-                continue
-        
-        # Commit final
-        try:
-            conn.commit()
-        except Exception as e:
-            print(f"❌ Error en commit final: {str(e)}")
-            conn.rollback()
+                print(f"❌ Error en commit final: {str(e)}")
+                db.rollback()
+        finally:
+            db.close()
         
         success_rate = (successful_inserts / total_rows) * 100 if total_rows > 0 else 0
         
@@ -439,6 +395,11 @@ def load_excel_data_to_db(conn, cursor):
         print(f"   • Errores: {errors}")
         print(f"   • Tasa de éxito: {success_rate:.1f}%")
         
+        if rejected_rows:
+            print(f"\n🚫 Filas rechazadas (primeras 10 de {len(rejected_rows)}):")
+            for reject in rejected_rows[:10]:
+                print(f"   • Fila {reject['row']} (ID: {reject['id']}): {reject['reason']}")
+        
         return successful_inserts > 0
         
     except ImportError:
@@ -639,7 +600,7 @@ def main():
         print("\n🚀 Iniciando población de la base de datos...")
         
         # Intentar cargar datos del Excel primero
-        excel_loaded = load_excel_data_to_db(conn, cursor)
+        excel_loaded = load_excel_data_to_db(conn)
         
         # Si no se pudo cargar Excel, usar datos de ejemplo
         if not excel_loaded:
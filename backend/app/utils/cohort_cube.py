@@ -0,0 +1,159 @@
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.student_data import StudentData
+from app.utils.dropout_risk import at_risk_condition
+from app.utils.stats_cache import analytics_cache
+
+# Dimensiones por las que se puede agrupar o filtrar el cubo
+DIMENSIONS = ("programa", "situacion", "estrato", "sexo", "ceres", "tipo_estudiante")
+
+# Medidas de cada celda; los promedios se guardan como suma y conteo para poder combinarlos
+MEASURES = ("cantidad", "promedio_pga", "promedio_icfes", "en_riesgo")
+
+
+def resolve_dimensions(dimensions: Sequence[str]) -> List[str]:
+    """Valida nombres de dimensiones; conserva el orden y descarta repetidos."""
+    resolved = []
+    for dimension in dimensions:
+        name = dimension.strip().lower()
+        if name not in DIMENSIONS:
+            raise ValueError(f"Dimensión no válida: {dimension}. Opciones: {', '.join(DIMENSIONS)}")
+        if name not in resolved:
+            resolved.append(name)
+    return resolved
+
+
+def resolve_measures(measures: Sequence[str]) -> List[str]:
+    """Valida nombres de medidas; sin medidas se usan todas."""
+    resolved = []
+    for measure in measures:
+        name = measure.strip().lower()
+        if name not in MEASURES:
+            raise ValueError(f"Medida no válida: {measure}. Opciones: {', '.join(MEASURES)}")
+        if name not in resolved:
+            resolved.append(name)
+    return resolved or list(MEASURES)
+
+
+def compute_cohort_cube(db: Session, dimensions: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Calcula con GROUP BY CUBE(dimensions), en una sola lectura de
+    student_data, los agregados de todas las combinaciones de dimensiones.
+
+    Cada celda trae "nivel" (el conjunto de dimensiones agrupadas; las
+    demás están sumarizadas), el valor de cada dimensión agrupada (que
+    puede ser None si el dato falta) y las sumas y conteos de las medidas.
+    El promedio ICFES es el de matemáticas, igual que en el dashboard, y
+    en_riesgo cuenta los estudiantes en riesgo de deserción según
+    at_risk_condition.
+    """
+    columns = [getattr(StudentData, dimension) for dimension in dimensions]
+    grouping = [func.grouping(*columns).label("grouping")] if columns else []
+    query = db.query(
+        *grouping,
+        *columns,
+        func.count(StudentData.id).label("cantidad"),
+        func.sum(StudentData.pga_acumulado).label("suma_pga"),
+        func.count(StudentData.pga_acumulado).label("cantidad_pga"),
+        func.sum(StudentData.ptj_matematicas).label("suma_icfes"),
+        func.count(StudentData.ptj_matematicas).label("cantidad_icfes"),
+        func.count(StudentData.id).filter(at_risk_condition()).label("en_riesgo"),
+    )
+    if columns:
+        query = query.group_by(func.cube(*columns))
+
+    cells = []
+    for row in query.all():
+        # GROUPING(...) tiene un bit en 1 por cada dimensión sumarizada; el primero es el más significativo
+        mask = row.grouping if columns else 0
+        level = frozenset(
+            dimension for index, dimension in enumerate(dimensions)
+            if not mask & (1 << (len(dimensions) - 1 - index))
+        )
+        cells.append({
+            "nivel": level,
+            "valores": {dimension: getattr(row, dimension) for dimension in dimensions if dimension in level},
+            "cantidad": row.cantidad,
+            "suma_pga": row.suma_pga,
+            "cantidad_pga": row.cantidad_pga,
+            "suma_icfes": row.suma_icfes,
+            "cantidad_icfes": row.cantidad_icfes,
+            "en_riesgo": row.en_riesgo,
+        })
+    return cells
+
+
+def _cube_key(dimensions) -> str:
+    return f"cohort_cube:{','.join(sorted(dimensions))}"
+
+
+def get_cohort_cube(db: Session, dimensions: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Cubo que contiene las dimensiones pedidas, desde la caché por versión de datos.
+
+    Un cubo ya calculado sobre más dimensiones también sirve: CUBE incluye
+    todas las combinaciones de sus dimensiones. Así, profundizar o resumir
+    dentro de un cubo en caché no vuelve a consultar la base de datos. Si
+    no hay ninguno, se calcula el cubo de exactamente esas dimensiones.
+    """
+    wanted = set(dimensions)
+    others = [dimension for dimension in DIMENSIONS if dimension not in wanted]
+    # Primero los cubos más pequeños: tienen menos celdas que recorrer
+    for size in range(len(others) + 1):
+        for extra in combinations(others, size):
+            cube = analytics_cache.peek(_cube_key(wanted.union(extra)))
+            if cube is not None:
+                return cube
+    return analytics_cache.get_or_compute(_cube_key(wanted), lambda: compute_cohort_cube(db, sorted(wanted)))
+
+
+# Agregado de un grupo sin estudiantes (por ejemplo, un filtro sin coincidencias)
+EMPTY_CELL = {"cantidad": 0, "suma_pga": None, "cantidad_pga": 0, "suma_icfes": None, "cantidad_icfes": 0, "en_riesgo": 0}
+
+
+def _measures(cell: Dict[str, Any], measures: Sequence[str]) -> Dict[str, Any]:
+    values = {
+        "cantidad": cell["cantidad"],
+        "promedio_pga": round(cell["suma_pga"] / cell["cantidad_pga"], 2) if cell["cantidad_pga"] else None,
+        "promedio_icfes": round(cell["suma_icfes"] / cell["cantidad_icfes"], 2) if cell["cantidad_icfes"] else None,
+        "en_riesgo": cell["en_riesgo"],
+    }
+    return {measure: values[measure] for measure in measures}
+
+
+def query_cohort_cube(
+    db: Session,
+    dimensions: Sequence[str],
+    measures: Sequence[str],
+    filters: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Agregados por las dimensiones pedidas, para los estudiantes que cumplen
+    los filtros (dimensión -> valor, comparado como texto).
+
+    Returns:
+        dict: celdas (una por combinación de valores de dimensions, de
+            mayor a menor cantidad) y total (el agregado de todo el grupo
+            filtrado)
+    """
+    filters = filters or {}
+    level = frozenset(dimensions) | frozenset(filters)
+    cube = get_cohort_cube(db, sorted(level))
+
+    def matches(cell):
+        return all(str(cell["valores"][dimension]) == value for dimension, value in filters.items())
+
+    cells = [cell for cell in cube if cell["nivel"] == level and matches(cell)]
+    total = next((cell for cell in cube if cell["nivel"] == frozenset(filters) and matches(cell)), None)
+    cells.sort(key=lambda cell: (-cell["cantidad"], [str(cell["valores"][dimension]) for dimension in dimensions]))
+    return {
+        "celdas": [
+            {**{dimension: cell["valores"][dimension] for dimension in dimensions}, **_measures(cell, measures)}
+            for cell in cells
+        ],
+        "total": _measures(total or EMPTY_CELL, measures),
+    }
@@ -0,0 +1,278 @@
+import asyncio
+import itertools
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import WebSocket
+
+from app.utils.ingestion_metrics import render_metric
+
+logger = logging.getLogger(__name__)
+
+# Código de cierre para clientes desconectados por lentos ("Try Again Later")
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+class ClientChannel:
+    """Cola de salida de un WebSocket: mensajes pendientes por clave, en orden de llegada."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pending: "OrderedDict[str, str]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+
+
+class ConnectionManager:
+    """
+    Conexiones WebSocket con una cola de salida acotada y un escritor por cliente.
+
+    broadcast solo encola (O(1) por cliente) y cada escritor envía a su
+    ritmo, así un cliente lento no retrasa a los demás. Política para
+    clientes lentos:
+
+    - Los mensajes con la misma clave se fusionan: si el anterior aún no se
+      envió, se reemplaza por el nuevo y conserva su lugar en la cola (las
+      estadísticas y el progreso de una carga solo importan en su último
+      estado). Los mensajes sin clave nunca se fusionan.
+    - Si la cola llega a queue_size mensajes pendientes, o un envío tarda más
+      de send_timeout segundos, el cliente se desconecta con el código 1013 y
+      sus mensajes pendientes se cuentan como descartados; el cliente puede
+      reconectarse y recibir el estado actual.
+    """
+
+    def __init__(self, queue_size: int = 32, send_timeout: float = 10.0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[WebSocket, ClientChannel] = {}
+        self._message_ids = itertools.count()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        channel = ClientChannel(websocket)
+        channel.writer = asyncio.create_task(self._write(channel))
+        self.active_connections[websocket] = channel
+
+    def disconnect(self, websocket: WebSocket):
+        channel = self.active_connections.pop(websocket, None)
+        if channel is not None:
+            channel.writer.cancel()
+
+    async def send_personal_message(self, message: str, websocket: WebSocket, key: Optional[str] = None):
+        channel = self.active_connections.get(websocket)
+        if channel is not None:
+            self._enqueue(channel, message, key)
+
+    async def broadcast(self, message: str, key: Optional[str] = None):
+        """Encola el mensaje para todos los clientes; key permite fusionarlo con uno pendiente."""
+        if key is None:
+            key = f"message:{next(self._message_ids)}"
+        for channel in list(self.active_connections.values()):
+            self._enqueue(channel, message, key)
+
+    def _enqueue(self, channel: ClientChannel, message: str, key: Optional[str]):
+        if key is None:
+            key = f"message:{next(self._message_ids)}"
+        if key in channel.pending:
+            channel.pending[key] = message
+            self.coalesced += 1
+        elif len(channel.pending) >= self.queue_size:
+            self._drop(channel, "cola de salida llena")
+        else:
+            channel.pending[key] = message
+            channel.ready.set()
+
+    async def _write(self, channel: ClientChannel):
+        while True:
+            await channel.ready.wait()
+            _, message = channel.pending.popitem(last=False)
+            if not channel.pending:
+                channel.ready.clear()
+            try:
+                await asyncio.wait_for(channel.websocket.send_text(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self._drop(channel, "envío demasiado lento")
+                return
+            except Exception:
+                # El cliente ya cerró la conexión; este escritor termina aquí
+                self.active_connections.pop(channel.websocket, None)
+                return
+            self.sent += 1
+
+    def _drop(self, channel: ClientChannel, reason: str):
+        """Desconecta un cliente lento y descarta sus mensajes pendientes."""
+        if self.active_connections.pop(channel.websocket, None) is None:
+            return
+        self.dropped += len(channel.pending)
+        self.slow_disconnects += 1
+        channel.pending.clear()
+        logger.warning(f"WebSocket desconectado: {reason}")
+        if channel.writer is not asyncio.current_task():
+            channel.writer.cancel()
+        asyncio.create_task(self._close(channel.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CLIENT_CLOSE_CODE), self.send_timeout)
+        except Exception:
+            pass
+
+    def render_metrics(self) -> str:
+        """Métricas de las conexiones en formato de texto de Prometheus."""
+        depths = [len(channel.pending) for channel in self.active_connections.values()]
+        lines = []
+        lines += render_metric("websocket_connections", "gauge", "Conexiones WebSocket activas",
+                               [({}, len(depths))])
+        lines += render_metric("websocket_queue_depth", "gauge", "Mensajes pendientes en las colas de salida",
+                               [({"aggregate": "total"}, sum(depths)), ({"aggregate": "max"}, max(depths, default=0))])
+        lines += render_metric("websocket_messages_total", "counter", "Mensajes por resultado",
+                               [({"result": "sent"}, self.sent), ({"result": "coalesced"}, self.coalesced),
+                                ({"result": "dropped"}, self.dropped)])
+        lines += render_metric("websocket_slow_disconnects_total", "counter",
+                               "Clientes desconectados por cola llena o envío lento",
+                               [({}, self.slow_disconnects)])
+        return "\n".join(lines) + "\n"
+
+
+def _escape_pointer(key) -> str:
+    """Escapa una clave para una ruta JSON Pointer (RFC 6901)."""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def json_patch(old: dict, new: dict, path: str = "") -> List[dict]:
+    """
+    Diferencia entre dos dicts como operaciones JSON Patch (RFC 6902).
+
+    Los dicts anidados se comparan recursivamente; cualquier otro valor que
+    cambie se reemplaza completo.
+    """
+    ops = [
+        {"op": "remove", "path": f"{path}/{_escape_pointer(key)}"}
+        for key in old if key not in new
+    ]
+    for key, value in new.items():
+        child = f"{path}/{_escape_pointer(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": child, "value": value})
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            ops.extend(json_patch(old[key], value, child))
+        elif old[key] != value:
+            ops.append({"op": "replace", "path": child, "value": value})
+    return ops
+
+
+class StatsProducer:
+    """
+    Tarea única que calcula las estadísticas del dashboard cada cierto
+    intervalo y las envía a todos los WebSocket conectados.
+
+    El cálculo (compute, bloqueante) corre en un hilo aparte y abre su
+    propia sesión de base de datos, así el event loop no se bloquea y los
+    sockets no retienen conexiones del pool. La tarea arranca con el primer
+    suscriptor y termina cuando no queda ninguno.
+
+    Cada cliente recibe al conectarse una foto completa
+    ({"type": "dashboard_snapshot", "version", "stats"}) y después solo
+    diferencias ({"type": "dashboard_delta", "base_version", "version",
+    "patch"}, con patch en formato JSON Patch). Si las estadísticas no
+    cambian (sin contar last_updated) no se envía nada. Un cliente que
+    detecta un salto de versión pide resync con la última versión que
+    aplicó: recibe las diferencias que le faltan si siguen en el historial,
+    o una foto nueva.
+
+    Las versiones solo tienen sentido dentro de un stream (identificado por
+    stream en cada mensaje): tras reiniciar el servidor, o contra otro
+    proceso, la numeración es otra y el cliente recibe una foto.
+    """
+
+    def __init__(self, manager, compute: Callable[[], dict], interval_seconds: float, history_size: int = 50):
+        self.manager = manager
+        self.compute = compute
+        self.interval_seconds = interval_seconds
+        self.stream = uuid4().hex[:12]
+        self.version = 0
+        self.stats: Optional[dict] = None
+        self.history: Deque[Tuple[int, str]] = deque(maxlen=history_size)
+        self._snapshot: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, websocket: WebSocket, since: Optional[int] = None, stream: Optional[str] = None):
+        """Registra el socket y le envía lo necesario para quedar en la versión actual."""
+        await self.manager.connect(websocket)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        # Sin estadísticas aún, la foto llega con el primer cálculo de la tarea
+        if self.stats is not None:
+            await self.resync(websocket, since, stream)
+
+    def unsubscribe(self, websocket: WebSocket):
+        self.manager.disconnect(websocket)
+
+    async def resync(self, websocket: WebSocket, since: Optional[int] = None, stream: Optional[str] = None):
+        """Envía al socket las diferencias posteriores a since, o una foto si ya no están."""
+        if stream != self.stream:
+            since = None
+        for message in self.messages_since(since):
+            await self.manager.send_personal_message(message, websocket)
+
+    def messages_since(self, since: Optional[int]) -> List[str]:
+        if self.stats is None or since == self.version:
+            return []
+        if since is not None and self.history and self.history[0][0] <= since + 1 <= self.version:
+            return [message for version, message in self.history if version > since]
+        return [self.snapshot_message()]
+
+    def snapshot_message(self) -> str:
+        if self._snapshot is None:
+            self._snapshot = json.dumps(
+                {"type": "dashboard_snapshot", "stream": self.stream, "version": self.version, "stats": self.stats},
+                default=str
+            )
+        return self._snapshot
+
+    def publish(self, stats: dict) -> Optional[str]:
+        """
+        Registra unas estadísticas nuevas y retorna el mensaje a difundir:
+        la foto inicial, una diferencia, o None si nada cambió.
+        """
+        if stats is self.stats:
+            # La caché por versión devolvió el mismo resultado
+            return None
+        if self.stats is None:
+            self.stats, self.version = stats, 1
+            return self.snapshot_message()
+        patch = json_patch(self.stats, stats)
+        if all(op["path"] == "/last_updated" for op in patch):
+            return None
+        self.version += 1
+        self.stats = stats
+        self._snapshot = None
+        message = json.dumps({
+            "type": "dashboard_delta",
+            "stream": self.stream,
+            "base_version": self.version - 1,
+            "version": self.version,
+            "patch": patch,
+        }, default=str)
+        self.history.append((self.version, message))
+        return message
+
+    async def _run(self):
+        while self.manager.active_connections:
+            try:
+                message = self.publish(await asyncio.to_thread(self.compute))
+                if message is not None:
+                    # Sin clave: las diferencias forman una cadena y no pueden fusionarse
+                    await self.manager.broadcast(message)
+            except Exception as e:
+                logger.error(f"Error calculando las estadísticas del dashboard: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
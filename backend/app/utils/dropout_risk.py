@@ -0,0 +1,225 @@
+import logging
+from typing import Dict, Optional, Protocol, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.student_data import StudentData
+from app.utils.stats_cache import data_version
+
+logger = logging.getLogger(__name__)
+
+# Puntajes ICFES que se promedian en la característica "icfes"
+ICFES_COLUMNS = ("ptj_matematicas", "ptj_lectura_critica", "ptj_ingles", "ptj_ciencias_naturales", "ptj_ciencias_sociales")
+
+# Columnas de student_data que se leen para armar la matriz de características
+SOURCE_COLUMNS = (
+    "pga_acumulado",
+    "nro_materias_cursadas", "nro_materias_reprobadas", "nro_materias_aprobadas",
+    "creditos_intentadas", "creditos_ganadas",
+    *ICFES_COLUMNS,
+    "estrato", "becas",
+)
+
+# Características del modelo, en el orden de las columnas de la matriz; todas entre 0 y 1
+FEATURES = (
+    "pga",               # pga_acumulado / 5
+    "tasa_reprobacion",  # materias reprobadas / cursadas
+    "tasa_aprobacion",   # materias aprobadas / cursadas
+    "avance_creditos",   # créditos ganados / intentados
+    "icfes",             # promedio de ICFES_COLUMNS / 100
+    "estrato",           # (estrato - 1) / 5
+    "beca",              # 1 si tiene alguna beca
+)
+
+# Valor fijo para las características faltantes. No se usa el promedio del
+# lote: el puntaje de un estudiante no debe depender de con quién se calcula
+IMPUTED_VALUES = {
+    "pga": 0.6,
+    "tasa_reprobacion": 0.1,
+    "tasa_aprobacion": 0.9,
+    "avance_creditos": 0.9,
+    "icfes": 0.5,
+    "estrato": 0.4,
+    "beca": 0.0,
+}
+
+# Pesos del modelo logístico por defecto: positivos aumentan el riesgo
+DEFAULT_WEIGHTS = {
+    "pga": -6.0,
+    "tasa_reprobacion": 3.0,
+    "tasa_aprobacion": -1.0,
+    "avance_creditos": -2.0,
+    "icfes": -1.5,
+    "estrato": -0.5,
+    "beca": -0.5,
+}
+DEFAULT_BIAS = 7.0
+
+# Valores de becas que significan que el estudiante no tiene beca
+NO_SCHOLARSHIP = {"", "ninguna", "no", "n/a"}
+
+# Criterio anterior al riesgo calculado; se usa mientras un estudiante está pendiente
+FALLBACK_GPA_THRESHOLD = 3.0
+
+# Estudiantes que se leen, puntúan y confirman por lote
+SCORING_BATCH_SIZE = 50000
+
+
+class RiskModel(Protocol):
+    """Un modelo de riesgo puntúa una matriz (estudiantes × FEATURES) con valores entre 0 y 1."""
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        ...
+
+
+class LogisticRiskModel:
+    """
+    Modelo lineal con salida logística: riesgo = 1 / (1 + e^-(sesgo + X·w)).
+
+    Los pesos se dan por nombre de característica; las que no aparecen pesan 0.
+    """
+
+    def __init__(self, weights: Dict[str, float], bias: float = 0.0):
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Características desconocidas: {', '.join(sorted(unknown))}")
+        self.weights = np.array([weights.get(feature, 0.0) for feature in FEATURES])
+        self.bias = bias
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-(self.bias + features @ self.weights)))
+
+
+# Modelo con que se puntúa; set_risk_model lo reemplaza (otros pesos o un modelo entrenado)
+risk_model: RiskModel = LogisticRiskModel(DEFAULT_WEIGHTS, DEFAULT_BIAS)
+
+
+def set_risk_model(model: RiskModel) -> None:
+    """
+    Reemplaza el modelo de riesgo. Los puntajes guardados no cambian hasta
+    llamar a score_students con rescore_all=True.
+    """
+    global risk_model
+    risk_model = model
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    """numerator / denominator entre 0 y 1; NaN si falta alguno o el denominador no es positivo."""
+    numerator = numerator.to_numpy(dtype=float, na_value=np.nan)
+    denominator = denominator.to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(denominator > 0, numerator / denominator, np.nan)
+    return np.clip(ratio, 0.0, 1.0)
+
+
+def build_feature_matrix(students: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz de características (una fila por estudiante, una columna por
+    FEATURES) a partir de las columnas SOURCE_COLUMNS, en una sola pasada
+    vectorizada. Los valores faltantes se reemplazan por IMPUTED_VALUES.
+    """
+    def numeric(column):
+        return students[column].to_numpy(dtype=float, na_value=np.nan)
+
+    icfes = students[list(ICFES_COLUMNS)].to_numpy(dtype=float, na_value=np.nan)
+    has_icfes = ~np.isnan(icfes).all(axis=1)
+    icfes_mean = np.full(len(students), np.nan)
+    icfes_mean[has_icfes] = np.nanmean(icfes[has_icfes], axis=1)
+
+    becas = students["becas"].fillna("").astype(str).str.strip().str.lower()
+
+    matrix = np.column_stack([
+        np.clip(numeric("pga_acumulado") / 5.0, 0.0, 1.0),
+        _ratio(students["nro_materias_reprobadas"], students["nro_materias_cursadas"]),
+        _ratio(students["nro_materias_aprobadas"], students["nro_materias_cursadas"]),
+        _ratio(students["creditos_ganadas"], students["creditos_intentadas"]),
+        np.clip(icfes_mean / 100.0, 0.0, 1.0),
+        np.clip((numeric("estrato") - 1.0) / 5.0, 0.0, 1.0),
+        (~becas.isin(NO_SCHOLARSHIP)).to_numpy(dtype=float),
+    ])
+    missing = np.isnan(matrix)
+    if missing.any():
+        imputed = np.array([IMPUTED_VALUES[feature] for feature in FEATURES])
+        matrix[missing] = np.broadcast_to(imputed, matrix.shape)[missing]
+    return matrix
+
+
+def score_students(db: Session, rescore_all: bool = False, model: Optional[RiskModel] = None,
+                   batch_size: int = SCORING_BATCH_SIZE, ids: Optional[Sequence[str]] = None) -> int:
+    """
+    Calcula el riesgo de deserción y lo guarda en student_data.riesgo_desercion.
+
+    Un riesgo nulo marca al estudiante como pendiente: las cargas de Excel y
+    las validaciones lo anulan al cambiar los datos, así que por defecto solo
+    se puntúan los pendientes (una consulta sobre el índice de la columna).
+    Con rescore_all se puntúan todos, por ejemplo tras cambiar el modelo.
+    Con ids solo se consideran esos estudiantes (por ejemplo, el que acaba de
+    validar sus datos), sin recorrer los demás pendientes.
+
+    Cada lote se lee, se puntúa con una sola operación de matrices y se
+    escribe con un UPDATE; cada lote se confirma por separado. Un estudiante
+    cuya huella cambió entre la lectura y la escritura (otra carga lo
+    modificó) no se actualiza y queda pendiente.
+
+    Returns:
+        int: Estudiantes puntuados
+    """
+    model = model or risk_model
+    table = StudentData.__table__
+    columns = [table.c.id, table.c.row_fingerprint, *(table.c[name] for name in SOURCE_COLUMNS)]
+    scored = 0
+    last_id = None
+    while True:
+        query = select(*columns).order_by(table.c.id).limit(batch_size)
+        if not rescore_all:
+            query = query.where(table.c.riesgo_desercion.is_(None))
+        if ids is not None:
+            query = query.where(table.c.id.in_(list(ids)))
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = db.execute(query).all()
+        if not rows:
+            break
+        students = pd.DataFrame.from_records(rows, columns=[column.name for column in columns])
+        scores = model.score(build_feature_matrix(students))
+        result = db.execute(text("""
+            UPDATE student_data
+            SET riesgo_desercion = s.riesgo
+            FROM unnest(CAST(:ids AS text[]), CAST(:fingerprints AS bigint[]), CAST(:scores AS double precision[]))
+                AS s(id, huella, riesgo)
+            WHERE student_data.id = s.id
+              AND student_data.id BETWEEN :first_id AND :last_id
+              AND student_data.row_fingerprint IS NOT DISTINCT FROM s.huella
+        """), {
+            # El rango de IDs del lote acota la lectura de student_data al índice
+            "first_id": rows[0].id,
+            "last_id": rows[-1].id,
+            "ids": students["id"].tolist(),
+            # Desde las filas y no desde el DataFrame: con nulos pandas pasaría las huellas a float
+            "fingerprints": [row.row_fingerprint for row in rows],
+            "scores": scores.tolist(),
+        })
+        db.commit()
+        scored += result.rowcount
+        last_id = rows[-1].id
+
+    if scored:
+        data_version.bump()
+        logger.info(f"Riesgo de deserción calculado para {scored} estudiantes")
+    return scored
+
+
+def at_risk_condition():
+    """
+    Condición SQL de estudiante en riesgo: riesgo calculado mayor o igual a
+    settings.DROPOUT_RISK_THRESHOLD o, si aún no tiene riesgo (por ejemplo,
+    recién aplicada la migración), PGA acumulado menor a FALLBACK_GPA_THRESHOLD.
+    """
+    return or_(
+        StudentData.riesgo_desercion >= settings.DROPOUT_RISK_THRESHOLD,
+        and_(StudentData.riesgo_desercion.is_(None), StudentData.pga_acumulado < FALLBACK_GPA_THRESHOLD),
+    )
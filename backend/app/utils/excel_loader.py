@@ -1,225 +1,969 @@
+import numpy as np
 import pandas as pd
+import psycopg2
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String, func, literal, text, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.models.student_data import StudentData
+from app.config import settings
+from app.models.student_data import ROLLUP_METRICS, ROLLUP_STATISTICS, StudentData, student_data_snapshots
+from app.models.models import ExcelImport
+from app.utils.dropout_risk import score_students
+from app.utils.excel_reader import (
+    COLUMN_MAPPING, COPY_FORMATS, DEFAULT_CHUNK_SIZE, SOURCE_ROW_COLUMN, iter_file_chunks, list_sheet_names
+)
+from app.utils.ingestion_metrics import StageTimer, ingestion_metrics, log_ingestion, merge_stage_summaries
+from app.utils.stats_cache import data_version
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import hashlib
+import io
 import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import time
 
 logger = logging.getLogger(__name__)
 
-def load_excel_to_database(file_path: str, db: Session, sheet_name: str = "202430") -> dict:
+# Tamaño de bloque para CSV y Parquet, que se escriben con COPY
+COPY_CHUNK_SIZE = 10000
+
+# Tabla temporal (por conexión) donde se copian los bloques antes de fusionarlos
+STAGING_TABLE = "student_data_staging"
+
+# Tabla de fotos por periodo y su tabla temporal de carga
+SNAPSHOT_TABLE = "student_data_snapshots"
+SNAPSHOT_STAGING_TABLE = "student_data_snapshot_staging"
+
+# Agregados de la foto por periodo y programa
+ROLLUP_TABLE = "student_period_rollups"
+
+# Errores atribuibles a filas concretas (valores inválidos, restricciones);
+# ante estos un lote se divide para aislar las filas culpables
+ROW_ERRORS = (DataError, IntegrityError, psycopg2.DataError, psycopg2.IntegrityError)
+
+# Máximo de filas rechazadas que se detallan en las estadísticas
+MAX_REPORTED_REJECTS = 500
+
+# Estados de un registro de excel_imports
+IMPORT_RUNNING = "running"
+IMPORT_COMPLETED = "completed"
+IMPORT_FAILED = "failed"
+
+# Conteos que una carga reanudada suma a los de la carga interrumpida
+RESUMABLE_COUNTERS = ("total_rows", "successful_inserts", "errors", "inserted", "updated", "unchanged", "deleted")
+
+def load_excel_to_database(
+    file_path: str,
+    db: Session,
+    sheet_name: str = "202430",
+    progress_callback: Optional[Callable[[dict], None]] = None,
+    delete_missing: bool = False,
+    checkpoint: Optional["ImportCheckpoint"] = None
+) -> dict:
     """
     Carga datos del archivo Excel a la base de datos.
     
+    La hoja se lee en bloques de filas (ver iter_file_chunks) y cada bloque
+    se limpia y se escribe antes de leer el siguiente, así el consumo de
+    memoria no depende del tamaño del archivo. Solo se escriben los
+    estudiantes nuevos o cuya huella de contenido cambió desde la última carga.
+    
+    También acepta exportaciones CSV y Parquet con las mismas columnas. Todos
+    los formatos se copian con COPY a una tabla temporal y se fusionan en
+    student_data (ver copy_merge_student_batch).
+    
+    Además de student_data (los datos vigentes), cada carga registra la hoja
+    en student_data_snapshots bajo el periodo sheet_name y, al terminar,
+    recalcula los agregados del periodo en student_period_rollups y el riesgo
+    de deserción de los estudiantes nuevos o modificados (ver dropout_risk).
+    
+    Las estadísticas incluyen el tiempo total, las filas por segundo y, por
+    etapa (read, clean, lookup, write, commit), tiempo, filas y memoria; el
+    mismo resumen se registra como una línea JSON y en las métricas de /metrics.
+    Cada lote confirmado incrementa la versión de los datos (ver
+    app/utils/stats_cache.py), lo que invalida las estadísticas en caché.
+    
     Args:
-        file_path: Ruta al archivo Excel
+        file_path: Ruta al archivo Excel, CSV o Parquet
         db: Sesión de base de datos
-        sheet_name: Nombre de la hoja a leer (default: "202430")
+        sheet_name: Nombre de la hoja a leer (default: "202430", solo Excel)
+        progress_callback: Función opcional que recibe las estadísticas
+            parciales después de cada bloque
+        delete_missing: Si es True, elimina los estudiantes que no aparecen
+            en la hoja y no tienen un usuario registrado, y los retira de la
+            foto del periodo
+        checkpoint: Punto de control de la carga (ver ImportCheckpoint); si
+            tiene avance guardado para la hoja, la carga continúa desde ahí
         
     Returns:
         dict: Estadísticas de la carga
     """
+    timer = StageTimer()
     try:
-        # Leer archivo Excel con la hoja específica
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-        print(f"Leyendo hoja '{sheet_name}' del archivo Excel...")
-        print(f"Filas encontradas: {len(df)}")
-        
-        # Mapear columnas del Excel a campos del modelo
-        column_mapping = {
-            'Id': 'id',
-            'Codigo_antiguo': 'codigo_antiguo',
-            'Periodo_catalogo': 'periodo_catalogo',
-            'Programa': 'programa',
-            'Snies': 'snies',
-            'Pensum': 'pensum',
-            'Expedida_en': 'expedida_en',
-            'Fecha_exp_doc': 'fecha_exp_doc',
-            'Sexo': 'sexo',
-            'Estado_civil': 'estado_civil',
-            'Fecha_nacimento': 'fecha_nacimiento',  # Nota: typo en el original
-            'Ciudad1': 'ciudad1',
-            'Direccion1': 'direccion1',
-            'Telefono1': 'telefono1',
-            'Ciudad2': 'ciudad2',
-            'Direccion': 'direccion',
-            'Nivel': 'nivel',
-            'Cod_col': 'cod_col',
-            'Colegio': 'colegio',
-            'Dir_colegio': 'dir_colegio',
-            'Ciudad_colegio': 'ciudad_colegio',
-            'Depto_colegio': 'depto_colegio',
-            'Municipio_colegio': 'municipio_colegio',
-            'Pais_colegio': 'pais_colegio',
-            'Fecha_graduacion': 'fecha_graduacion',
-            'Ptj_fisica': 'ptj_fisica',
-            'Ptj_quimica': 'ptj_quimica',
-            'Ptj_geografia': 'ptj_geografia',
-            'Ptj_ciencias_sociales': 'ptj_ciencias_sociales',
-            'Ptj_sociales_ciudadano': 'ptj_sociales_ciudadano',
-            'Ptj_ciencias_naturales': 'ptj_ciencias_naturales',
-            'Ptj_biologia': 'ptj_biologia',
-            'Ptj_filosofia': 'ptj_filosofia',
-            'Ptj_lenguaje': 'ptj_lenguaje',
-            'Ptj_lectura_critica': 'ptj_lectura_critica',
-            'Ptj_ingles': 'ptj_ingles',
-            'Ptj_historia': 'ptj_historia',
-            'Ptj_matematicas': 'ptj_matematicas',
-            'Icfes_antes_del_2000': 'icfes_antes_del_2000',
-            'Ecaes': 'ecaes',
-            'Cod_estado': 'cod_estado',
-            'Estado': 'estado',
-            'Cod_tipo': 'cod_tipo',
-            'Tipo_estudiante': 'tipo_estudiante',
-            'Pga_acomulado': 'pga_acumulado',  # Nota: typo en el original
-            'Pga_acomulado_periodo_busqueda': 'pga_acumulado_periodo_busqueda',
-            'Creditos_matriculados': 'creditos_matriculados',
-            'Creditos_intentadas': 'creditos_intentadas',
-            'Creditos_ganadas': 'creditos_ganadas',
-            'Creditos_pasadas': 'creditos_pasadas',
-            'Creditos_pga': 'creditos_pga',
-            'Puntos_calidad_pga': 'puntos_calidad_pga',
-            'Promedio_periodo': 'promedio_periodo',
-            'Creditos_intentadas_periodo': 'creditos_intentadas_periodo',
-            'Creditos_ganadas_periodo': 'creditos_ganadas_periodo',
-            'Creditos_pasadas_periodo': 'creditos_pasadas_periodo',
-            'Creditos_pga_periodo': 'creditos_pga_periodo',
-            'Puntos_calidad_pga_periodo': 'puntos_calidad_pga_periodo',
-            'Nro_materias_cursadas': 'nro_materias_cursadas',
-            'Nro_materias_reprobadas': 'nro_materias_reprobadas',
-            'Nro_materias_aprobadas': 'nro_materias_aprobadas',
-            'Nro_materias_matriculadas': 'nro_materias_matriculadas',
-            'Nro_materias_finalizadas': 'nro_materias_finalizadas',
-            'Situacion': 'situacion',
-            'Estrato': 'estrato',
-            'Becas': 'becas',
-            'Ceres': 'ceres',
-            'Periodo_ingreso': 'periodo_ingreso',
-            'Peri_in_prog_vigente': 'peri_in_prog_vigente'
-        }
+        # Todos los formatos se escriben con COPY + fusión (copy_merge_student_batch);
+        # el Excel se lee en bloques más pequeños porque openpyxl lo recorre celda a celda
+        use_copy = os.path.splitext(file_path)[1].lower() in COPY_FORMATS
+        chunk_size = COPY_CHUNK_SIZE if use_copy else DEFAULT_CHUNK_SIZE
+        
+        # La hoja es el periodo: cada lote actualiza student_data y la foto del periodo
+        period = str(sheet_name)
         
-        # Renombrar columnas
-        df = df.rename(columns=column_mapping)
+        # Al reanudar se omiten las filas ya confirmadas por la carga interrumpida
+        start_row = checkpoint.start_row(period) if checkpoint else 0
+        if start_row and delete_missing:
+            raise ValueError("delete_missing requiere cargar la hoja completa y no admite reanudar")
         
-        # Limpiar y convertir datos
-        df = clean_dataframe(df)
+        # Leer archivo con la hoja específica, por bloques
+        chunks = iter_file_chunks(file_path, sheet_name, chunk_size=chunk_size, skip_rows=start_row)
+        logger.info(f"Leyendo hoja '{sheet_name}' del archivo Excel...")
+        if start_row:
+            logger.info(f"Reanudando desde la fila {start_row + 2}")
+        ensure_snapshot_partition(db, period)
+        db.commit()
+        
+        def write_batch(db, batch):
+            counts = copy_merge_student_batch(db, batch, timer)
+            with timer.stage("write"):
+                append_snapshot_batch(db, batch, period)
+            return counts
         
         # Estadísticas de carga
-        total_rows = len(df)
-        successful_inserts = 0
-        errors = 0
-        
-        # Insertar datos en lotes
-        batch_size = 1000
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
+        stats = {
+            "total_rows": 0,
+            "successful_inserts": 0,
+            "errors": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "deleted": 0
+        }
+        seen_ids = set()
+        rejects = []
+        
+        for chunk in timer.iterate("read", chunks):
+            # El índice del bloque es la fila en el archivo original (ver iter_file_chunks)
+            stats["total_rows"] += len(chunk)
+            
+            with timer.stage("clean"):
+                # Renombrar columnas y limpiar solo el bloque actual
+                batch = clean_dataframe(chunk.rename(columns=COLUMN_MAPPING))
+                
+                if 'id' not in batch.columns:
+                    raise ValueError("El archivo no contiene la columna 'Id'")
+                
+                # Descartar filas sin ID: no pueden insertarse ni actualizarse
+                missing_id = batch['id'].isna()
+                if missing_id.any():
+                    logger.error(f"Se omitieron {int(missing_id.sum())} filas sin ID")
+                    rejects.extend(
+                        {"row": int(row), "id": None, "reason": "Fila sin ID"}
+                        for row in batch.index[missing_id]
+                    )
+                    batch = batch[~missing_id]
+            timer.count("clean", len(chunk))
+            
+            if batch.empty:
+                continue
             
-            for _, row in batch.iterrows():
-                try:
-                    # Verificar si ya existe el registro
-                    existing = db.query(StudentData).filter(StudentData.id == row['id']).first()
-                    
-                    if existing:
-                        # Actualizar registro existente
-                        for key, value in row.items():
-                            if pd.notna(value):
-                                setattr(existing, key, value)
-                    else:
-                        # Crear nuevo registro
-                        student_data = StudentData(**row.to_dict())
-                        db.add(student_data)
-                    
-                    successful_inserts += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error insertando fila {row.get('id', 'unknown')}: {str(e)}")
-                    errors += 1
-                    continue
+            seen_ids.update(batch['id'].tolist())
             
-            # Commit en lotes
+            # Una escritura por bloque (consulta de huellas + INSERT, o COPY + fusión) y un commit;
+            # si el lote falla por datos inválidos se divide hasta aislar las filas culpables
+            for stage in ("lookup", "write", "commit"):
+                timer.count(stage, len(batch))
             try:
-                db.commit()
+                batch_rejects = []
+                counts = write_batch_isolated(db, batch, write_batch, batch_rejects)
+                progress = dict(stats, successful_inserts=stats["successful_inserts"] + len(batch) - len(batch_rejects))
+                for key, value in counts.items():
+                    progress[key] += value
+                progress["errors"] = len(rejects) + len(batch_rejects)
+                # El avance se guarda en la misma transacción que el lote
+                if checkpoint:
+                    checkpoint.save_batch(db, period, progress)
+                with timer.stage("commit"):
+                    db.commit()
+                data_version.bump()
+                stats = progress
+                rejects.extend(batch_rejects)
             except Exception as e:
                 logger.error(f"Error en commit del lote: {str(e)}")
                 db.rollback()
-                errors += batch_size
+                rejects.extend(
+                    {"row": int(row), "id": student_id, "reason": _error_reason(e)}
+                    for row, student_id in zip(batch.index, batch['id'])
+                )
+                if checkpoint:
+                    checkpoint.save_batch(db, period, dict(stats, errors=len(rejects)))
+                    db.commit()
+            
+            stats["errors"] = len(rejects)
+            if progress_callback:
+                progress_callback(checkpoint.merge(period, stats) if checkpoint else dict(stats))
         
-        return {
-            "total_rows": total_rows,
-            "successful_inserts": successful_inserts,
-            "errors": errors,
-            "success_rate": (successful_inserts / total_rows) * 100 if total_rows > 0 else 0
-        }
+        if delete_missing and seen_ids:
+            with timer.stage("write"):
+                stats["deleted"] = delete_missing_students(db, seen_ids)
+                delete_missing_snapshot_rows(db, period, seen_ids)
+            with timer.stage("commit"):
+                db.commit()
+            data_version.bump()
+        
+        # Agregados del periodo para las tendencias de PGA
+        with timer.stage("write"):
+            refresh_period_rollup(db, period)
+        with timer.stage("commit"):
+            db.commit()
+        data_version.bump()
+        
+        # Riesgo de deserción de los estudiantes nuevos o modificados (confirma por lotes)
+        with timer.stage("write"):
+            stats["scored"] = score_students(db)
+        
+        logger.info(f"Filas encontradas: {stats['total_rows']}")
+        
+        run_rows = stats["total_rows"]
+        stats["errors"] = len(rejects)
+        if checkpoint:
+            # Sumar lo que la carga interrumpida ya había confirmado
+            stats = checkpoint.merge(period, stats)
+        total_rows = stats["total_rows"]
+        stats["success_rate"] = (stats["successful_inserts"] / total_rows) * 100 if total_rows > 0 else 0
+        stats["rejected_rows"] = rejects[:MAX_REPORTED_REJECTS]
+        
+        timing = timer.summary()
+        stats.update(timing)
+        stats["rows_per_second"] = round(run_rows / timing["wall_seconds"], 1) if timing["wall_seconds"] > 0 else 0.0
+        log_ingestion(file_path, period, stats, timing)
+        ingestion_metrics.record(stats, timing)
+        return stats
         
     except FileNotFoundError:
+        ingestion_metrics.record({}, timer.summary(), status="failed")
         logger.error(f"Archivo no encontrado: {file_path}")
         raise FileNotFoundError(f"El archivo {file_path} no existe")
     except ValueError as e:
+        ingestion_metrics.record({}, timer.summary(), status="failed")
         if "Worksheet" in str(e):
             logger.error(f"Hoja '{sheet_name}' no encontrada en el archivo")
             raise ValueError(f"La hoja '{sheet_name}' no existe en el archivo Excel")
         else:
             raise e
     except Exception as e:
+        ingestion_metrics.record({}, timer.summary(), status="failed")
         logger.error(f"Error cargando archivo Excel: {str(e)}")
         raise e
 
-def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """Limpia y convierte tipos de datos del DataFrame."""
-    
-    # Convertir fechas
-    date_columns = ['fecha_exp_doc', 'fecha_nacimiento', 'fecha_graduacion']
-    for col in date_columns:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-    
-    # Convertir booleanos
-    boolean_columns = ['icfes_antes_del_2000']
-    for col in boolean_columns:
-        if col in df.columns:
-            df[col] = df[col].astype(bool, errors='ignore')
-    
-    # Convertir números enteros
-    int_columns = [
-        'id', 'estrato', 'creditos_matriculados', 'creditos_intentadas',
-        'creditos_ganadas', 'creditos_pasadas', 'creditos_pga',
-        'creditos_intentadas_periodo', 'creditos_ganadas_periodo',
-        'creditos_pasadas_periodo', 'creditos_pga_periodo',
-        'nro_materias_cursadas', 'nro_materias_reprobadas',
-        'nro_materias_aprobadas', 'nro_materias_matriculadas',
-        'nro_materias_finalizadas'
-    ]
-    for col in int_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-    
-    # Convertir números flotantes
-    float_columns = [
-        'ptj_fisica', 'ptj_quimica', 'ptj_geografia', 'ptj_ciencias_sociales',
-        'ptj_sociales_ciudadano', 'ptj_ciencias_naturales', 'ptj_biologia',
-        'ptj_filosofia', 'ptj_lenguaje', 'ptj_lectura_critica', 'ptj_ingles',
-        'ptj_historia', 'ptj_matematicas', 'ecaes', 'pga_acumulado',
-        'pga_acumulado_periodo_busqueda', 'puntos_calidad_pga',
-        'promedio_periodo', 'puntos_calidad_pga_periodo'
-    ]
-    for col in float_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Limpiar strings
-    string_columns = [
-        'codigo_antiguo', 'periodo_catalogo', 'programa', 'snies', 'pensum',
-        'expedida_en', 'sexo', 'estado_civil', 'ciudad1', 'direccion1',
-        'telefono1', 'ciudad2', 'direccion', 'nivel', 'cod_col', 'colegio',
-        'dir_colegio', 'ciudad_colegio', 'depto_colegio', 'municipio_colegio',
-        'pais_colegio', 'cod_estado', 'estado', 'cod_tipo', 'tipo_estudiante',
-        'situacion', 'becas', 'ceres', 'periodo_ingreso', 'peri_in_prog_vigente'
+def parse_sheet_to_parquet(file_path: str, sheet_name: str, output_path: str) -> dict:
+    """
+    Lee y limpia una hoja completa y la guarda como Parquet.
+    
+    Se ejecuta en un proceso aparte (ver load_sheets_to_database): la hoja
+    se recorre por bloques y cada bloque limpio se agrega al archivo, así el
+    proceso no retiene la hoja completa en memoria. El Parquet resultante se
+    carga luego por la ruta de COPY.
+    
+    Returns:
+        dict: Ruta del Parquet, filas leídas, segundos de lectura y tiempos
+            por etapa (read y clean) medidos en el proceso de lectura
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    timer = StageTimer()
+    rows = 0
+    writer = None
+    try:
+        for chunk in timer.iterate("read", iter_file_chunks(file_path, sheet_name, chunk_size=COPY_CHUNK_SIZE)):
+            with timer.stage("clean"):
+                batch = clean_dataframe(chunk.rename(columns=COLUMN_MAPPING))
+                batch = batch[[col for col in batch.columns if col in COLUMN_SCHEMA]]
+                if 'id' not in batch.columns:
+                    raise ValueError("El archivo no contiene la columna 'Id'")
+            timer.count("clean", len(chunk))
+            
+            with timer.stage("write"):
+                # La fila de la hoja viaja en el Parquet para reportar las filas rechazadas
+                batch = batch.assign(**{SOURCE_ROW_COLUMN: batch.index.to_numpy(dtype='int64')})
+                table = pa.Table.from_pandas(batch, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    timing = timer.summary()
+    # La escritura del Parquet intermedio no es la escritura a la base de datos
+    parquet_seconds = timing["stages"].pop("write")["seconds"]
+    for stage in ("lookup", "commit"):
+        timing["stages"].pop(stage)
+    timing["parquet_seconds"] = parquet_seconds
+    return {
+        "path": output_path if writer is not None else None,
+        "rows": rows,
+        "parse_seconds": timing["wall_seconds"],
+        "timing": timing
+    }
+
+def load_sheets_to_database(
+    file_path: str,
+    db: Session,
+    sheet_names: Optional[List[str]] = None,
+    progress_callback: Optional[Callable[[dict], None]] = None,
+    max_processes: Optional[int] = None,
+    parsed_sheets: Optional[Dict[str, Future]] = None,
+    checkpoint: Optional["ImportCheckpoint"] = None
+) -> dict:
+    """
+    Carga varias hojas (periodos) de un mismo archivo Excel.
+    
+    Las hojas se leen y limpian en paralelo en un pool de procesos, cada una
+    a un Parquet temporal. La escritura usa solo la sesión recibida y sigue
+    el orden ascendente de los nombres de hoja, de modo que si un estudiante
+    aparece en varios periodos queda con los datos del más reciente; cada
+    hoja se escribe en cuanto termina su lectura y las siguientes se siguen
+    leyendo mientras tanto.
+    
+    Args:
+        file_path: Ruta al archivo Excel
+        db: Sesión de base de datos
+        sheet_names: Hojas a cargar; None carga todas las del libro
+        progress_callback: Función opcional que recibe las estadísticas
+            acumuladas después de cada bloque
+        max_processes: Máximo de procesos de lectura (default: settings.INGESTION_PROCESSES)
+        parsed_sheets: Lecturas ya encoladas por hoja (Futures con el resultado
+            de parse_sheet_to_parquet), por ejemplo de la caché de cargas; en
+            ese caso no se crea un pool y los Parquet no se eliminan
+        checkpoint: Punto de control de la carga; las hojas que ya terminó
+            una carga interrumpida no se vuelven a leer y la hoja en curso
+            continúa desde su avance guardado
+        
+    Returns:
+        dict: Estadísticas totales, por hoja ("sheets") y tiempo total
+    """
+    start = time.perf_counter()
+    available = list_sheet_names(file_path)
+    if sheet_names is None:
+        sheet_names = available
+    for sheet_name in sheet_names:
+        if sheet_name not in available:
+            raise ValueError(f"La hoja '{sheet_name}' no existe en el archivo Excel")
+    
+    ordered = sorted(dict.fromkeys(sheet_names))
+    done = checkpoint.completed_sheets() if checkpoint else {}
+    pending = [sheet_name for sheet_name in ordered if sheet_name not in done]
+    workers = max(1, min(len(pending), max_processes or settings.INGESTION_PROCESSES))
+    
+    totals = {key: 0 for key in ("total_rows", "successful_inserts", "errors", "inserted", "updated", "unchanged", "deleted")}
+    sheets = {}
+    timings = []
+    
+    def report_progress(sheet_stats):
+        if progress_callback:
+            progress_callback({key: totals[key] + sheet_stats.get(key, 0) for key in totals})
+    
+    # Hojas ya terminadas por una carga interrumpida: solo se suman sus conteos
+    for sheet_name in ordered:
+        if sheet_name in done:
+            sheets[sheet_name] = {**done[sheet_name], "status": "completed", "resumed": True}
+            for key in totals:
+                totals[key] += done[sheet_name].get(key, 0)
+    
+    with tempfile.TemporaryDirectory(prefix="ingestion_") as work_dir, ExitStack() as stack:
+        futures = parsed_sheets
+        if futures is None:
+            # spawn: el proceso padre tiene hilos (servidor, pool de conexiones) y fork no es seguro
+            context = multiprocessing.get_context("spawn")
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers, mp_context=context))
+            futures = {
+                sheet_name: pool.submit(
+                    parse_sheet_to_parquet, file_path, sheet_name,
+                    os.path.join(work_dir, f"{index}.parquet")
+                )
+                for index, sheet_name in enumerate(pending)
+            }
+        
+        for sheet_name in pending:
+            try:
+                parsed = futures[sheet_name].result()
+                write_start = time.perf_counter()
+                if parsed["path"]:
+                    sheet_stats = load_excel_to_database(
+                        parsed["path"], db, sheet_name, progress_callback=report_progress, checkpoint=checkpoint
+                    )
+                    if parsed_sheets is None:
+                        os.remove(parsed["path"])
+                else:
+                    sheet_stats = {key: 0 for key in totals}
+                    sheet_stats["success_rate"] = 0
+                sheet_stats["parse_seconds"] = parsed["parse_seconds"]
+                sheet_stats["parse_timing"] = parsed["timing"]
+                sheet_stats["parse_cached"] = parsed.get("cached", False)
+                sheet_stats["write_seconds"] = round(time.perf_counter() - write_start, 3)
+                if not sheet_stats["parse_cached"]:
+                    # Una hoja que ya estaba en caché no se leyó en esta carga
+                    ingestion_metrics.add_timing(parsed["timing"])
+                    timings.append(parsed["timing"])
+                timings.append(sheet_stats)
+                sheet_stats["status"] = "completed"
+                if checkpoint:
+                    checkpoint.complete_sheet(db, sheet_name, sheet_stats)
+                for key in totals:
+                    totals[key] += sheet_stats[key]
+            except Exception as e:
+                logger.error(f"Error cargando la hoja '{sheet_name}': {str(e)}")
+                sheet_stats = {"status": "failed", "error": str(e)}
+            
+            sheets[sheet_name] = sheet_stats
+            logger.info(f"Hoja '{sheet_name}' procesada: {sheet_stats}")
+    
+    total_rows = totals["total_rows"]
+    # Etapas sumadas de todas las hojas: read y clean incluyen la lectura en
+    # los procesos (en paralelo), así que pueden superar el tiempo total
+    timing = merge_stage_summaries(timings, time.perf_counter() - start)
+    log_ingestion(file_path, ",".join(ordered), totals, timing)
+    return {
+        **totals,
+        "success_rate": (totals["successful_inserts"] / total_rows) * 100 if total_rows > 0 else 0,
+        "sheets": sheets,
+        **timing,
+        "rows_per_second": round(total_rows / timing["wall_seconds"], 1) if timing["wall_seconds"] > 0 else 0.0
+    }
+
+def hash_file_content(file_obj, copy_to=None, chunk_size: int = 1024 * 1024):
+    """
+    Calcula el hash sha256 del contenido de un archivo y retorna el objeto hash.
+    
+    El archivo se lee por bloques desde su posición actual, sin cargarlo
+    completo en memoria. Si se indica copy_to, cada bloque se escribe también
+    ahí, de modo que guardar y calcular el hash cuesta una sola lectura.
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: file_obj.read(chunk_size), b""):
+        digest.update(block)
+        if copy_to is not None:
+            copy_to.write(block)
+    return digest
+
+def sheet_upload_hash(content_digest, sheet_name: str) -> str:
+    """Hash de una carga (contenido más hoja) a partir del hash del contenido."""
+    digest = content_digest.copy()
+    digest.update(f"\0{sheet_name}".encode("utf-8"))
+    return digest.hexdigest()
+
+def compute_upload_hash(file_obj, sheet_name: str, copy_to=None, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula el hash sha256 del contenido de un archivo más el nombre de la hoja (ver hash_file_content)."""
+    return sheet_upload_hash(hash_file_content(file_obj, copy_to, chunk_size), sheet_name)
+
+def find_completed_import(db: Session, content_hash: str) -> Optional[ExcelImport]:
+    """Busca una carga completada previamente con el mismo hash de archivo y hoja."""
+    return db.query(ExcelImport).filter(
+        ExcelImport.content_hash == content_hash,
+        ExcelImport.status == IMPORT_COMPLETED
+    ).first()
+
+def find_interrupted_import(db: Session, content_hash: str) -> Optional[ExcelImport]:
+    """Busca una carga del mismo archivo y hoja que no terminó y tiene punto de control."""
+    return db.query(ExcelImport).filter(
+        ExcelImport.content_hash == content_hash,
+        ExcelImport.status != IMPORT_COMPLETED,
+        ExcelImport.checkpoint.isnot(None)
+    ).first()
+
+def record_completed_import(
+    db: Session,
+    content_hash: str,
+    sheet_name: str,
+    filename: Optional[str],
+    statistics: dict
+) -> None:
+    """
+    Registra (o actualiza, si se forzó la recarga o se reanudó) una carga
+    completada. El punto de control de la carga se descarta.
+    """
+    table = ExcelImport.__table__
+    stmt = pg_insert(table).values(
+        content_hash=content_hash,
+        sheet_name=sheet_name,
+        filename=filename,
+        statistics=statistics,
+        status=IMPORT_COMPLETED
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.content_hash],
+        set_={
+            "filename": stmt.excluded.filename,
+            "statistics": stmt.excluded.statistics,
+            "status": IMPORT_COMPLETED,
+            "checkpoint": None,
+            "source_path": None,
+            "error_message": None,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+    db.commit()
+
+class ImportCheckpoint:
+    """
+    Punto de control de una carga, guardado en su registro de excel_imports.
+    
+    Después de cada lote, save_batch registra las filas de la hoja ya
+    procesadas y los conteos parciales en la misma transacción que el lote,
+    así el punto de control nunca queda adelante ni atrás de lo confirmado.
+    Una carga reanudada omite esas filas, no vuelve a leer las hojas ya
+    terminadas y suma sus conteos a los guardados. El detalle de las filas
+    rechazadas antes de la interrupción no se conserva, solo su cantidad.
+    
+    Una recarga forzada de un archivo ya cargado (replaces_completed) no se
+    puede reanudar: si falla, el registro vuelve a la carga completada
+    anterior, con sus estadísticas, y el archivo se sigue reconociendo como
+    duplicado.
+    
+    El estado (columna checkpoint) es:
+        {"sheets": [...], "rows": {hoja: filas}, "partial": {hoja: conteos},
+         "completed": {hoja: conteos}}
+    """
+    
+    def __init__(self, content_hash: str, state: dict, replaces_completed: bool = False):
+        self.content_hash = content_hash
+        self.state = state
+        self.replaces_completed = replaces_completed
+        # Conteos confirmados antes de esta ejecución, por hoja
+        self.base = {sheet: dict(counts) for sheet, counts in state["partial"].items()}
+    
+    @classmethod
+    def begin(
+        cls,
+        db: Session,
+        content_hash: str,
+        sheet_names: List[str],
+        filename: Optional[str],
+        source_path: Optional[str],
+        job_id: Optional[str],
+        resume: bool = False
+    ) -> "ImportCheckpoint":
+        """
+        Marca la carga como en curso y retorna su punto de control.
+        
+        Con resume=True se conserva el avance guardado (si lo hay); si no, la
+        carga empieza de cero. Las estadísticas de una carga completada
+        anterior no se tocan hasta que esta termine. Hace commit.
+        """
+        existing = db.query(ExcelImport).filter(ExcelImport.content_hash == content_hash).first()
+        replaces_completed = existing is not None and existing.status == IMPORT_COMPLETED
+        if resume and existing is not None and existing.checkpoint:
+            state = existing.checkpoint
+        else:
+            state = {"sheets": list(sheet_names), "rows": {}, "partial": {}, "completed": {}}
+        
+        table = ExcelImport.__table__
+        stmt = pg_insert(table).values(
+            content_hash=content_hash,
+            sheet_name=",".join(state["sheets"]),
+            filename=filename,
+            status=IMPORT_RUNNING,
+            checkpoint=state,
+            source_path=source_path,
+            job_id=job_id
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.content_hash],
+            set_={
+                "status": IMPORT_RUNNING,
+                "checkpoint": stmt.excluded.checkpoint,
+                "source_path": stmt.excluded.source_path,
+                "job_id": stmt.excluded.job_id,
+                "error_message": None,
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+        db.commit()
+        return cls(content_hash, state, replaces_completed)
+    
+    def start_row(self, sheet_name: str) -> int:
+        """Filas de la hoja ya procesadas por una carga anterior."""
+        return self.state["rows"].get(sheet_name, 0)
+    
+    def completed_sheets(self) -> dict:
+        """Conteos de las hojas que ya terminaron, por nombre de hoja."""
+        return self.state["completed"]
+    
+    def merge(self, sheet_name: str, stats: dict) -> dict:
+        """Suma a las estadísticas de esta ejecución los conteos confirmados antes."""
+        base = self.base.get(sheet_name)
+        if not base:
+            return dict(stats)
+        merged = dict(stats)
+        for key in RESUMABLE_COUNTERS:
+            merged[key] = stats.get(key, 0) + base.get(key, 0)
+        merged["resumed_from_row"] = base.get("total_rows", 0)
+        return merged
+    
+    def _save(self, db: Session):
+        table = ExcelImport.__table__
+        db.execute(
+            update(table)
+            .where(table.c.content_hash == self.content_hash)
+            .values(checkpoint=self.state, updated_at=func.now())
+        )
+    
+    def save_batch(self, db: Session, sheet_name: str, stats: dict):
+        """Guarda el avance de la hoja. No hace commit: se confirma junto con el lote."""
+        merged = self.merge(sheet_name, stats)
+        self.state["rows"][sheet_name] = merged["total_rows"]
+        self.state["partial"][sheet_name] = {key: merged.get(key, 0) for key in RESUMABLE_COUNTERS}
+        self._save(db)
+    
+    def complete_sheet(self, db: Session, sheet_name: str, stats: dict):
+        """Marca una hoja como terminada, con sus conteos finales. Hace commit."""
+        self.state["completed"][sheet_name] = {key: stats.get(key, 0) for key in RESUMABLE_COUNTERS}
+        self._save(db)
+        db.commit()
+    
+    @property
+    def resumable(self) -> bool:
+        """Indica si, al fallar, la carga queda pendiente de reanudar."""
+        return not self.replaces_completed
+    
+    def fail(self, db: Session, error_message: str):
+        """
+        Marca la carga como fallida; el avance guardado se conserva para
+        reanudarla. Si era una recarga forzada, el registro vuelve a la carga
+        completada anterior y solo guarda el error. Hace commit.
+        """
+        db.rollback()
+        table = ExcelImport.__table__
+        values = {"status": IMPORT_FAILED, "error_message": error_message[:1000], "updated_at": func.now()}
+        if self.replaces_completed:
+            values.update(status=IMPORT_COMPLETED, checkpoint=None, source_path=None)
+        db.execute(update(table).where(table.c.content_hash == self.content_hash).values(**values))
+        db.commit()
+
+def compute_row_fingerprints(batch: pd.DataFrame) -> pd.Series:
+    """
+    Calcula una huella de 64 bits del contenido de cada fila.
+    
+    Se usa el hash vectorizado de pandas sobre las columnas del modelo en un
+    orden fijo; como clean_dataframe fija los tipos, la misma fila produce
+    la misma huella en cargas distintas.
+    """
+    columns = [col for col in COLUMN_SCHEMA if col in batch.columns]
+    hashes = pd.util.hash_pandas_object(batch[columns], index=False).to_numpy()
+    return pd.Series(hashes.view('int64'), index=batch.index)
+
+def copy_merge_student_batch(db: Session, batch: pd.DataFrame, timer: Optional[StageTimer] = None) -> dict:
+    """
+    Escribe un lote con COPY FROM STDIN a una tabla temporal y una fusión.
+    
+    Es la única escritura de student_data desde las cargas. Los valores nulos
+    no sobrescriben los existentes (COALESCE(EXCLUDED.columna, columna)), de
+    un ID repetido en el lote se toma su última fila (la misma que guarda la
+    foto del periodo, con la misma huella) y se omiten las filas cuya huella
+    no cambió. Como la
+    comparación de huellas ocurre dentro de la fusión, la etapa lookup de
+    timer solo mide el cálculo de huellas; COPY y fusión se miden como write.
+    No hace commit.
+    
+    Returns:
+        dict: Conteos de filas insertadas, actualizadas y sin cambios
+    """
+    timer = timer or StageTimer()
+    with timer.stage("lookup"):
+        # Un ID repetido en la hoja: gana su última fila, igual que en la foto del periodo
+        batch = batch.drop_duplicates('id', keep='last')
+        
+        table = StudentData.__table__
+        columns = [col for col in batch.columns if col in table.c and col != 'row_fingerprint']
+        batch = batch[columns].assign(row_fingerprint=compute_row_fingerprints(batch[columns]))
+        columns.append('row_fingerprint')
+    
+    column_list = ", ".join(columns)
+    updates = ", ".join(
+        [f"{col} = COALESCE(EXCLUDED.{col}, student_data.{col})" for col in columns if col != 'id']
+        # Los datos cambiaron: el riesgo queda pendiente de recalcular
+        + ["riesgo_desercion = NULL"]
+    )
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        with timer.stage("write"):
+            _copy_to_staging(cursor, STAGING_TABLE, "student_data", batch[columns])
+            cursor.execute(f"""
+                INSERT INTO student_data ({column_list}, is_validated)
+                SELECT {column_list}, FALSE FROM {STAGING_TABLE}
+                ON CONFLICT (id) DO UPDATE SET {updates}
+                WHERE student_data.row_fingerprint IS DISTINCT FROM EXCLUDED.row_fingerprint
+                RETURNING (xmax = 0) AS inserted
+            """)
+            written = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    
+    inserted = sum(written)
+    updated = len(written) - inserted
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(batch) - inserted - updated
+    }
+
+def _error_reason(error: Exception) -> str:
+    """Primera línea del mensaje de la base de datos, sin el envoltorio de SQLAlchemy."""
+    message = str(getattr(error, 'orig', None) or error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+def write_batch_isolated(db: Session, batch: pd.DataFrame, write_batch: Callable, rejects: list) -> dict:
+    """
+    Escribe un lote dentro de un savepoint, aislando las filas inválidas.
+    
+    Si la escritura falla por un error de datos (ROW_ERRORS) se revierte solo
+    el savepoint y el lote se divide en dos mitades que se reintentan por
+    separado, hasta llegar a filas individuales. Las filas válidas se
+    escriben igual y cada fila culpable cuesta O(log n) intentos extra. Las
+    filas rechazadas se agregan a rejects con su número de fila (el índice
+    del lote), ID y motivo. Otros errores se propagan. No hace commit.
+    
+    Returns:
+        dict: Conteos sumados de las escrituras exitosas
+    """
+    try:
+        with db.begin_nested():
+            return write_batch(db, batch)
+    except ROW_ERRORS as e:
+        if len(batch) == 1:
+            rejects.append({
+                "row": int(batch.index[0]),
+                "id": batch['id'].iloc[0],
+                "reason": _error_reason(e)
+            })
+            return {}
+    
+    middle = len(batch) // 2
+    counts = {}
+    for half in (batch.iloc[:middle], batch.iloc[middle:]):
+        for key, value in write_batch_isolated(db, half, write_batch, rejects).items():
+            counts[key] = counts.get(key, 0) + value
+    return counts
+
+def _copy_to_staging(cursor, staging_table: str, like_table: str, batch: pd.DataFrame) -> None:
+    """
+    Vacía la tabla temporal staging_table (la crea si no existe, con las
+    columnas de like_table) y copia el lote con COPY FROM STDIN.
+    """
+    buffer = io.StringIO()
+    batch.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d')
+    buffer.seek(0)
+    
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging_table} "
+        f"(LIKE {like_table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+    cursor.execute(f"TRUNCATE {staging_table}")
+    cursor.copy_expert(
+        f"COPY {staging_table} ({', '.join(batch.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def snapshot_partition_name(period: str) -> str:
+    """Nombre de la partición de student_data_snapshots para un periodo."""
+    suffix = re.sub(r'[^0-9a-z]+', '_', period.lower()).strip('_')
+    if suffix != period.lower() or len(suffix) > 32:
+        # Nombres de hoja con caracteres especiales: evitar colisiones entre periodos
+        suffix = f"{suffix[:32]}_{hashlib.sha1(period.encode('utf-8')).hexdigest()[:8]}".lstrip('_')
+    return f"{SNAPSHOT_TABLE}_{suffix}"
+
+def ensure_snapshot_partition(db: Session, period: str) -> str:
+    """Crea la partición del periodo si todavía no existe. No hace commit."""
+    partition = snapshot_partition_name(period)
+    value = literal(period, String).compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition} "
+        f"PARTITION OF {SNAPSHOT_TABLE} FOR VALUES IN ({value})"
+    ))
+    return partition
+
+def append_snapshot_batch(db: Session, batch: pd.DataFrame, period: str) -> None:
+    """
+    Registra un lote en la foto del periodo (student_data_snapshots).
+    
+    A diferencia de student_data, la foto guarda los valores tal como vienen
+    en la hoja (los nulos también). Reimportar un periodo reemplaza sus filas
+    y omite las que no cambiaron según su huella. No hace commit.
+    """
+    # Un ID repetido en la hoja: gana su última fila tal como viene, sin combinarla con las anteriores
+    batch = batch.drop_duplicates('id', keep='last')
+    
+    columns = [
+        col for col in batch.columns
+        if col in student_data_snapshots.c and col not in ('period', 'loaded_at', 'row_fingerprint')
     ]
-    for col in string_columns:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace('nan', None)
+    batch = batch[columns].assign(row_fingerprint=compute_row_fingerprints(batch[columns]))
+    columns.append('row_fingerprint')
     
-    # Reemplazar NaN con None para compatibilidad con SQLAlchemy
-    df = df.where(pd.notna(df), None)
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in columns if col != 'id')
     
-    return df
+    cursor = db.connection().connection.cursor()
+    try:
+        _copy_to_staging(cursor, SNAPSHOT_STAGING_TABLE, "student_data", batch)
+        cursor.execute(f"""
+            INSERT INTO {SNAPSHOT_TABLE} (period, {column_list})
+            SELECT %s, {column_list} FROM {SNAPSHOT_STAGING_TABLE}
+            ON CONFLICT (period, id) DO UPDATE SET {updates}, loaded_at = now()
+            WHERE {SNAPSHOT_TABLE}.row_fingerprint IS DISTINCT FROM EXCLUDED.row_fingerprint
+        """, (period,))
+    finally:
+        cursor.close()
+
+def refresh_period_rollup(db: Session, period: str) -> int:
+    """
+    Recalcula los agregados por programa de un periodo a partir de su foto.
+    
+    Solo se lee la partición del periodo y se reemplazan sus filas en
+    student_period_rollups; los demás periodos no se tocan. Los percentiles
+    no se pueden acumular lote a lote, por eso se recalcula el periodo
+    completo una vez al final de cada carga. No hace commit.
+    
+    Returns:
+        int: Número de programas del periodo
+    """
+    aggregates = ", ".join(
+        f"count({metric}), avg({metric}), var_samp({metric}), "
+        f"percentile_cont(0.25) WITHIN GROUP (ORDER BY {metric}), "
+        f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {metric}), "
+        f"percentile_cont(0.75) WITHIN GROUP (ORDER BY {metric})"
+        for metric in ROLLUP_METRICS
+    )
+    columns = ", ".join(f"{metric}_{statistic}" for metric in ROLLUP_METRICS for statistic in ROLLUP_STATISTICS)
+    db.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE period = :period"), {"period": period})
+    result = db.execute(text(f"""
+        INSERT INTO {ROLLUP_TABLE} (period, programa, student_count, {columns})
+        SELECT period, programa, count(*), {aggregates}
+        FROM {SNAPSHOT_TABLE}
+        WHERE period = :period
+        GROUP BY period, programa
+    """), {"period": period})
+    return result.rowcount
+
+def delete_missing_snapshot_rows(db: Session, period: str, seen_ids: set) -> int:
+    """Elimina de la foto del periodo los estudiantes que ya no están en la hoja. No hace commit."""
+    result = db.execute(
+        text(f"DELETE FROM {SNAPSHOT_TABLE} WHERE period = :period AND NOT (id = ANY(:ids))"),
+        {"period": period, "ids": list(seen_ids)}
+    )
+    return result.rowcount
+
+def delete_missing_students(db: Session, seen_ids: set) -> int:
+    """Elimina los estudiantes que no están en seen_ids y no tienen usuario registrado. No hace commit."""
+    result = db.execute(
+        text("""
+            DELETE FROM student_data
+            WHERE NOT (id = ANY(:ids))
+              AND NOT EXISTS (SELECT 1 FROM users WHERE users.student_data_id = student_data.id)
+        """),
+        {"ids": list(seen_ids)}
+    )
+    return result.rowcount
+
+def _column_kind(column) -> str:
+    """Clasifica una columna del modelo según el tipo de conversión que necesita."""
+    if isinstance(column.type, Boolean):
+        return 'bool'
+    if isinstance(column.type, (Date, DateTime)):
+        return 'date'
+    if isinstance(column.type, Integer):
+        return 'int'
+    if isinstance(column.type, Float):
+        return 'float'
+    return 'string'
+
+# Columnas del modelo que no vienen del Excel
+NON_EXCEL_COLUMNS = {'is_validated', 'validation_date', 'row_fingerprint', 'riesgo_desercion'}
+
+# Esquema declarativo: columna del modelo -> tipo de conversión
+COLUMN_SCHEMA = {
+    column.name: _column_kind(column)
+    for column in StudentData.__table__.columns
+    if column.name not in NON_EXCEL_COLUMNS
+}
+
+# Valores de texto reconocidos como booleanos
+BOOLEAN_VALUES = {
+    'true': True, '1': True, '1.0': True, 'si': True, 'sí': True, 'yes': True, 's': True,
+    'false': False, '0': False, '0.0': False, 'no': False, 'n': False
+}
+
+def _convert_unique(values: pd.Series, convert, dtype: str) -> pd.Series:
+    """
+    Aplica una conversión elemento a elemento solo sobre los valores distintos.
+    
+    Las columnas de texto del Excel repiten pocos valores (programas, ciudades,
+    estados), así que factorizar y convertir las categorías es mucho más
+    barato que recorrer todas las filas.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    converted = pd.array([convert(value) for value in uniques], dtype=dtype)
+    result = converted.take(codes, allow_fill=True)
+    return pd.Series(result, index=values.index, name=values.name)
+
+def _strip_text(value):
+    # Un entero leído del Excel llega como float si su bloque tiene celdas
+    # vacías: 202430.0 se guarda como '202430', igual que en los demás bloques y en CSV
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text if text else None
+
+def _to_float(values: pd.Series) -> pd.Series:
+    numeric = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    numeric = np.where(np.isinf(numeric), np.nan, numeric)
+    return pd.Series(numeric, index=values.index, name=values.name)
+
+def _to_int(values: pd.Series) -> pd.Series:
+    numeric = _to_float(values).to_numpy()
+    missing = np.isnan(numeric)
+    integers = np.where(missing, 0, np.round(numeric)).astype('int64')
+    return pd.Series(pd.arrays.IntegerArray(integers, missing), index=values.index, name=values.name)
+
+def _to_date(values: pd.Series) -> pd.Series:
+    return pd.to_datetime(values, errors='coerce')
+
+def _to_bool(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype('boolean')
+    return _convert_unique(values, lambda value: BOOLEAN_VALUES.get(str(value).strip().lower()), 'boolean')
+
+def _to_string(values: pd.Series) -> pd.Series:
+    return _convert_unique(values, _strip_text, 'string')
+
+COLUMN_CONVERTERS = {
+    'int': _to_int,
+    'float': _to_float,
+    'date': _to_date,
+    'bool': _to_bool,
+    'string': _to_string,
+}
+
+def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Limpia y convierte tipos de datos del DataFrame según COLUMN_SCHEMA.
+    
+    Todas las columnas se convierten en una sola pasada y conservan tipos
+    nativos con nulos (Int64, float64, boolean, string, datetime64); la
+    conversión a objetos de Python se hace al escribir en la base de datos.
+    """
+    converted = {
+        col: COLUMN_CONVERTERS[kind](df[col])
+        for col, kind in COLUMN_SCHEMA.items()
+        if col in df.columns
+    }
+    return df.assign(**converted)
@@ -0,0 +1,395 @@
+import csv
+import os
+import posixpath
+import re
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+from xml.etree import ElementTree
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Tamaño por defecto de los bloques de filas leídos del Excel
+DEFAULT_CHUNK_SIZE = 1000
+
+# Formatos tabulares planos que se cargan con COPY en lugar de INSERT
+COPY_FORMATS = ('.csv', '.parquet')
+
+# Extensiones aceptadas para la carga de datos de estudiantes
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls') + COPY_FORMATS
+
+# Columna con el número de fila del archivo original en los Parquet intermedios
+# (ver parse_sheet_to_parquet); al leerlos vuelve a ser el índice de cada bloque
+SOURCE_ROW_COLUMN = "_fila_origen"
+
+# Mapeo de columnas del Excel a campos del modelo StudentData
+COLUMN_MAPPING = {
+    'Id': 'id',
+    'Codigo_antiguo': 'codigo_antiguo',
+    'Periodo_catalogo': 'periodo_catalogo',
+    'Programa': 'programa',
+    'Snies': 'snies',
+    'Pensum': 'pensum',
+    'Expedida_en': 'expedida_en',
+    'Fecha_exp_doc': 'fecha_exp_doc',
+    'Sexo': 'sexo',
+    'Estado_civil': 'estado_civil',
+    'Fecha_nacimento': 'fecha_nacimiento',  # Nota: typo en el original
+    'Ciudad1': 'ciudad1',
+    'Direccion1': 'direccion1',
+    'Telefono1': 'telefono1',
+    'Ciudad2': 'ciudad2',
+    'Direccion': 'direccion',
+    'Nivel': 'nivel',
+    'Cod_col': 'cod_col',
+    'Colegio': 'colegio',
+    'Dir_colegio': 'dir_colegio',
+    'Ciudad_colegio': 'ciudad_colegio',
+    'Depto_colegio': 'depto_colegio',
+    'Municipio_colegio': 'municipio_colegio',
+    'Pais_colegio': 'pais_colegio',
+    'Fecha_graduacion': 'fecha_graduacion',
+    'Ptj_fisica': 'ptj_fisica',
+    'Ptj_quimica': 'ptj_quimica',
+    'Ptj_geografia': 'ptj_geografia',
+    'Ptj_ciencias_sociales': 'ptj_ciencias_sociales',
+    'Ptj_sociales_ciudadano': 'ptj_sociales_ciudadano',
+    'Ptj_ciencias_naturales': 'ptj_ciencias_naturales',
+    'Ptj_biologia': 'ptj_biologia',
+    'Ptj_filosofia': 'ptj_filosofia',
+    'Ptj_lenguaje': 'ptj_lenguaje',
+    'Ptj_lectura_critica': 'ptj_lectura_critica',
+    'Ptj_ingles': 'ptj_ingles',
+    'Ptj_historia': 'ptj_historia',
+    'Ptj_matematicas': 'ptj_matematicas',
+    'Icfes_antes_del_2000': 'icfes_antes_del_2000',
+    'Ecaes': 'ecaes',
+    'Cod_estado': 'cod_estado',
+    'Estado': 'estado',
+    'Cod_tipo': 'cod_tipo',
+    'Tipo_estudiante': 'tipo_estudiante',
+    'Pga_acomulado': 'pga_acumulado',  # Nota: typo en el original
+    'Pga_acomulado_periodo_busqueda': 'pga_acumulado_periodo_busqueda',
+    'Creditos_matriculados': 'creditos_matriculados',
+    'Creditos_intentadas': 'creditos_intentadas',
+    'Creditos_ganadas': 'creditos_ganadas',
+    'Creditos_pasadas': 'creditos_pasadas',
+    'Creditos_pga': 'creditos_pga',
+    'Puntos_calidad_pga': 'puntos_calidad_pga',
+    'Promedio_periodo': 'promedio_periodo',
+    'Creditos_intentadas_periodo': 'creditos_intentadas_periodo',
+    'Creditos_ganadas_periodo': 'creditos_ganadas_periodo',
+    'Creditos_pasadas_periodo': 'creditos_pasadas_periodo',
+    'Creditos_pga_periodo': 'creditos_pga_periodo',
+    'Puntos_calidad_pga_periodo': 'puntos_calidad_pga_periodo',
+    'Nro_materias_cursadas': 'nro_materias_cursadas',
+    'Nro_materias_reprobadas': 'nro_materias_reprobadas',
+    'Nro_materias_aprobadas': 'nro_materias_aprobadas',
+    'Nro_materias_matriculadas': 'nro_materias_matriculadas',
+    'Nro_materias_finalizadas': 'nro_materias_finalizadas',
+    'Situacion': 'situacion',
+    'Estrato': 'estrato',
+    'Becas': 'becas',
+    'Ceres': 'ceres',
+    'Periodo_ingreso': 'periodo_ingreso',
+    'Peri_in_prog_vigente': 'peri_in_prog_vigente'
+}
+
+
+def iter_excel_chunks(
+    file_path: str,
+    sheet_name: Union[str, int] = "202430",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Lee una hoja de Excel en bloques de tamaño fijo.
+
+    Los archivos .xlsx se recorren con openpyxl en modo de solo lectura, de
+    modo que nunca se carga la hoja completa en memoria: cada bloque es un
+    DataFrame con los encabezados originales y los valores ya tipados por
+    openpyxl (números, fechas, texto). Los archivos .xls no admiten lectura
+    en streaming y se leen completos con pandas antes de partirse en bloques.
+
+    El índice de cada bloque es el número de fila en la hoja (la fila 1 es el
+    encabezado), también cuando hay filas vacías en medio. La hoja se valida al llamar la función, no al consumir el primer bloque.
+
+    Args:
+        file_path: Ruta al archivo Excel
+        sheet_name: Nombre o índice de la hoja
+        chunk_size: Número de filas por bloque
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+        ValueError: Si la hoja no existe en el archivo
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    if os.path.splitext(file_path)[1].lower() == '.xls':
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        df.index = df.index + 2
+        return (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, int):
+            worksheet = workbook.worksheets[sheet_name]
+        else:
+            worksheet = workbook[sheet_name]
+    except (KeyError, IndexError):
+        workbook.close()
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+    return _iter_worksheet_chunks(workbook, worksheet, chunk_size)
+
+
+def _iter_worksheet_chunks(workbook, worksheet, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Genera bloques de filas de una hoja abierta y cierra el libro al terminar."""
+    try:
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # Ignorar columnas sin encabezado (celdas sobrantes a la derecha)
+        columns = [str(name).strip() if name is not None else None for name in header]
+        keep = [i for i, name in enumerate(columns) if name]
+        columns = [columns[i] for i in keep]
+
+        # En modo de solo lectura las filas se recorren desde la 1, con las vacías incluidas
+        buffer: List[tuple] = []
+        numbers: List[int] = []
+        for number, row in enumerate(rows, start=2):
+            values = tuple(row[i] if i < len(row) else None for i in keep)
+            # Saltar filas completamente vacías
+            if all(value is None for value in values):
+                continue
+            buffer.append(values)
+            numbers.append(number)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=columns).set_axis(numbers)
+                buffer, numbers = [], []
+
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns).set_axis(numbers)
+    finally:
+        workbook.close()
+
+
+# Espacios de nombres XML del formato .xlsx (Office Open XML)
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Referencia de celda, p. ej. "BQ5001"
+_CELL_REFERENCE = re.compile(r'^\$?([A-Z]+)\$?(\d+)$')
+
+
+def _parse_cell_reference(reference: str) -> Optional[tuple]:
+    """Convierte una referencia como "BQ5001" en (fila, columna), ambas desde 1."""
+    match = _CELL_REFERENCE.match(reference.strip().upper())
+    if not match:
+        return None
+    letters, row = match.groups()
+    column = 0
+    for letter in letters:
+        column = column * 26 + ord(letter) - ord('A') + 1
+    return int(row), column
+
+
+def _read_sheet_dimension(archive: zipfile.ZipFile, member: str) -> Optional[str]:
+    """
+    Lee el atributo ref de <dimension> de una hoja sin recorrer sus filas.
+
+    El registro de dimensión va antes de <sheetData>, así que el análisis se
+    detiene en cuanto aparece cualquiera de los dos.
+    """
+    try:
+        stream = archive.open(member)
+    except KeyError:
+        return None
+    with stream:
+        for _, element in ElementTree.iterparse(stream, events=('start',)):
+            if element.tag == f'{_MAIN_NS}dimension':
+                return element.get('ref')
+            if element.tag == f'{_MAIN_NS}sheetData':
+                return None
+    return None
+
+
+def read_workbook_metadata(file_obj: BinaryIO) -> List[Dict[str, Optional[Union[str, int]]]]:
+    """
+    Lee las hojas de un .xlsx y su tamaño declarado sin abrir el libro.
+
+    Solo se leen xl/workbook.xml, sus relaciones y el registro <dimension>
+    de cada hoja, directamente del archivo comprimido. rows y columns salen
+    de la dimensión (rows descuenta la fila de encabezados) y son None si la
+    hoja no la declara.
+
+    Args:
+        file_obj: Archivo binario con posibilidad de seek (p. ej. UploadFile.file)
+
+    Raises:
+        ValueError: Si el contenido no es un libro .xlsx válido
+    """
+    try:
+        archive = zipfile.ZipFile(file_obj)
+    except zipfile.BadZipFile:
+        raise ValueError("El archivo no es un libro de Excel .xlsx válido")
+
+    with archive:
+        try:
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        except KeyError:
+            raise ValueError("El archivo no es un libro de Excel .xlsx válido")
+
+        targets = {}
+        for relation in relations.iter(f'{_PACKAGE_REL_NS}Relationship'):
+            target = relation.get('Target', '')
+            # Las rutas son relativas a xl/ salvo que empiecen con "/"
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[relation.get('Id')] = target
+
+        sheets = []
+        for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+            member = targets.get(sheet.get(f'{_REL_NS}id'))
+            dimension = _read_sheet_dimension(archive, member) if member else None
+
+            rows = columns = None
+            if dimension:
+                bounds = [_parse_cell_reference(part) for part in dimension.split(':')]
+                if all(bounds):
+                    first, last = bounds[0], bounds[-1]
+                    rows = max(0, last[0] - first[0])
+                    columns = last[1] - first[1] + 1
+
+            sheets.append({
+                "name": sheet.get('name'),
+                "rows": rows,
+                "columns": columns,
+                "state": sheet.get('state', 'visible')
+            })
+        return sheets
+
+
+def list_sheet_names(file_path: str) -> List[str]:
+    """Retorna los nombres de las hojas de un archivo Excel, en el orden del libro."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    if os.path.splitext(file_path)[1].lower() == '.xls':
+        return [str(name) for name in pd.ExcelFile(file_path).sheet_names]
+
+    with open(file_path, 'rb') as f:
+        return [sheet["name"] for sheet in read_workbook_metadata(f)]
+
+
+def iter_csv_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Lee un CSV en bloques de tamaño fijo.
+
+    Todas las columnas se leen como texto para que cada bloque tenga los
+    mismos tipos; la conversión la hace clean_dataframe. El separador
+    (coma, punto y coma o tabulación) se detecta con la primera línea. Las
+    líneas vacías se omiten y el índice de cada bloque es el número de línea
+    del archivo (la 1 es el encabezado).
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        first_line = f.readline()
+    try:
+        delimiter = csv.Sniffer().sniff(first_line, delimiters=',;\t').delimiter
+    except csv.Error:
+        delimiter = ','
+
+    chunks = pd.read_csv(
+        file_path,
+        sep=delimiter,
+        dtype=str,
+        encoding='utf-8-sig',
+        chunksize=chunk_size,
+        # Las líneas vacías se leen para no correr la numeración, y luego se descartan
+        skip_blank_lines=False
+    )
+    return _number_csv_chunks(chunks)
+
+
+def _number_csv_chunks(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Numera los bloques con la línea del archivo y descarta las líneas vacías."""
+    for chunk in chunks:
+        chunk.index = chunk.index + 2
+        chunk = chunk.dropna(how='all')
+        if not chunk.empty:
+            yield chunk
+
+
+def iter_parquet_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Lee un archivo Parquet por lotes de filas, sin cargarlo completo.
+
+    Si el archivo trae SOURCE_ROW_COLUMN (un Parquet intermedio leído de un
+    Excel), esa columna es el índice de cada bloque; si no, el índice es la
+    posición de la fila más 2, como si la fila 1 fuera un encabezado.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    import pyarrow.parquet as pq
+
+    return _iter_parquet_batches(pq.ParquetFile(file_path), chunk_size)
+
+
+def _iter_parquet_batches(parquet_file, chunk_size: int) -> Iterator[pd.DataFrame]:
+    first_row = 2
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        chunk = batch.to_pandas()
+        if SOURCE_ROW_COLUMN in chunk.columns:
+            chunk = chunk.set_index(SOURCE_ROW_COLUMN).rename_axis(None)
+        else:
+            chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+        yield chunk
+
+
+def _skip_leading_rows(chunks: Iterator[pd.DataFrame], skip_rows: int) -> Iterator[pd.DataFrame]:
+    """Descarta las primeras skip_rows filas de una secuencia de bloques."""
+    for chunk in chunks:
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        if skip_rows:
+            chunk = chunk.iloc[skip_rows:]
+            skip_rows = 0
+        yield chunk
+
+
+def iter_file_chunks(
+    file_path: str,
+    sheet_name: Union[str, int] = "202430",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_rows: int = 0
+) -> Iterator[pd.DataFrame]:
+    """
+    Lee un archivo de datos de estudiantes en bloques según su extensión.
+
+    Acepta Excel (.xlsx, .xls), CSV y Parquet; sheet_name solo aplica a Excel.
+    El índice de cada bloque es el número de fila en el archivo original (ver
+    cada lector), el que se reporta en las filas rechazadas.
+    skip_rows omite esa cantidad de filas de datos al inicio (sin contar el
+    encabezado ni las filas vacías), para reanudar una carga interrumpida:
+    las filas omitidas se leen pero no se entregan.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.csv':
+        chunks = iter_csv_chunks(file_path, chunk_size)
+    elif ext == '.parquet':
+        chunks = iter_parquet_chunks(file_path, chunk_size)
+    else:
+        chunks = iter_excel_chunks(file_path, sheet_name, chunk_size)
+    return _skip_leading_rows(chunks, skip_rows) if skip_rows else chunks
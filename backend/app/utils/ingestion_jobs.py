@@ -0,0 +1,256 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+from uuid import uuid4
+
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.excel_loader import (
+    ImportCheckpoint, load_excel_to_database, load_sheets_to_database, record_completed_import
+)
+from app.utils.ingestion_metrics import ingestion_metrics
+from app.utils.upload_cache import upload_cache
+
+logger = logging.getLogger(__name__)
+
+# Estados posibles de un trabajo de carga
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_PARTIAL = "partial"  # terminó, pero alguna hoja falló (ver failed_sheets)
+JOB_FAILED = "failed"
+
+# Intervalo mínimo entre notificaciones de progreso de un mismo trabajo
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+# Cantidad de trabajos terminados que se conservan para consulta
+MAX_FINISHED_JOBS = 100
+
+
+def persist_import_source(file_path: str, content_hash: str) -> str:
+    """
+    Guarda una copia del archivo de una carga para poder reanudarla.
+
+    La copia vive en settings.INGESTION_RESUME_DIR con el hash de la carga
+    como nombre, fuera de los temporales y de la caché de cargas (que se
+    vacían), y se elimina cuando la carga termina. Se usa un enlace duro
+    cuando es posible, así no se duplica el archivo en disco.
+    """
+    os.makedirs(settings.INGESTION_RESUME_DIR, exist_ok=True)
+    target = os.path.join(settings.INGESTION_RESUME_DIR, content_hash + os.path.splitext(file_path)[1].lower())
+    if os.path.abspath(target) == os.path.abspath(file_path) or os.path.exists(target):
+        return target
+    try:
+        os.link(file_path, target)
+    except OSError:
+        shutil.copyfile(file_path, target)
+    return target
+
+
+class IngestionJobManager:
+    """
+    Ejecuta las cargas de Excel como trabajos en segundo plano.
+
+    Cada trabajo corre en un pool de hilos con su propia sesión de base de
+    datos, de modo que el parseo y las escrituras no bloquean el event loop.
+    El estado de los trabajos se guarda en memoria y se expone como
+    diccionarios serializables.
+    """
+
+    def __init__(self, max_workers: int):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+
+    def submit(
+        self,
+        file_path: str,
+        sheet_name: Union[str, List[str]],
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cache_key: Optional[str] = None,
+        resume: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Encola la carga de un archivo ya guardado en disco.
+
+        El archivo se elimina cuando el trabajo termina, con o sin errores,
+        salvo que venga de la caché de cargas (cache_key): en ese caso las hojas
+        se toman de la caché, leídas a Parquet. La entrada debe llegar reservada
+        (UploadCache.store con pin=True o acquire) y el trabajo la libera al terminar.
+        Si sheet_name es una lista, las hojas se cargan con load_sheets_to_database.
+        Si se indica content_hash, la carga guarda un punto de control después
+        de cada lote (ver ImportCheckpoint) y una copia del archivo, y al
+        completarse queda registrada para reconocer reenvíos del mismo archivo.
+        Con resume=True la carga continúa desde el punto de control guardado.
+        on_progress se invoca desde el hilo del trabajo con una copia del estado.
+        """
+        job_id = str(uuid4())
+        job = {
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            "filename": filename,
+            "sheet_name": sheet_name,
+            "rows_processed": 0,
+            "successful_inserts": 0,
+            "errors": 0,
+            "rows_per_second": 0.0,
+            "statistics": None,
+            "error_message": None,
+            "failed_sheets": [],
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "resumed": resume,
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+            self._prune_finished_jobs()
+
+        self._executor.submit(
+            self._run, job_id, file_path, sheet_name, filename, content_hash, on_progress, cache_key, resume
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna una copia del estado del trabajo, o None si no existe."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            self.jobs[job_id].update(fields)
+            return dict(self.jobs[job_id])
+
+    def _prune_finished_jobs(self):
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in (JOB_COMPLETED, JOB_PARTIAL, JOB_FAILED)
+        ]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _run(self, job_id, file_path, sheet_name, filename, content_hash, on_progress, cache_key, resume):
+        start = time.perf_counter()
+        last_notification = 0.0
+
+        def notify(job):
+            if on_progress:
+                try:
+                    on_progress(job)
+                except Exception as e:
+                    logger.error(f"Error notificando progreso del trabajo {job_id}: {str(e)}")
+
+        def report_progress(stats):
+            nonlocal last_notification
+            elapsed = time.perf_counter() - start
+            job = self._update(
+                job_id,
+                rows_processed=stats["total_rows"],
+                successful_inserts=stats["successful_inserts"],
+                errors=stats["errors"],
+                rows_per_second=round(stats["total_rows"] / elapsed, 1) if elapsed > 0 else 0.0
+            )
+            if elapsed - last_notification >= PROGRESS_INTERVAL_SECONDS:
+                last_notification = elapsed
+                notify(job)
+
+        notify(self._update(job_id, status=JOB_RUNNING, started_at=datetime.now().isoformat()))
+
+        db = SessionLocal()
+        checkpoint = None
+        source_path = None
+        try:
+            if content_hash:
+                source_path = persist_import_source(file_path, content_hash)
+                sheet_names = sheet_name if isinstance(sheet_name, list) else [sheet_name]
+                checkpoint = ImportCheckpoint.begin(
+                    db, content_hash, sheet_names, filename, source_path, job_id, resume=resume
+                )
+            
+            if isinstance(sheet_name, list):
+                parsed_sheets = None
+                if cache_key:
+                    done = checkpoint.completed_sheets() if checkpoint else {}
+                    parsed_sheets = {
+                        name: upload_cache.sheet_future(cache_key, name) for name in sheet_name if name not in done
+                    }
+                result = load_sheets_to_database(
+                    file_path, db, sheet_name, progress_callback=report_progress,
+                    parsed_sheets=parsed_sheets, checkpoint=checkpoint
+                )
+            elif cache_key:
+                # La hoja ya leída a Parquet se carga por la ruta de COPY
+                parsed = upload_cache.sheet_future(cache_key, sheet_name).result()
+                result = load_excel_to_database(
+                    parsed["path"] or file_path, db, sheet_name,
+                    progress_callback=report_progress, checkpoint=checkpoint
+                )
+                result["parse_seconds"] = parsed["parse_seconds"]
+                result["parse_timing"] = parsed["timing"]
+                result["parse_cached"] = parsed.get("cached", False)
+                if not result["parse_cached"]:
+                    ingestion_metrics.add_timing(parsed["timing"])
+            else:
+                result = load_excel_to_database(
+                    file_path, db, sheet_name, progress_callback=report_progress, checkpoint=checkpoint
+                )
+            
+            failed_sheets = [name for name, stats in result.get("sheets", {}).items() if stats["status"] == "failed"]
+            if checkpoint and failed_sheets:
+                # Las hojas fallidas quedan pendientes: la carga puede reanudarse
+                checkpoint.fail(db, f"Hojas con errores: {', '.join(failed_sheets)}")
+            elif content_hash:
+                sheet_label = ",".join(sheet_name) if isinstance(sheet_name, list) else sheet_name
+                record_completed_import(db, content_hash, sheet_label, filename, result)
+                if os.path.exists(source_path):
+                    os.remove(source_path)
+            elapsed = time.perf_counter() - start
+            job = self._update(
+                job_id,
+                status=JOB_PARTIAL if failed_sheets else JOB_COMPLETED,
+                failed_sheets=failed_sheets,
+                error_message=f"Hojas con errores: {', '.join(failed_sheets)}" if failed_sheets else None,
+                statistics=result,
+                rows_processed=result["total_rows"],
+                successful_inserts=result["successful_inserts"],
+                errors=result["errors"],
+                rows_per_second=round(result["total_rows"] / elapsed, 1) if elapsed > 0 else 0.0,
+                finished_at=datetime.now().isoformat()
+            )
+        except Exception as e:
+            logger.error(f"Error en el trabajo de carga {job_id}: {str(e)}")
+            if checkpoint:
+                try:
+                    checkpoint.fail(db, str(e))
+                except Exception as checkpoint_error:
+                    logger.error(f"Error guardando el estado de la carga {job_id}: {str(checkpoint_error)}")
+            job = self._update(
+                job_id,
+                status=JOB_FAILED,
+                error_message=str(e),
+                finished_at=datetime.now().isoformat()
+            )
+        finally:
+            db.close()
+            if cache_key:
+                upload_cache.release(cache_key)
+            elif file_path != source_path and os.path.exists(file_path):
+                # La copia para reanudar (source_path) se conserva si la carga no terminó
+                os.remove(file_path)
+            if checkpoint and not checkpoint.resumable and source_path and os.path.exists(source_path):
+                # Una recarga forzada que falla no se reanuda: su copia no hace falta
+                os.remove(source_path)
+
+        notify(job)
+
+
+# Instancia única compartida por las rutas de administración
+ingestion_jobs = IngestionJobManager(max_workers=settings.INGESTION_WORKERS)
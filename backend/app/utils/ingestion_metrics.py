@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Etapas de una carga, en el orden en que ocurren para cada bloque
+STAGES = ("read", "clean", "lookup", "write", "commit")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """
+    Memoria residente actual del proceso, en bytes.
+
+    En Linux se lee /proc/self/statm (lectura barata, apta para cada bloque);
+    en otros sistemas se usa psutil si está instalado. Si no hay forma de
+    medirla retorna 0.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+def _to_mb(value: int) -> float:
+    return round(value / (1024 * 1024), 1)
+
+
+class StageTimer:
+    """
+    Acumula tiempo, filas y memoria por etapa de una carga.
+
+    El tiempo de cada etapa es la suma de sus intervalos. La memoria es el
+    máximo de memoria residente del proceso observado al entrar y salir de la
+    etapa: no captura picos transitorios dentro de ella, y con cargas
+    simultáneas refleja todo el proceso. tracemalloc daría el pico exacto,
+    pero multiplica el tiempo de limpieza de pandas varias veces.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.stages = {
+            stage: {"seconds": 0.0, "rows": 0, "peak_memory_bytes": 0}
+            for stage in STAGES
+        }
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide el bloque with como parte de la etapa name."""
+        entry = self.stages[name]
+        memory = current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] += time.perf_counter() - start
+            entry["peak_memory_bytes"] = max(entry["peak_memory_bytes"], memory, current_rss_bytes())
+
+    def count(self, name: str, rows: int):
+        """Suma filas procesadas por la etapa name."""
+        self.stages[name]["rows"] += rows
+
+    def iterate(self, name: str, chunks: Iterable) -> Iterator:
+        """Recorre un iterador de bloques midiendo cada lectura como la etapa name."""
+        iterator = iter(chunks)
+        while True:
+            with self.stage(name):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            self.count(name, len(chunk))
+            yield chunk
+
+    def summary(self) -> dict:
+        """Tiempo total, filas por segundo y memoria por etapa, serializable a JSON."""
+        return summarize_stages(self.stages, time.perf_counter() - self._start)
+
+
+def render_metric(name: str, kind: str, help_text: str, samples) -> List[str]:
+    """
+    Líneas de una métrica en formato de texto de Prometheus.
+
+    samples es una lista de pares (etiquetas, valor), con las etiquetas como dict.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
+
+
+def summarize_stages(stages: Dict[str, dict], wall_seconds: float) -> dict:
+    """Convierte los acumulados por etapa en el resumen que se reporta."""
+    summary = {}
+    for name, entry in stages.items():
+        seconds = entry["seconds"]
+        summary[name] = {
+            "seconds": round(seconds, 3),
+            "rows": entry["rows"],
+            "rows_per_second": round(entry["rows"] / seconds, 1) if seconds > 0 else 0.0,
+            "peak_memory_mb": _to_mb(entry["peak_memory_bytes"]),
+        }
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "peak_memory_mb": max((entry["peak_memory_mb"] for entry in summary.values()), default=0.0),
+        "stages": summary,
+    }
+
+
+def merge_stage_summaries(summaries: List[dict], wall_seconds: float) -> dict:
+    """
+    Combina resúmenes de varias cargas (por ejemplo, varias hojas): suma
+    tiempos y filas por etapa y toma el máximo de memoria.
+    """
+    stages = {}
+    for summary in summaries:
+        for name, entry in summary.get("stages", {}).items():
+            total = stages.setdefault(name, {"seconds": 0.0, "rows": 0, "peak_memory_bytes": 0})
+            total["seconds"] += entry["seconds"]
+            total["rows"] += entry["rows"]
+            total["peak_memory_bytes"] = max(total["peak_memory_bytes"], int(entry["peak_memory_mb"] * 1024 * 1024))
+    return summarize_stages(stages, wall_seconds)
+
+
+class IngestionMetrics:
+    """
+    Métricas acumuladas de las cargas del proceso, en formato de texto de Prometheus.
+
+    Se exponen en /metrics: contadores de cargas, filas y segundos por etapa,
+    y la duración y memoria de la última carga.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loads: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.stage_rows = {stage: 0 for stage in STAGES}
+        self.last_wall_seconds = 0.0
+        self.last_peak_memory_mb = 0.0
+
+    def record(self, stats: dict, timing: Optional[dict] = None, status: str = "completed"):
+        """Registra una carga terminada con sus estadísticas y su resumen por etapa."""
+        with self._lock:
+            self.loads[status] = self.loads.get(status, 0) + 1
+            for key in ("total_rows", "inserted", "updated", "unchanged", "errors"):
+                self.rows[key] = self.rows.get(key, 0) + int(stats.get(key, 0))
+            if timing:
+                self.last_wall_seconds = timing["wall_seconds"]
+                self.last_peak_memory_mb = timing["peak_memory_mb"]
+        if timing:
+            self.add_timing(timing)
+
+    def add_timing(self, timing: dict):
+        """Suma los tiempos y filas por etapa de un resumen (por ejemplo, la lectura en otro proceso)."""
+        with self._lock:
+            for name, entry in timing["stages"].items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + entry["seconds"]
+                self.stage_rows[name] = self.stage_rows.get(name, 0) + entry["rows"]
+
+    def render(self) -> str:
+        """Texto en formato de exposición de Prometheus."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.extend(render_metric(name, kind, help_text, samples))
+
+        with self._lock:
+            metric("ingestion_loads_total", "counter", "Cargas terminadas por estado",
+                   [({"status": status}, count) for status, count in self.loads.items()])
+            metric("ingestion_rows_total", "counter", "Filas procesadas por resultado",
+                   [({"result": key}, count) for key, count in self.rows.items()])
+            metric("ingestion_stage_seconds_total", "counter", "Segundos acumulados por etapa",
+                   [({"stage": name}, round(value, 3)) for name, value in self.stage_seconds.items()])
+            metric("ingestion_stage_rows_total", "counter", "Filas acumuladas por etapa",
+                   [({"stage": name}, value) for name, value in self.stage_rows.items()])
+            metric("ingestion_last_wall_seconds", "gauge", "Duración de la última carga",
+                   [({}, self.last_wall_seconds)])
+            metric("ingestion_last_peak_memory_megabytes", "gauge", "Memoria máxima observada en la última carga",
+                   [({}, self.last_peak_memory_mb)])
+        return "\n".join(lines) + "\n"
+
+
+def log_ingestion(source: str, sheet_name: str, stats: dict, timing: dict):
+    """Registra el resumen de una carga como una línea JSON."""
+    record = {
+        "event": "ingestion_completed",
+        "source": os.path.basename(source),
+        "sheet": sheet_name,
+        "total_rows": stats.get("total_rows", 0),
+        "errors": stats.get("errors", 0),
+        **timing,
+    }
+    logger.info(json.dumps(record))
+
+
+# Instancia única del proceso, expuesta en /metrics
+ingestion_metrics = IngestionMetrics()
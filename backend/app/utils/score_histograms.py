@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.student_data import StudentData
+
+# Materias con puntaje: cada columna ptj_* de student_data, por su nombre sin el prefijo
+SCORE_COLUMNS = {
+    column.name[len("ptj_"):]: column.name
+    for column in StudentData.__table__.columns
+    if column.name.startswith("ptj_")
+}
+
+# Nombres abreviados que ya aceptaba /analytics/icfes-distribution
+SUBJECT_ALIASES = {"sociales": "ciencias_sociales"}
+
+# Materias por defecto del histograma (las del reporte original de distribución)
+DEFAULT_SUBJECTS = ("matematicas", "lectura_critica", "ingles", "ciencias_naturales", "ciencias_sociales")
+
+# Columnas por las que se puede agrupar el histograma
+GROUP_COLUMNS = ("programa", "estrato")
+
+MAX_EDGES = 101
+
+
+def resolve_subjects(subjects: Sequence[str]) -> List[str]:
+    """
+    Normaliza nombres de materias (con o sin prefijo ptj_, o abreviados) y
+    valida que existan; conserva el orden y descarta repetidos.
+    """
+    resolved = []
+    for subject in subjects:
+        name = subject.strip().lower()
+        if name.startswith("ptj_"):
+            name = name[len("ptj_"):]
+        name = SUBJECT_ALIASES.get(name, name)
+        if name not in SCORE_COLUMNS:
+            raise ValueError(f"Materia no válida: {subject}")
+        if name not in resolved:
+            resolved.append(name)
+    if not resolved:
+        raise ValueError("Debe indicar al menos una materia")
+    return resolved
+
+
+def validate_edges(edges: Sequence[float]) -> List[float]:
+    """Los bordes deben ser al menos dos, estrictamente crecientes y no más de MAX_EDGES."""
+    try:
+        edges = [float(edge) for edge in edges]
+    except (TypeError, ValueError):
+        raise ValueError("Los bordes deben ser números")
+    if len(edges) < 2 or len(edges) > MAX_EDGES:
+        raise ValueError(f"Se requieren entre 2 y {MAX_EDGES} bordes")
+    if any(left >= right for left, right in zip(edges, edges[1:])):
+        raise ValueError("Los bordes deben ser estrictamente crecientes")
+    return edges
+
+
+def compute_score_histograms(
+    db: Session,
+    subjects: Sequence[str],
+    edges: Sequence[float],
+    group_by: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Histogramas de puntaje de varias materias en una sola lectura de student_data.
+
+    Por cada materia se calcula width_bucket(puntaje, bordes), que ubica el
+    puntaje entre los bordes: el intervalo i es [edges[i], edges[i + 1]).
+    Un GROUPING SETS con un conjunto por materia cuenta todos los
+    histogramas en la misma pasada, sin multiplicar filas. Los puntajes
+    menores al primer borde o mayores o iguales al último se cuentan aparte;
+    los nulos no se cuentan.
+
+    Args:
+        db: Sesión de base de datos
+        subjects: Materias ya validadas (ver resolve_subjects)
+        edges: Bordes ya validados (ver validate_edges)
+        group_by: None, "programa" o "estrato"
+
+    Returns:
+        list: Un histograma por materia (y grupo), con materia, grupo,
+            conteos por intervalo, bajo_rango, sobre_rango y total
+    """
+    if group_by is not None and group_by not in GROUP_COLUMNS:
+        raise ValueError(f"Solo se puede agrupar por: {', '.join(GROUP_COLUMNS)}")
+
+    # Los nombres de columna salen de SCORE_COLUMNS y GROUP_COLUMNS, nunca de la petición
+    buckets = [f"bucket_{index}" for index in range(len(subjects))]
+    bucket_select = ", ".join(
+        f"width_bucket({SCORE_COLUMNS[subject]}, CAST(:edges AS double precision[])) AS {bucket}"
+        for subject, bucket in zip(subjects, buckets)
+    )
+    group_select = f"{group_by} AS grp" if group_by else "NULL AS grp"
+    grouping_sets = ", ".join(f"(grp, {bucket})" for bucket in buckets)
+    rows = db.execute(text(f"""
+        SELECT {", ".join(f"GROUPING({bucket})" for bucket in buckets)}, grp, {", ".join(buckets)}, count(*)
+        FROM (SELECT {group_select}, {bucket_select} FROM student_data) AS scores
+        GROUP BY GROUPING SETS ({grouping_sets})
+    """), {"edges": list(edges)}).all()
+
+    bins = len(edges) - 1
+
+    def empty_histogram(subject, group):
+        return {
+            "materia": subject,
+            "grupo": group,
+            "conteos": [0] * bins,
+            "bajo_rango": 0,
+            "sobre_rango": 0,
+            "total": 0,
+        }
+
+    # Sin agrupar, toda materia pedida tiene su histograma aunque no tenga puntajes
+    histograms: Dict[tuple, Dict[str, Any]] = (
+        {} if group_by else {(subject, None): empty_histogram(subject, None) for subject in subjects}
+    )
+    count_subjects = len(subjects)
+    for row in rows:
+        # Cada fila pertenece al conjunto de la única materia con GROUPING() = 0
+        index = list(row[:count_subjects]).index(0)
+        subject, group = subjects[index], row[count_subjects]
+        bucket, count = row[count_subjects + 1 + index], row[-1]
+        if bucket is None:
+            # Puntaje nulo
+            continue
+        histogram = histograms.get((subject, group))
+        if histogram is None:
+            histogram = histograms[(subject, group)] = empty_histogram(subject, group)
+        if bucket == 0:
+            histogram["bajo_rango"] += count
+        elif bucket > bins:
+            histogram["sobre_rango"] += count
+        else:
+            histogram["conteos"][bucket - 1] += count
+        histogram["total"] += count
+
+    order = {subject: index for index, subject in enumerate(subjects)}
+    return sorted(
+        histograms.values(),
+        key=lambda item: (order[item["materia"]], item["grupo"] is None, item["grupo"] if item["grupo"] is not None else 0)
+    )
@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+class DataVersion:
+    """
+    Contador de versión de los datos de estudiantes.
+
+    Las escrituras que cambian lo que muestran los dashboards (cargas de
+    Excel, registros, validaciones) llaman a bump después de confirmar la
+    transacción; los resultados en caché calculados con una versión anterior
+    dejan de servirse.
+
+    El contador vive en memoria del proceso: con varios procesos del
+    servidor, las escrituras hechas en otro proceso solo se ven cuando vence
+    el TTL de la caché.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class VersionedCache:
+    """
+    Caché en memoria de resultados costosos, válidos mientras no cambie la
+    versión de los datos y no venza el TTL.
+
+    El TTL es un respaldo para escrituras que no incrementan la versión. Si
+    varias peticiones piden a la vez una entrada vencida, solo una la calcula
+    y las demás esperan su resultado. Los resultados se comparten entre
+    peticiones y no deben modificarse. Con max_entries, al guardar una
+    entrada nueva se descartan las calculadas hace más tiempo.
+
+    Es segura entre hilos: las entradas y los contadores se leen y modifican
+    bajo _lock, y el cálculo de cada clave se serializa con su propio lock.
+    """
+
+    def __init__(self, version: DataVersion, ttl_seconds: float, max_entries: Optional[int] = None):
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada vigente de key, contada como acierto, o None. No se llama con _lock tomado."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry["version"] != self.version.value:
+                return None
+            if time.monotonic() - entry["computed_at"] > self.ttl_seconds:
+                return None
+            self.hits += 1
+            return entry
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Retorna el valor en caché de key o lo calcula con compute y lo guarda."""
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry["value"]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Otra petición pudo calcularlo mientras se esperaba el lock
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry["value"]
+            with self._lock:
+                self.misses += 1
+            # La versión se lee antes de calcular: si cambia durante el cálculo,
+            # el resultado queda asociado a la versión anterior y no se reutiliza
+            version = self.version.value
+            value = compute()
+            with self._lock:
+                self.entries.pop(key, None)
+                self.entries[key] = {"value": value, "version": version, "computed_at": time.monotonic()}
+                if self.max_entries is not None:
+                    while len(self.entries) > self.max_entries:
+                        oldest = next(iter(self.entries))
+                        del self.entries[oldest]
+                        self._key_locks.pop(oldest, None)
+            return value
+
+    def peek(self, key: str) -> Any:
+        """Retorna el valor en caché de key si sigue vigente, o None, sin calcularlo."""
+        entry = self._fresh(key)
+        return None if entry is None else entry["value"]
+
+    def invalidate(self, key: Optional[str] = None):
+        """Descarta una entrada, o todas si key es None."""
+        with self._lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+# Versión de los datos de estudiantes, compartida por quienes escriben y quienes leen
+data_version = DataVersion()
+
+# Caché de las estadísticas del dashboard de administración
+dashboard_cache = VersionedCache(data_version, ttl_seconds=settings.DASHBOARD_STATS_TTL_SECONDS)
+
+# Caché de las analíticas parametrizadas (histogramas, cubos); la clave incluye los parámetros
+analytics_cache = VersionedCache(data_version, ttl_seconds=settings.DASHBOARD_STATS_TTL_SECONDS, max_entries=256)
@@ -0,0 +1,260 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.config import settings
+from app.utils.excel_loader import hash_file_content, parse_sheet_to_parquet
+from app.utils.excel_reader import list_sheet_names, read_workbook_metadata
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de los subdirectorios de cada proceso dentro de UPLOAD_CACHE_DIR
+PROCESS_DIR_PREFIX = "proc-"
+
+
+class UploadCache:
+    """
+    Caché en disco de archivos Excel subidos y de sus hojas ya leídas.
+
+    La clave es el hash sha256 del contenido del archivo, así que
+    /excel-sheets y /upload-excel comparten la entrada cuando reciben el
+    mismo archivo. Cada entrada guarda el archivo original, los metadatos de
+    sus hojas y un Parquet por hoja leída (el mismo que produce
+    parse_sheet_to_parquet), de modo que una carga posterior no vuelve a
+    leer el Excel.
+
+    Las hojas se leen en un pool de procesos propio. Las entradas vencen
+    tras ttl_seconds sin uso, y cuando el tamaño total supera max_bytes se
+    eliminan las de uso más antiguo. Las entradas en uso (una carga en curso
+    o una hoja leyéndose) no se eliminan.
+
+    El índice vive en memoria y no se comparte entre procesos del servidor:
+    cada proceso crea su propio subdirectorio dentro de directory. Los subdirectorios de otros procesos solo se eliminan si llevan
+    más de ttl_seconds sin usarse (el de cada proceso se marca en cada
+    acceso), así un proceso que arranca no borra las entradas de los demás.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: int, max_processes: int):
+        self.root = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_processes = max_processes
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.directory = os.path.join(directory, f"{PROCESS_DIR_PREFIX}{os.getpid()}-{uuid4().hex[:8]}")
+        os.makedirs(os.path.join(self.directory, "incoming"), exist_ok=True)
+        self._remove_abandoned_directories()
+
+    def _remove_abandoned_directories(self):
+        """Elimina los subdirectorios de procesos que llevan más de ttl_seconds sin usar la caché."""
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path == self.directory or not os.path.isdir(path):
+                continue
+            try:
+                abandoned = now - os.path.getmtime(path) > self.ttl_seconds
+            except OSError:
+                continue
+            if abandoned:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _touch(self):
+        """Marca el subdirectorio del proceso como en uso (ver _remove_abandoned_directories)."""
+        try:
+            os.utime(self.directory)
+        except OSError:
+            pass
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # spawn: el proceso padre tiene hilos (servidor, pool de conexiones) y fork no es seguro
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=context)
+            return self._pool
+
+    def store(self, source, ext: str, pin: bool = False) -> Dict[str, Any]:
+        """
+        Guarda un archivo subido y retorna su entrada.
+
+        El archivo se copia a disco calculando el hash en la misma lectura; si
+        el contenido ya estaba en caché, la copia se descarta. Con pin=True la
+        entrada queda en uso (como con acquire) y debe liberarse con release.
+
+        Returns:
+            dict: key (hash del contenido), path (archivo en caché), digest
+                (objeto sha256, para derivar otros hashes) y hit (ya estaba)
+        """
+        incoming = os.path.join(self.directory, "incoming", f"{uuid4()}{ext}")
+        try:
+            with open(incoming, "wb") as buffer:
+                digest = hash_file_content(source, copy_to=buffer)
+        except Exception:
+            os.remove(incoming)
+            raise
+
+        key = digest.hexdigest()
+        with self._lock:
+            entry = self.entries.get(key)
+            hit = entry is not None
+            if hit:
+                os.remove(incoming)
+            else:
+                entry_dir = os.path.join(self.directory, key)
+                os.makedirs(entry_dir, exist_ok=True)
+                path = os.path.join(entry_dir, f"source{ext}")
+                os.replace(incoming, path)
+                entry = {
+                    "dir": entry_dir,
+                    "path": path,
+                    "size": os.path.getsize(path),
+                    "last_access": time.monotonic(),
+                    "pins": 0,
+                    "sheet_details": None,
+                    "sheets": {},
+                }
+                self.entries[key] = entry
+            entry["last_access"] = time.monotonic()
+            self._touch()
+            if pin:
+                entry["pins"] += 1
+            path = entry["path"]
+        self._evict(keep=key)
+        return {"key": key, "path": path, "digest": digest, "hit": hit}
+
+    def _get_entry(self, key: str) -> Dict[str, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            raise KeyError(f"La entrada {key} no está en la caché de cargas")
+        entry["last_access"] = time.monotonic()
+        self._touch()
+        return entry
+
+    def sheet_details(self, key: str) -> List[Dict[str, Any]]:
+        """Hojas del libro con filas y columnas declaradas; se leen una sola vez por archivo."""
+        with self._lock:
+            entry = self._get_entry(key)
+            details = entry["sheet_details"]
+            path = entry["path"]
+        if details is None:
+            if path.endswith(".xls"):
+                details = [
+                    {"name": name, "rows": None, "columns": None, "state": "visible"}
+                    for name in list_sheet_names(path)
+                ]
+            else:
+                with open(path, "rb") as f:
+                    details = read_workbook_metadata(f)
+            with self._lock:
+                entry["sheet_details"] = details
+        return details
+
+    def sheet_future(self, key: str, sheet_name: str) -> Future:
+        """
+        Retorna la lectura de una hoja a Parquet como un Future.
+
+        Si la hoja ya está en caché, el Future está resuelto y su resultado
+        lleva cached=True; si se está leyendo, es la misma lectura en curso;
+        si no, la lectura se encola en el pool de procesos.
+        """
+        if sheet_name not in [sheet["name"] for sheet in self.sheet_details(key)]:
+            raise ValueError(f"La hoja '{sheet_name}' no existe en el archivo Excel")
+
+        pool = self._get_pool()
+        with self._lock:
+            entry = self._get_entry(key)
+            future = entry["sheets"].get(sheet_name)
+            if future is not None:
+                if future.done() and not future.exception():
+                    cached = Future()
+                    cached.set_result({**future.result(), "cached": True})
+                    return cached
+                if not future.done():
+                    return future
+            file_name = f"sheet_{hashlib.sha1(sheet_name.encode('utf-8')).hexdigest()[:16]}.parquet"
+            output_path = os.path.join(entry["dir"], file_name)
+            entry["pins"] += 1
+            future = pool.submit(parse_sheet_to_parquet, entry["path"], sheet_name, output_path)
+            entry["sheets"][sheet_name] = future
+        # Fuera del lock: si la lectura ya terminó, el callback corre de inmediato
+        future.add_done_callback(lambda done: self._sheet_parsed(key, sheet_name, done))
+        return future
+
+    def _sheet_parsed(self, key: str, sheet_name: str, future: Future):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            entry["pins"] -= 1
+            if future.exception():
+                # Una lectura fallida no queda en caché: el siguiente intento la repite
+                entry["sheets"].pop(sheet_name, None)
+                return
+            path = future.result()["path"]
+            if path and os.path.exists(path):
+                entry["size"] += os.path.getsize(path)
+        self._evict()
+
+    def prewarm(self, key: str, sheet_names: List[str]):
+        """Encola la lectura de varias hojas sin esperar el resultado."""
+        for sheet_name in sheet_names:
+            try:
+                self.sheet_future(key, sheet_name)
+            except Exception as e:
+                logger.error(f"Error encolando la lectura de la hoja '{sheet_name}': {str(e)}")
+
+    def acquire(self, key: str):
+        """Marca la entrada como en uso: no se elimina hasta llamar release."""
+        with self._lock:
+            self._get_entry(key)["pins"] += 1
+
+    def release(self, key: str):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["pins"] -= 1
+                entry["last_access"] = time.monotonic()
+        self._touch()
+        self._evict()
+
+    def _evict(self, keep: Optional[str] = None):
+        """
+        Elimina las entradas vencidas y, si se excede el tamaño, las de uso más
+        antiguo. keep es una entrada recién guardada, que nunca se elimina aquí.
+        """
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+            idle = sorted(
+                (key for key, entry in self.entries.items() if entry["pins"] == 0 and key != keep),
+                key=lambda key: self.entries[key]["last_access"]
+            )
+            total = sum(entry["size"] for entry in self.entries.values())
+            for key in idle:
+                expired = now - self.entries[key]["last_access"] > self.ttl_seconds
+                if not expired and total <= self.max_bytes:
+                    break
+                entry = self.entries.pop(key)
+                total -= entry["size"]
+                removed.append(entry["dir"])
+        for entry_dir in removed:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+# Instancia única compartida por las rutas de administración y los trabajos de carga
+upload_cache = UploadCache(
+    directory=settings.UPLOAD_CACHE_DIR,
+    max_bytes=settings.UPLOAD_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.UPLOAD_CACHE_TTL_SECONDS,
+    max_processes=settings.INGESTION_PROCESSES
+)
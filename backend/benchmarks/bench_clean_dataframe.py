@@ -0,0 +1,160 @@
+"""
+Benchmark de clean_dataframe sobre una hoja sintética.
+
+Compara la limpieza basada en COLUMN_SCHEMA con la implementación anterior
+(listas de columnas convertidas una por una), etapa por etapa.
+Ejecutar desde la carpeta backend con:
+    python -m benchmarks.bench_clean_dataframe --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.excel_loader import COLUMN_CONVERTERS, COLUMN_SCHEMA, clean_dataframe
+
+
+# --- Implementación anterior, separada por etapas para poder medirlas ---
+
+LEGACY_DATE_COLUMNS = ['fecha_exp_doc', 'fecha_nacimiento', 'fecha_graduacion']
+LEGACY_BOOLEAN_COLUMNS = ['icfes_antes_del_2000']
+LEGACY_INT_COLUMNS = [col for col, kind in COLUMN_SCHEMA.items() if kind == 'int']
+LEGACY_FLOAT_COLUMNS = [col for col, kind in COLUMN_SCHEMA.items() if kind == 'float']
+LEGACY_STRING_COLUMNS = [col for col, kind in COLUMN_SCHEMA.items() if kind == 'string']
+
+
+def legacy_dates(df):
+    for col in LEGACY_DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def legacy_bools(df):
+    for col in LEGACY_BOOLEAN_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(bool, errors='ignore')
+    return df
+
+
+def legacy_ints(df):
+    for col in LEGACY_INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    return df
+
+
+def legacy_floats(df):
+    for col in LEGACY_FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def legacy_strings(df):
+    for col in LEGACY_STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+            df[col] = df[col].replace('nan', None)
+    return df
+
+
+def legacy_nulls(df):
+    return df.where(pd.notna(df), None)
+
+
+LEGACY_STAGES = [
+    ('date', legacy_dates),
+    ('bool', legacy_bools),
+    ('int', legacy_ints),
+    ('float', legacy_floats),
+    ('string', legacy_strings),
+    ('nulls', legacy_nulls),
+]
+
+
+# --- Datos sintéticos ---
+
+def build_sheet(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Genera una hoja ya renombrada con los tipos que produce la lectura del Excel."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, kind in COLUMN_SCHEMA.items():
+        missing = rng.random(rows) < 0.1
+        if kind == 'string':
+            values = np.char.add(f"{col[:4]}_", rng.integers(0, 500, rows).astype(str)).astype(object)
+            values[missing] = None
+        elif kind == 'int':
+            values = rng.integers(0, 200, rows).astype(float)
+            values[missing] = np.nan
+        elif kind == 'float':
+            values = rng.uniform(0, 100, rows).round(2)
+            values[missing] = np.nan
+        elif kind == 'date':
+            values = pd.Series(
+                pd.to_datetime('1995-01-01') + pd.to_timedelta(rng.integers(0, 9000, rows), unit='D')
+            ).where(~missing)
+        else:
+            values = rng.choice(np.array([True, False, None], dtype=object), rows)
+        data[col] = values
+    data['id'] = np.array([f"T{i:08d}" for i in range(rows)], dtype=object)
+    return pd.DataFrame(data)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sheet = build_sheet(args.rows)
+    print(f"Hoja sintética: {args.rows} filas x {sheet.shape[1]} columnas")
+
+    legacy_times = {name: [] for name, _ in LEGACY_STAGES}
+    schema_times = {kind: [] for kind in COLUMN_CONVERTERS}
+    legacy_total, schema_total = [], []
+
+    for _ in range(args.repeat):
+        df = sheet.copy()
+        start = time.perf_counter()
+        for name, stage in LEGACY_STAGES:
+            df, elapsed = timed(stage, df)
+            legacy_times[name].append(elapsed)
+        legacy_total.append(time.perf_counter() - start)
+        legacy_result = df
+
+        for kind, converter in COLUMN_CONVERTERS.items():
+            columns = [col for col, col_kind in COLUMN_SCHEMA.items() if col_kind == kind]
+            start = time.perf_counter()
+            for col in columns:
+                converter(sheet[col])
+            schema_times[kind].append(time.perf_counter() - start)
+
+        schema_result, elapsed = timed(clean_dataframe, sheet)
+        schema_total.append(elapsed)
+
+    print("\nEtapa     | anterior (s) | esquema (s)")
+    print("----------|--------------|------------")
+    for name in ['date', 'bool', 'int', 'float', 'string', 'nulls']:
+        legacy = min(legacy_times[name])
+        schema = f"{min(schema_times[name]):12.4f}" if name in schema_times else "           -"
+        print(f"{name:<9} | {legacy:12.4f} | {schema}")
+    print(f"{'total':<9} | {min(legacy_total):12.4f} | {min(schema_total):12.4f}")
+
+    legacy_memory = legacy_result.memory_usage(deep=True).sum() / 1024 ** 2
+    schema_memory = schema_result.memory_usage(deep=True).sum() / 1024 ** 2
+    object_columns = (legacy_result.dtypes == object).sum()
+    print(f"\nMemoria del resultado: anterior {legacy_memory:.1f} MB "
+          f"({object_columns} columnas object), esquema {schema_memory:.1f} MB")
+    print(f"Aceleración total: {min(legacy_total) / min(schema_total):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
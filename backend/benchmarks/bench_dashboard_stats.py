@@ -0,0 +1,139 @@
+"""
+Benchmark de las estadísticas del dashboard contra la base de datos configurada.
+
+Compara la consulta única con GROUPING SETS con la implementación anterior
+(diez consultas por separado), verifica que ambas entregan lo mismo y mide
+también la lectura desde la caché por versión de datos.
+Para poblar la base con 200.000 estudiantes, desde la carpeta backend:
+    python -m benchmarks.synthetic_data --students 200000 --database --registered 0.3 --id-prefix BENCH
+    python -m benchmarks.bench_dashboard_stats --repeat 10
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, event, func
+
+from app.database import SessionLocal, engine
+from app.models.models import User, UserRole
+from app.models.student_data import StudentData
+from app.routes.admin import compute_dashboard_stats, get_dashboard_stats_data
+
+
+# --- Implementación anterior, una consulta por indicador ---
+
+def legacy_dashboard_stats(db):
+    total_students = db.query(User).filter(User.role == UserRole.STUDENT).count()
+    active_students = db.query(User).filter(
+        and_(User.role == UserRole.STUDENT, User.is_active == True)
+    ).count()
+    validated_students = db.query(User).filter(
+        and_(User.role == UserRole.STUDENT, User.data_validated == True)
+    ).count()
+
+    avg_gpa_result = db.query(func.avg(StudentData.pga_acumulado)).filter(
+        StudentData.pga_acumulado.isnot(None)
+    ).scalar()
+    avg_icfes_result = db.query(func.avg(StudentData.ptj_matematicas)).filter(
+        StudentData.ptj_matematicas.isnot(None)
+    ).scalar()
+
+    breakdowns = []
+    for column in (StudentData.programa, StudentData.situacion, StudentData.estrato):
+        breakdowns.append(dict(db.query(column, func.count(User.id)).join(
+            User, User.student_data_id == StudentData.id
+        ).filter(column.isnot(None)).group_by(column).all()))
+
+    week_ago = datetime.now() - timedelta(days=7)
+    recent_registrations = db.query(User).filter(
+        and_(User.role == UserRole.STUDENT, User.created_at >= week_ago)
+    ).count()
+    dropout_risk_students = db.query(User).join(
+        StudentData, User.student_data_id == StudentData.id
+    ).filter(
+        and_(User.role == UserRole.STUDENT, StudentData.pga_acumulado < 3.0)
+    ).count()
+
+    return {
+        "total_students": total_students,
+        "active_students": active_students,
+        "validated_students": validated_students,
+        "pending_validation": total_students - validated_students,
+        "average_gpa": round(avg_gpa_result, 2) if avg_gpa_result else 0.0,
+        "average_icfes": round(avg_icfes_result, 2) if avg_icfes_result else 0.0,
+        "students_by_program": breakdowns[0],
+        "students_by_situation": breakdowns[1],
+        "students_by_stratum": {f"Estrato {estrato}": count for estrato, count in breakdowns[2].items()},
+        "recent_registrations": recent_registrations,
+        "dropout_risk_students": dropout_risk_students,
+    }
+
+
+class QueryCounter:
+    """Cuenta las sentencias que el motor envía a la base de datos."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def measure(func, db, counter, repeat):
+    times = []
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        result = func(db)
+        times.append(time.perf_counter() - start)
+        db.rollback()
+    # Sin modificar el resultado: el de la caché es compartido
+    result = {key: value for key, value in result.items() if key != "last_updated"}
+    return result, times, counter.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    db = SessionLocal()
+    try:
+        students = db.query(func.count(StudentData.id)).scalar()
+        users = db.query(func.count(User.id)).scalar()
+        print(f"Base de datos: {students} registros en student_data, {users} usuarios")
+
+        # Una ejecución previa de cada una para que ambas partan con la caché caliente
+        legacy_dashboard_stats(db)
+        compute_dashboard_stats(db)
+        db.rollback()
+
+        legacy_result, legacy_times, legacy_queries = measure(legacy_dashboard_stats, db, counter, args.repeat)
+        single_result, single_times, single_queries = measure(compute_dashboard_stats, db, counter, args.repeat)
+        get_dashboard_stats_data(db)
+        _, cached_times, cached_queries = measure(get_dashboard_stats_data, db, counter, args.repeat)
+    finally:
+        db.close()
+
+    print("\nImplementación | consultas | mediana (ms) | p95 (ms)")
+    print("---------------|-----------|--------------|---------")
+    for name, times, queries in (
+        ("anterior", legacy_times, legacy_queries),
+        ("una consulta", single_times, single_queries),
+        ("en caché", cached_times, cached_queries),
+    ):
+        ordered = sorted(times)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"{name:<14} | {queries:9d} | {statistics.median(times) * 1000:12.3f} | {p95 * 1000:8.3f}")
+
+    print(f"\nAceleración (mediana): {statistics.median(legacy_times) / statistics.median(single_times):.1f}x")
+    if legacy_result != single_result:
+        raise SystemExit(f"Los resultados difieren:\nanterior: {legacy_result}\nuna consulta: {single_result}")
+    print("Ambas implementaciones entregan el mismo resultado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+"""
+Generador de datos sintéticos a gran escala para pruebas de carga.
+
+Produce estudiantes con distribuciones realistas: puntajes ICFES y PGA
+correlacionados a través de una habilidad latente, estratos, programas con
+pesos distintos, materias reprobadas y situación académica que dependen del
+PGA. Opcionalmente genera también usuarios registrados, respuestas a
+encuestas, notificaciones y tickets de soporte.
+
+Los estudiantes pueden escribirse a un archivo (.xlsx, .csv o .parquet) con
+los encabezados del Excel institucional, listo para /api/admin/upload-excel,
+y/o directamente en la base de datos con COPY. Todo se genera por bloques,
+así que 2M de estudiantes no requieren tener el conjunto completo en memoria.
+
+Ejecutar desde la carpeta backend, por ejemplo:
+    python -m benchmarks.synthetic_data --students 200000 --output /tmp/estudiantes.csv
+    python -m benchmarks.synthetic_data --students 1000000 --database --replace
+"""
+import argparse
+import io
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.excel_reader import COLUMN_MAPPING
+
+
+# --- Distribuciones ---
+
+# Programas y su peso relativo en la matrícula
+PROGRAMS = {
+    "Ingenieria de Sistemas": 0.14,
+    "Ingenieria Industrial": 0.10,
+    "Ingenieria Civil": 0.08,
+    "Ingenieria Electronica": 0.05,
+    "Medicina": 0.09,
+    "Enfermeria": 0.06,
+    "Psicologia": 0.09,
+    "Derecho": 0.10,
+    "Administracion de Empresas": 0.11,
+    "Contaduria Publica": 0.07,
+    "Arquitectura": 0.05,
+    "Comunicacion Social": 0.06,
+}
+
+# Ciudad -> departamento
+CITIES = {
+    "Cartagena": "Bolivar",
+    "Barranquilla": "Atlantico",
+    "Bogota": "Cundinamarca",
+    "Medellin": "Antioquia",
+    "Sincelejo": "Sucre",
+    "Monteria": "Cordoba",
+    "Santa Marta": "Magdalena",
+    "Valledupar": "Cesar",
+    "Magangue": "Bolivar",
+    "Turbaco": "Bolivar",
+}
+CITY_WEIGHTS = [0.45, 0.12, 0.06, 0.04, 0.08, 0.07, 0.06, 0.04, 0.04, 0.04]
+
+# Estrato socioeconómico 1..6
+STRATUM_WEIGHTS = [0.22, 0.31, 0.25, 0.12, 0.06, 0.04]
+
+ICFES_SUBJECTS = [
+    'Ptj_fisica', 'Ptj_quimica', 'Ptj_geografia', 'Ptj_ciencias_sociales',
+    'Ptj_sociales_ciudadano', 'Ptj_ciencias_naturales', 'Ptj_biologia',
+    'Ptj_filosofia', 'Ptj_lenguaje', 'Ptj_lectura_critica', 'Ptj_ingles',
+    'Ptj_historia', 'Ptj_matematicas',
+]
+
+# Periodos académicos, del más antiguo al más reciente
+PERIODS = ['201910', '201930', '202010', '202030', '202110', '202130',
+           '202210', '202230', '202310', '202330', '202410', '202430']
+
+# Columnas que a veces vienen vacías en el Excel real
+OPTIONAL_COLUMNS = ['Ciudad2', 'Direccion', 'Ecaes', 'Becas', 'Ceres', 'Fecha_exp_doc', 'Expedida_en']
+
+# Máximo de filas de una hoja de Excel, sin contar el encabezado
+XLSX_MAX_ROWS = 1_048_575
+
+NOTIFICATION_TYPES = ["info", "warning", "success"]
+NOTIFICATION_MESSAGES = [
+    "Tienes una nueva encuesta disponible",
+    "Recuerda validar tus datos académicos",
+    "Tu solicitud de soporte fue actualizada",
+    "Se publicaron las notas del corte",
+    "Has completado la encuesta",
+]
+TICKET_ISSUES = ["academico", "tecnico", "financiero", "otro"]
+TICKET_PRIORITIES = ["baja", "media", "alta"]
+TICKET_STATUSES = ["abierto", "en_proceso", "cerrado"]
+OPEN_ANSWERS = [
+    "Me siento bien con la carrera",
+    "Tengo dificultades económicas",
+    "Me cuesta organizar el tiempo",
+    "Necesito apoyo en matemáticas",
+    "Trabajo y estudio al mismo tiempo",
+]
+
+# Encuestas que se crean si la base de datos no tiene ninguna
+DEFAULT_SURVEYS = [
+    ("Caracterización socioeconómica", 8),
+    ("Bienestar y salud mental", 6),
+    ("Motivación y expectativas académicas", 6),
+]
+LIKERT_OPTIONS = ["Totalmente en desacuerdo", "En desacuerdo", "De acuerdo", "Totalmente de acuerdo"]
+
+
+def _numbered(prefix: str, numbers: np.ndarray, width: int = 0) -> np.ndarray:
+    """Concatena un prefijo con números (con ceros a la izquierda si width > 0), vectorizado."""
+    text = numbers.astype(str)
+    if width:
+        text = np.char.zfill(text, width)
+    return np.char.add(prefix, text).astype(object)
+
+
+def _with_missing(values, rng: np.random.Generator, rate: float):
+    """Reemplaza una fracción aleatoria de valores por nulos."""
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < rate)
+
+
+def generate_students(start: int, count: int, rng: np.random.Generator, id_prefix: str, period: str) -> pd.DataFrame:
+    """
+    Genera un bloque de estudiantes con los encabezados del Excel institucional.
+
+    Los IDs son consecutivos a partir de start, con el prefijo id_prefix.
+    """
+    numbers = np.arange(start, start + count)
+    cities = np.array(list(CITIES))
+    departments = np.array([CITIES[city] for city in cities])
+    programs = np.array(list(PROGRAMS))
+    program_weights = np.array(list(PROGRAMS.values()))
+    program_weights = program_weights / program_weights.sum()
+
+    program_index = rng.choice(len(programs), count, p=program_weights)
+    city_index = rng.choice(len(cities), count, p=CITY_WEIGHTS)
+    school_city_index = np.where(rng.random(count) < 0.8, city_index, rng.choice(len(cities), count, p=CITY_WEIGHTS))
+    stratum = rng.choice(np.arange(1, 7), count, p=STRATUM_WEIGHTS)
+
+    # Habilidad latente: correlaciona los puntajes ICFES entre sí y con el PGA
+    ability = rng.standard_normal(count) + 0.12 * (stratum - 2.5)
+
+    birth = pd.Timestamp('1996-01-01') + pd.to_timedelta(rng.integers(0, 365 * 11, count), unit='D')
+    graduation = birth + pd.to_timedelta(rng.integers(365 * 16, 365 * 18, count), unit='D')
+    document_date = birth + pd.to_timedelta(rng.integers(365 * 18, 365 * 19, count), unit='D')
+    period_index = rng.integers(0, len(PERIODS), count)
+    semesters = np.clip(len(PERIODS) - period_index, 1, 10)
+
+    pga = np.clip(3.45 + 0.45 * ability + 0.35 * rng.standard_normal(count), 0.0, 5.0).round(2)
+    fail_probability = np.clip(0.35 - 0.09 * pga, 0.01, 0.6)
+    courses_taken = semesters * 6
+    courses_failed = rng.binomial(courses_taken, fail_probability)
+    credits_attempted = semesters * rng.integers(15, 19, count)
+    credits_earned = np.round(credits_attempted * (1 - fail_probability * rng.uniform(0.5, 1.5, count))).astype(int)
+    credits_earned = np.clip(credits_earned, 0, credits_attempted)
+    credits_enrolled = rng.integers(12, 21, count)
+    period_average = np.clip(pga + 0.4 * rng.standard_normal(count), 0.0, 5.0).round(2)
+    period_failed = rng.binomial(6, fail_probability)
+
+    # Situación académica según el PGA
+    situation = np.where(
+        pga < 2.8, "Prueba academica",
+        np.where(rng.random(count) < 0.04, "Retirado", "Activo")
+    ).astype(object)
+    status_code = np.where(situation == "Retirado", "R", "A").astype(object)
+    student_type = np.where(
+        semesters == 1, "Nuevo",
+        rng.choice(np.array(["Continuo", "Transferencia", "Reintegro"]), count, p=[0.9, 0.06, 0.04])
+    ).astype(object)
+
+    school_code = rng.integers(1000, 9999, count)
+    data = {
+        'Id': _numbered(id_prefix, numbers, 8),
+        'Codigo_antiguo': _numbered("EST", numbers, 8),
+        'Periodo_catalogo': np.array(PERIODS, dtype=object)[period_index],
+        'Programa': programs[program_index].astype(object),
+        'Snies': _numbered("SNIES", 1000 + program_index),
+        'Pensum': _numbered("P", 2015 + program_index % 8),
+        'Expedida_en': cities[city_index].astype(object),
+        'Fecha_exp_doc': document_date,
+        'Sexo': rng.choice(np.array(["F", "M"], dtype=object), count, p=[0.53, 0.47]),
+        'Estado_civil': rng.choice(np.array(["Soltero", "Casado", "Union libre"], dtype=object), count, p=[0.93, 0.04, 0.03]),
+        'Fecha_nacimento': birth,
+        'Ciudad1': cities[city_index].astype(object),
+        'Direccion1': np.char.add(_numbered("Calle ", rng.integers(1, 120, count)).astype(str),
+                                  _numbered(" # ", rng.integers(1, 90, count)).astype(str)).astype(object),
+        'Telefono1': _numbered("3", rng.integers(0, 999_999_999, count), 9),
+        'Ciudad2': cities[city_index].astype(object),
+        'Direccion': _numbered("Carrera ", rng.integers(1, 120, count)),
+        'Nivel': rng.choice(np.array(["Pregrado", "Posgrado"], dtype=object), count, p=[0.92, 0.08]),
+        'Cod_col': school_code.astype(str).astype(object),
+        'Colegio': _numbered("Colegio ", school_code),
+        'Dir_colegio': _numbered("Avenida ", rng.integers(1, 80, count)),
+        'Ciudad_colegio': cities[school_city_index].astype(object),
+        'Depto_colegio': departments[school_city_index].astype(object),
+        'Municipio_colegio': cities[school_city_index].astype(object),
+        'Pais_colegio': np.where(rng.random(count) < 0.99, "Colombia", "Venezuela").astype(object),
+        'Fecha_graduacion': graduation,
+    }
+    for subject in ICFES_SUBJECTS:
+        score = 52 + 11 * (0.75 * ability + 0.66 * rng.standard_normal(count))
+        data[subject] = np.clip(score, 0, 100).round(1)
+    data.update({
+        'Icfes_antes_del_2000': np.zeros(count, dtype=bool),
+        'Ecaes': np.clip(150 + 25 * ability + 15 * rng.standard_normal(count), 0, 300).round(1),
+        'Cod_estado': status_code,
+        'Estado': np.where(status_code == "R", "Retirado", "Activo").astype(object),
+        'Cod_tipo': pd.Series(student_type).str[0].to_numpy(dtype=object),
+        'Tipo_estudiante': student_type,
+        'Pga_acomulado': pga,
+        'Pga_acomulado_periodo_busqueda': pga,
+        'Creditos_matriculados': credits_enrolled,
+        'Creditos_intentadas': credits_attempted,
+        'Creditos_ganadas': credits_earned,
+        'Creditos_pasadas': credits_earned,
+        'Creditos_pga': credits_attempted,
+        'Puntos_calidad_pga': (pga * credits_attempted).round(1),
+        'Promedio_periodo': period_average,
+        'Creditos_intentadas_periodo': credits_enrolled,
+        'Creditos_ganadas_periodo': np.clip(credits_enrolled - 3 * period_failed, 0, None),
+        'Creditos_pasadas_periodo': np.clip(credits_enrolled - 3 * period_failed, 0, None),
+        'Creditos_pga_periodo': credits_enrolled,
+        'Puntos_calidad_pga_periodo': (period_average * credits_enrolled).round(1),
+        'Nro_materias_cursadas': courses_taken,
+        'Nro_materias_reprobadas': courses_failed,
+        'Nro_materias_aprobadas': courses_taken - courses_failed,
+        'Nro_materias_matriculadas': np.full(count, 6),
+        'Nro_materias_finalizadas': np.full(count, 6),
+        'Situacion': situation,
+        'Estrato': stratum,
+        'Becas': rng.choice(np.array(["Ninguna", "Excelencia", "Deportiva", "Convenio"], dtype=object),
+                            count, p=[0.8, 0.1, 0.04, 0.06]),
+        'Ceres': rng.choice(np.array(["Cartagena", "Magangue", "Turbaco"], dtype=object), count, p=[0.85, 0.1, 0.05]),
+        'Periodo_ingreso': np.array(PERIODS, dtype=object)[period_index],
+        'Peri_in_prog_vigente': np.full(count, period, dtype=object),
+    })
+
+    df = pd.DataFrame(data)
+    for column in OPTIONAL_COLUMNS:
+        df[column] = _with_missing(df[column], rng, 0.05 if column != 'Ecaes' else 0.7)
+    return df[list(COLUMN_MAPPING)]
+
+
+# --- Escritura a archivo ---
+
+class StudentFileWriter:
+    """Escribe bloques de estudiantes a .csv, .parquet o .xlsx (en modo de solo escritura)."""
+
+    def __init__(self, path: str, sheet_name: str, total_rows: int):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        self._writer = None
+        self._first = True
+
+        if self.ext == '.xlsx':
+            if total_rows > XLSX_MAX_ROWS:
+                raise ValueError(f"Una hoja de Excel admite como máximo {XLSX_MAX_ROWS} filas; usa .csv o .parquet")
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet(sheet_name)
+        elif self.ext not in ('.csv', '.parquet'):
+            raise ValueError("El archivo de salida debe ser .xlsx, .csv o .parquet")
+
+    def write(self, chunk: pd.DataFrame):
+        if self.ext == '.csv':
+            chunk.to_csv(self.path, mode='w' if self._first else 'a', header=self._first,
+                          index=False, date_format='%Y-%m-%d')
+        elif self.ext == '.parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            if self._first:
+                self._sheet.append(list(chunk.columns))
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for col in ('Fecha_exp_doc', 'Fecha_nacimento', 'Fecha_graduacion'):
+                values[col] = [value.date() if value is not None else None for value in values[col]]
+            for row in values.itertuples(index=False, name=None):
+                self._sheet.append(row)
+        self._first = False
+
+    def close(self):
+        if self.ext == '.parquet' and self._writer is not None:
+            self._writer.close()
+        elif self.ext == '.xlsx':
+            self._workbook.save(self.path)
+
+
+# --- Escritura a la base de datos ---
+
+def _copy(cursor, table: str, frame: pd.DataFrame):
+    """Copia un DataFrame a una tabla con COPY FROM STDIN."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S')
+    buffer.seek(0)
+    columns = ", ".join(f'"{col}"' for col in frame.columns)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _random_timestamps(rng: np.random.Generator, count: int, days: int = 180) -> pd.DatetimeIndex:
+    now = pd.Timestamp.now().floor('s')
+    return now - pd.to_timedelta(rng.integers(0, days * 86400, count), unit='s')
+
+
+class DatabaseWriter:
+    """
+    Inserta estudiantes y datos relacionados con COPY, bloque a bloque.
+
+    Los IDs de las tablas con secuencia se asignan aquí (a partir del máximo
+    actual) para poder relacionar filas sin consultar la base por cada una;
+    las secuencias se ajustan al terminar.
+    """
+
+    SEQUENCE_TABLES = ["users", "surveys", "questions", "options", "survey_responses",
+                       "answer_details", "notifications", "support_tickets"]
+
+    def __init__(self, connection, id_prefix: str, registered: float, password_hash: str):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.id_prefix = id_prefix
+        self.registered = registered
+        self.password_hash = password_hash
+        self.counts = {table: 0 for table in ["student_data"] + self.SEQUENCE_TABLES}
+        self.next_ids = {table: _next_id(self.cursor, table) for table in self.SEQUENCE_TABLES}
+        self.surveys = self._load_or_create_surveys()
+
+    def _take_ids(self, table: str, count: int) -> np.ndarray:
+        ids = np.arange(self.next_ids[table], self.next_ids[table] + count)
+        self.next_ids[table] += count
+        self.counts[table] += count
+        return ids
+
+    def _load_or_create_surveys(self):
+        """Retorna [(survey_id, [(question_id, question_type, [option_id, ...]), ...]), ...]."""
+        self.cursor.execute("SELECT COUNT(*) FROM surveys")
+        if self.cursor.fetchone()[0] == 0:
+            for title, question_count in DEFAULT_SURVEYS:
+                survey_id = self._take_ids("surveys", 1)[0]
+                self.cursor.execute(
+                    "INSERT INTO surveys (id, title, description, is_active) VALUES (%s, %s, %s, TRUE)",
+                    (int(survey_id), title, f"Encuesta sintética: {title}")
+                )
+                for order in range(question_count):
+                    question_id = self._take_ids("questions", 1)[0]
+                    question_type = "open_ended" if order == question_count - 1 else "multiple_choice"
+                    self.cursor.execute(
+                        'INSERT INTO questions (id, survey_id, question_text, question_type, "order", required) '
+                        'VALUES (%s, %s, %s, %s, %s, TRUE)',
+                        (int(question_id), int(survey_id), f"Pregunta {order + 1}", question_type, order + 1)
+                    )
+                    if question_type == "multiple_choice":
+                        for option_order, text in enumerate(LIKERT_OPTIONS):
+                            option_id = self._take_ids("options", 1)[0]
+                            self.cursor.execute(
+                                'INSERT INTO options (id, question_id, option_text, "order") VALUES (%s, %s, %s, %s)',
+                                (int(option_id), int(question_id), text, option_order + 1)
+                            )
+
+        self.cursor.execute("""
+            SELECT s.id, q.id, q.question_type, array_remove(array_agg(o.id ORDER BY o.id), NULL)
+            FROM surveys s
+            JOIN questions q ON q.survey_id = s.id
+            LEFT JOIN options o ON o.question_id = q.id
+            GROUP BY s.id, q.id, q.question_type
+            ORDER BY s.id, q.id
+        """)
+        surveys = {}
+        for survey_id, question_id, question_type, option_ids in self.cursor.fetchall():
+            surveys.setdefault(survey_id, []).append((question_id, question_type, option_ids))
+        return list(surveys.items())
+
+    def replace_previous(self):
+        """Elimina los datos de una generación anterior con el mismo prefijo de ID."""
+        pattern = f"{self.id_prefix}%"
+        synthetic_users = "SELECT id FROM users WHERE student_data_id LIKE %s"
+        self.cursor.execute(
+            f"DELETE FROM answer_details WHERE response_id IN "
+            f"(SELECT id FROM survey_responses WHERE user_id IN ({synthetic_users}))", (pattern,)
+        )
+        for table in ("survey_responses", "notifications", "support_tickets"):
+            self.cursor.execute(f"DELETE FROM {table} WHERE user_id IN ({synthetic_users})", (pattern,))
+        self.cursor.execute("DELETE FROM users WHERE student_data_id LIKE %s", (pattern,))
+        self.cursor.execute("DELETE FROM student_data_snapshots WHERE id LIKE %s", (pattern,))
+        self.cursor.execute("DELETE FROM student_data WHERE id LIKE %s", (pattern,))
+        self.connection.commit()
+
+    def write(self, students: pd.DataFrame, rng: np.random.Generator):
+        count = len(students)
+
+        rows = students.rename(columns=COLUMN_MAPPING).assign(is_validated=False)
+        _copy(self.cursor, "student_data", rows)
+        self.counts["student_data"] += count
+
+        # Usuarios registrados: una fracción de los estudiantes
+        registered = rows[rng.random(count) < self.registered]
+        user_ids = self._take_ids("users", len(registered))
+        emails = registered['id'].str.lower() + "@synthetic.edu.co"
+        validated = rng.random(len(registered)) < 0.6
+        users = pd.DataFrame({
+            "id": user_ids,
+            "email": emails.to_numpy(),
+            "hashed_password": self.password_hash,
+            "full_name": _numbered("Estudiante ", user_ids),
+            "is_active": True,
+            "is_admin": False,
+            "created_at": _random_timestamps(rng, len(registered), 365),
+            "student_id": registered['id'].to_numpy(),
+            "program": registered['programa'].to_numpy(),
+            "semester": rng.integers(1, 11, len(registered)),
+            "icfes_score": rng.integers(200, 450, len(registered)),
+            "role": "STUDENT",
+            "student_data_id": registered['id'].to_numpy(),
+            "data_validated": validated,
+        })
+        _copy(self.cursor, "users", users)
+
+        self._write_survey_responses(user_ids, rng)
+        self._write_notifications(user_ids, rng)
+        self._write_tickets(user_ids, emails.to_numpy(), rng)
+        self.connection.commit()
+
+    def _write_survey_responses(self, user_ids: np.ndarray, rng: np.random.Generator):
+        for survey_id, questions in self.surveys:
+            responders = user_ids[rng.random(len(user_ids)) < 0.55]
+            if len(responders) == 0:
+                continue
+            response_ids = self._take_ids("survey_responses", len(responders))
+            _copy(self.cursor, "survey_responses", pd.DataFrame({
+                "id": response_ids,
+                "user_id": responders,
+                "survey_id": survey_id,
+                "submitted_at": _random_timestamps(rng, len(responders)),
+            }))
+
+            answers = []
+            for question_id, question_type, option_ids in questions:
+                if option_ids:
+                    # Cada pregunta tiene su propia distribución de respuestas
+                    weights = rng.dirichlet(np.full(len(option_ids), 2.0))
+                    selected = rng.choice(np.array(option_ids), len(response_ids), p=weights)
+                    text = None
+                else:
+                    selected = None
+                    text = rng.choice(np.array(OPEN_ANSWERS, dtype=object), len(response_ids))
+                answers.append(pd.DataFrame({
+                    "response_id": response_ids,
+                    "question_id": question_id,
+                    "answer_text": text,
+                    "selected_option_id": pd.array(selected, dtype='Int64') if selected is not None else pd.NA,
+                }))
+            if answers:
+                answers = pd.concat(answers, ignore_index=True)
+                answers.insert(0, "id", self._take_ids("answer_details", len(answers)))
+                _copy(self.cursor, "answer_details", answers)
+
+    def _write_notifications(self, user_ids: np.ndarray, rng: np.random.Generator):
+        per_user = rng.poisson(3, len(user_ids))
+        owners = np.repeat(user_ids, per_user)
+        if len(owners) == 0:
+            return
+        _copy(self.cursor, "notifications", pd.DataFrame({
+            "id": self._take_ids("notifications", len(owners)),
+            "user_id": owners,
+            "type": rng.choice(np.array(NOTIFICATION_TYPES, dtype=object), len(owners), p=[0.6, 0.15, 0.25]),
+            "message": rng.choice(np.array(NOTIFICATION_MESSAGES, dtype=object), len(owners)),
+            "read": rng.random(len(owners)) < 0.7,
+            "created_at": _random_timestamps(rng, len(owners)),
+        }))
+
+    def _write_tickets(self, user_ids: np.ndarray, emails: np.ndarray, rng: np.random.Generator):
+        with_ticket = rng.random(len(user_ids)) < 0.05
+        count = int(with_ticket.sum())
+        if count == 0:
+            return
+        issue = rng.choice(np.array(TICKET_ISSUES, dtype=object), count, p=[0.45, 0.3, 0.15, 0.1])
+        _copy(self.cursor, "support_tickets", pd.DataFrame({
+            "id": self._take_ids("support_tickets", count),
+            "user_id": user_ids[with_ticket],
+            "issue_type": issue,
+            "description": np.char.add("Solicitud sintética de tipo ", issue.astype(str)).astype(object),
+            "priority": rng.choice(np.array(TICKET_PRIORITIES, dtype=object), count, p=[0.5, 0.35, 0.15]),
+            "status": rng.choice(np.array(TICKET_STATUSES, dtype=object), count, p=[0.3, 0.2, 0.5]),
+            "contact_email": emails[with_ticket],
+            "created_at": _random_timestamps(rng, count),
+        }))
+
+    def finish(self, period: str):
+        """Ajusta las secuencias y registra los estudiantes generados en la foto del periodo."""
+        from app.utils.excel_loader import snapshot_partition_name
+
+        for table in self.SEQUENCE_TABLES:
+            self.cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            )
+
+        snapshot_columns = [col for col in COLUMN_MAPPING.values()]
+        column_list = ", ".join(snapshot_columns)
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {snapshot_partition_name(period)} "
+            f"PARTITION OF student_data_snapshots FOR VALUES IN (%s)", (period,)
+        )
+        self.cursor.execute(f"""
+            INSERT INTO student_data_snapshots (period, {column_list})
+            SELECT %s, {column_list} FROM student_data WHERE id LIKE %s
+            ON CONFLICT (period, id) DO NOTHING
+        """, (period, f"{self.id_prefix}%"))
+        self.connection.commit()
+        self.cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10_000, help="Número de estudiantes (10k a 2M)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--output", help="Archivo de estudiantes a generar (.xlsx, .csv o .parquet)")
+    parser.add_argument("--sheet", default="202430", help="Hoja / periodo de los datos generados")
+    parser.add_argument("--database", action="store_true", help="Insertar los datos en la base de datos con COPY")
+    parser.add_argument("--registered", type=float, default=0.3,
+                        help="Fracción de estudiantes con usuario registrado (solo con --database)")
+    parser.add_argument("--id-prefix", default="SYN", help="Prefijo de los IDs generados (letras y números)")
+    parser.add_argument("--replace", action="store_true",
+                        help="Eliminar antes los datos de una generación con el mismo prefijo")
+    args = parser.parse_args()
+
+    if not args.output and not args.database:
+        parser.error("Indica --output, --database o ambos")
+    if not re.fullmatch(r"[A-Za-z0-9]+", args.id_prefix):
+        parser.error("--id-prefix solo admite letras y números")
+
+    writer = StudentFileWriter(args.output, args.sheet, args.students) if args.output else None
+    database = None
+    if args.database:
+        from app.auth.password import get_password_hash
+        from app.database import engine
+
+        connection = engine.raw_connection()
+        # El hash de bcrypt es costoso: se calcula una sola vez para todos los usuarios
+        database = DatabaseWriter(connection, args.id_prefix, args.registered, get_password_hash("Estudiante2025!"))
+        if args.replace:
+            database.replace_previous()
+
+    start = time.perf_counter()
+    timings = {"generate": 0.0, "file": 0.0, "database": 0.0}
+    for index, offset in enumerate(range(0, args.students, args.chunk_size)):
+        count = min(args.chunk_size, args.students - offset)
+        rng = np.random.default_rng([args.seed, index])
+
+        stage = time.perf_counter()
+        students = generate_students(offset, count, rng, args.id_prefix, args.sheet)
+        timings["generate"] += time.perf_counter() - stage
+
+        if writer:
+            stage = time.perf_counter()
+            writer.write(students)
+            timings["file"] += time.perf_counter() - stage
+        if database:
+            stage = time.perf_counter()
+            database.write(students, rng)
+            timings["database"] += time.perf_counter() - stage
+        print(f"   {offset + count} / {args.students} estudiantes")
+
+    if writer:
+        stage = time.perf_counter()
+        writer.close()
+        timings["file"] += time.perf_counter() - stage
+    if database:
+        stage = time.perf_counter()
+        database.finish(args.sheet)
+        timings["database"] += time.perf_counter() - stage
+
+    elapsed = time.perf_counter() - start
+    print(f"\nGenerados {args.students} estudiantes en {elapsed:.1f} s "
+          f"({args.students / elapsed:,.0f} estudiantes/s)")
+    for stage, seconds in timings.items():
+        if seconds:
+            print(f"   {stage:<9} {seconds:8.2f} s")
+    if writer:
+        print(f"Archivo: {args.output} ({os.path.getsize(args.output) / 1024 ** 2:.1f} MB)")
+    if database:
+        for table, count in database.counts.items():
+            if count:
+                print(f"   {table:<17} {count:>10} filas")
+
+
+if __name__ == "__main__":
+    main()
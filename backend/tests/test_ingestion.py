@@ -0,0 +1,527 @@
+import pytest
+from openpyxl import Workbook
+
+from app.utils.excel_reader import iter_excel_chunks
+
+
+def _crear_excel(path, filas, hoja="202430"):
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = hoja
+    worksheet.append(["Id", "Programa", "Estrato"])
+    for fila in filas:
+        worksheet.append(fila)
+    workbook.save(path)
+    return str(path)
+
+
+# Prueba de lectura por bloques: cada bloque respeta el tamaño y conserva los encabezados
+def test_lectura_excel_por_bloques(tmp_path):
+    filas = [[f"T{i:04d}", "Medicina", i % 6 + 1] for i in range(25)]
+    archivo = _crear_excel(tmp_path / "datos.xlsx", filas + [[None, None, None]])
+
+    bloques = list(iter_excel_chunks(archivo, "202430", chunk_size=10))
+
+    assert [len(bloque) for bloque in bloques] == [10, 10, 5]
+    assert list(bloques[0].columns) == ["Id", "Programa", "Estrato"]
+    assert bloques[2]["Id"].iloc[-1] == "T0024"
+
+
+# Prueba de hoja inexistente: el error se reporta al abrir, no al consumir el primer bloque
+def test_lectura_excel_hoja_inexistente(tmp_path):
+    archivo = _crear_excel(tmp_path / "datos.xlsx", [["T0001", "Medicina", 3]])
+
+    with pytest.raises(ValueError, match="Worksheet"):
+        iter_excel_chunks(archivo, "199910")
+
+
+# Prueba de limpieza por esquema: tipos nulables nativos y sin valores 'nan'/'None' como texto
+def test_limpieza_por_esquema():
+    import pandas as pd
+    from app.utils.excel_loader import clean_dataframe
+
+    df = pd.DataFrame({
+        "id": [" T0001 ", None, ""],
+        "estrato": [3, "x", 2.0],
+        "pga_acumulado": ["4.1", None, float("inf")],
+        "icfes_antes_del_2000": ["SI", None, 0],
+    })
+
+    limpio = clean_dataframe(df)
+
+    assert str(limpio["estrato"].dtype) == "Int64"
+    assert str(limpio["icfes_antes_del_2000"].dtype) == "boolean"
+    assert limpio["id"].tolist()[0] == "T0001"
+    assert limpio["id"].isna().tolist() == [False, True, True]
+    assert limpio["estrato"].isna().tolist() == [False, True, False]
+    assert limpio["pga_acumulado"].isna().tolist() == [False, True, True]
+    assert limpio["icfes_antes_del_2000"].tolist()[0] is True
+
+
+# Prueba de huellas de fila: estables entre cargas y sensibles a cualquier cambio
+def test_huellas_de_fila():
+    import pandas as pd
+    from app.utils.excel_loader import clean_dataframe, compute_row_fingerprints
+
+    original = pd.DataFrame({"id": ["T1", "T2"], "estrato": [3, None], "programa": ["Medicina", "Derecho"]})
+    recarga = original.copy()
+    recarga.loc[1, "programa"] = "Psicologia"
+
+    huellas = compute_row_fingerprints(clean_dataframe(original))
+    huellas_recarga = compute_row_fingerprints(clean_dataframe(recarga))
+
+    assert huellas.tolist() == compute_row_fingerprints(clean_dataframe(original.copy())).tolist()
+    assert (huellas == huellas_recarga).tolist() == [True, False]
+
+
+# Prueba de columnas de texto numéricas: el valor no depende de los vacíos del bloque ni del formato
+def test_texto_numerico_entre_bloques(tmp_path):
+    import pandas as pd
+    from app.utils.excel_loader import clean_dataframe, compute_row_fingerprints
+
+    filas = [[f"T{i:04d}", "Medicina", 3, 202430, 3001234567] for i in range(4)] + [["T0004", "Medicina", 3, None, None]]
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "202430"
+    worksheet.append(["Id", "Programa", "Estrato", "Periodo_ingreso", "Telefono1"])
+    for fila in filas:
+        worksheet.append(fila)
+    workbook.save(tmp_path / "datos.xlsx")
+
+    # El segundo bloque mezcla enteros y vacíos, así que pandas lo lee como float
+    bloques = [
+        clean_dataframe(bloque.rename(columns={"Id": "id", "Programa": "programa", "Estrato": "estrato",
+                                               "Periodo_ingreso": "periodo_ingreso", "Telefono1": "telefono1"}))
+        for bloque in iter_excel_chunks(str(tmp_path / "datos.xlsx"), "202430", chunk_size=3)
+    ]
+    assert bloques[0]["periodo_ingreso"].tolist() == ["202430"] * 3
+    assert bloques[1]["periodo_ingreso"].tolist()[0] == "202430"
+    assert bloques[1]["telefono1"].tolist()[0] == "3001234567"
+    assert bloques[1]["periodo_ingreso"].isna().tolist() == [False, True]
+
+    # La misma fila leída como texto (CSV) tiene la misma huella
+    csv = clean_dataframe(pd.DataFrame({"id": ["T0003"], "programa": ["Medicina"], "estrato": ["3"],
+                                        "periodo_ingreso": ["202430"], "telefono1": ["3001234567"]}))
+    assert compute_row_fingerprints(csv).tolist() == compute_row_fingerprints(bloques[1].iloc[[0]]).tolist()
+
+
+# Prueba de numeración de filas: el índice de cada bloque es la fila del archivo, aun con filas vacías
+def test_numeracion_de_filas(tmp_path):
+    from app.utils.excel_loader import parse_sheet_to_parquet
+    from app.utils.excel_reader import SOURCE_ROW_COLUMN, iter_file_chunks
+
+    archivo = _crear_excel(tmp_path / "datos.xlsx", [
+        ["T0001", "Medicina", 3], [None, None, None], ["T0002", "Derecho", 2], ["T0003", "Derecho", 1]
+    ])
+    assert [list(bloque.index) for bloque in iter_file_chunks(archivo, "202430", chunk_size=2)] == [[2, 4], [5]]
+    assert [list(bloque.index) for bloque in iter_file_chunks(archivo, "202430", chunk_size=2, skip_rows=1)] == [[4], [5]]
+
+    # El Parquet intermedio conserva la fila de la hoja
+    parquet = str(tmp_path / "datos.parquet")
+    parse_sheet_to_parquet(archivo, "202430", parquet)
+    bloques = list(iter_file_chunks(parquet, chunk_size=2))
+    assert [list(bloque.index) for bloque in bloques] == [[2, 4], [5]]
+    assert SOURCE_ROW_COLUMN not in bloques[0].columns
+
+    csv = tmp_path / "datos.csv"
+    csv.write_text("Id,Programa\nT0001,Medicina\n\nT0002,Derecho\n")
+    assert [list(bloque.index) for bloque in iter_file_chunks(str(csv))] == [[2, 4]]
+
+
+# Prueba de lectura de CSV: detecta el separador y entrega todo como texto
+def test_lectura_csv_por_bloques(tmp_path):
+    from app.utils.excel_reader import iter_file_chunks
+
+    archivo = tmp_path / "datos.csv"
+    archivo.write_text("Id;Programa;Estrato\n" + "".join(f"T{i:04d};Medicina;{i % 6 + 1}\n" for i in range(12)))
+
+    bloques = list(iter_file_chunks(str(archivo), chunk_size=5))
+
+    assert [len(bloque) for bloque in bloques] == [5, 5, 2]
+    assert list(bloques[0].columns) == ["Id", "Programa", "Estrato"]
+    assert bloques[0]["Estrato"].iloc[0] == "1"
+
+
+# Prueba de metadatos del libro: hojas y tamaño declarado sin abrir el libro
+def test_metadatos_del_libro(tmp_path):
+    from app.utils.excel_reader import read_workbook_metadata
+
+    archivo = _crear_excel(tmp_path / "datos.xlsx", [[f"T{i:04d}", "Medicina", 3] for i in range(7)])
+
+    with open(archivo, "rb") as f:
+        hojas = read_workbook_metadata(f)
+
+    assert hojas == [{"name": "202430", "rows": 7, "columns": 3, "state": "visible"}]
+
+
+# Prueba de tiempos por etapa: filas y segundos acumulados, y métricas en formato Prometheus
+def test_tiempos_por_etapa():
+    from app.utils.ingestion_metrics import IngestionMetrics, StageTimer
+
+    timer = StageTimer()
+    bloques = list(timer.iterate("read", [[1, 2, 3], [4, 5]]))
+    with timer.stage("clean"):
+        timer.count("clean", 5)
+
+    resumen = timer.summary()
+    metricas = IngestionMetrics()
+    metricas.record({"total_rows": 5}, resumen)
+
+    assert len(bloques) == 2
+    assert resumen["stages"]["read"]["rows"] == 5
+    assert resumen["stages"]["clean"]["seconds"] >= 0
+    assert set(resumen["stages"]) == {"read", "clean", "lookup", "write", "commit"}
+    assert 'ingestion_stage_rows_total{stage="read"} 5' in metricas.render()
+
+
+# Prueba de la caché de cargas: mismo contenido, misma entrada; se elimina la de uso más antiguo
+def test_cache_de_cargas(tmp_path):
+    import io
+    from app.utils.upload_cache import UploadCache
+
+    cache = UploadCache(str(tmp_path / "cache"), max_bytes=15, ttl_seconds=60, max_processes=1)
+
+    primero = cache.store(io.BytesIO(b"0123456789"), ".xlsx", pin=True)
+    repetido = cache.store(io.BytesIO(b"0123456789"), ".xlsx")
+    segundo = cache.store(io.BytesIO(b"abcdefghij"), ".xlsx")
+
+    # La entrada reservada no se elimina; la recién guardada tampoco
+    assert repetido["hit"] and repetido["key"] == primero["key"]
+    assert set(cache.entries) == {primero["key"], segundo["key"]}
+
+    cache.release(primero["key"])
+    tercero = cache.store(io.BytesIO(b"ABCDEFGHIJ"), ".xlsx")
+
+    assert set(cache.entries) == {tercero["key"]}
+
+
+# Prueba de la caché compartida entre procesos: un proceso que arranca solo borra directorios abandonados
+def test_cache_de_cargas_entre_procesos(tmp_path):
+    import io
+    import os
+    import time
+    from app.utils.upload_cache import UploadCache
+
+    raiz = str(tmp_path / "cache")
+    otro = UploadCache(raiz, max_bytes=1000, ttl_seconds=60, max_processes=1)
+    entrada = otro.store(io.BytesIO(b"0123456789"), ".xlsx", pin=True)
+    abandonado = tmp_path / "cache" / "proc-1-viejo"
+    abandonado.mkdir()
+    viejo = time.time() - 120
+    os.utime(abandonado, (viejo, viejo))
+
+    nuevo = UploadCache(raiz, max_bytes=1000, ttl_seconds=60, max_processes=1)
+
+    assert nuevo.directory != otro.directory
+    assert os.path.exists(entrada["path"])
+    assert not abandonado.exists()
+
+
+# Prueba de reanudación: skip_rows omite las filas ya confirmadas, aunque crucen bloques
+def test_lectura_omitiendo_filas(tmp_path):
+    from app.utils.excel_reader import iter_file_chunks
+
+    filas = [[f"T{i:04d}", "Medicina", 3] for i in range(25)]
+    archivo = _crear_excel(tmp_path / "datos.xlsx", filas[:10] + [[None, None, None]] + filas[10:])
+
+    bloques = list(iter_file_chunks(archivo, "202430", chunk_size=10, skip_rows=12))
+
+    assert [len(bloque) for bloque in bloques] == [8, 5]
+    assert bloques[0]["Id"].iloc[0] == "T0012"
+
+
+# Prueba de la caché por versión: se reutiliza hasta que cambia la versión de los datos o vence el TTL
+def test_cache_por_version_de_datos():
+    from app.utils.stats_cache import DataVersion, VersionedCache
+
+    version = DataVersion()
+    cache = VersionedCache(version, ttl_seconds=60)
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        return {"total": len(calculos)}
+
+    primero = cache.get_or_compute("stats", calcular)
+    repetido = cache.get_or_compute("stats", calcular)
+    version.bump()
+    tras_escritura = cache.get_or_compute("stats", calcular)
+    cache.ttl_seconds = 0
+    vencido = cache.get_or_compute("stats", calcular)
+
+    assert repetido is primero
+    assert tras_escritura == {"total": 2}
+    assert vencido == {"total": 3}
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+# Prueba de la caché entre hilos: lecturas, invalidaciones y reemplazos concurrentes no pierden conteos
+def test_cache_entre_hilos():
+    from concurrent.futures import ThreadPoolExecutor
+    from app.utils.stats_cache import DataVersion, VersionedCache
+
+    cache = VersionedCache(DataVersion(), ttl_seconds=60, max_entries=4)
+
+    def trabajar(hilo):
+        for i in range(2000):
+            clave = f"stats:{i % 6}"
+            assert cache.get_or_compute(clave, lambda: {"clave": clave})["clave"] == clave
+            cache.peek(clave)
+            if i % 50 == hilo:
+                cache.invalidate(None if hilo % 2 else clave)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(trabajar, range(8)))
+
+    assert len(cache.entries) <= 4
+    # Cada get_or_compute cuenta un acierto o un cálculo; cada peek, a lo sumo un acierto
+    assert 8 * 2000 <= cache.hits + cache.misses <= 2 * 8 * 2000
+
+
+# Prueba del productor de estadísticas: un cálculo por intervalo para todos los suscriptores
+def test_productor_de_estadisticas():
+    import asyncio
+    import json
+    from app.utils.dashboard_stream import StatsProducer
+
+    class Gestor:
+        def __init__(self):
+            self.active_connections = []
+            self.enviados = []
+
+        async def connect(self, socket):
+            self.active_connections.append(socket)
+
+        def disconnect(self, socket):
+            self.active_connections.remove(socket)
+
+        async def send_personal_message(self, mensaje, socket, key=None):
+            self.enviados.append((socket, json.loads(mensaje)))
+
+        async def broadcast(self, mensaje, key=None):
+            self.enviados.extend((socket, json.loads(mensaje)) for socket in self.active_connections)
+
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        return {"total": 10, "por_programa": {"Medicina": 4}}
+
+    async def escenario():
+        gestor = Gestor()
+        productor = StatsProducer(gestor, calcular, interval_seconds=0.05)
+        for socket in ("a", "b", "c"):
+            await productor.subscribe(socket)
+        await asyncio.sleep(0.01)
+        for socket in ("a", "b", "c"):
+            productor.unsubscribe(socket)
+        await asyncio.sleep(0.1)
+        return gestor, productor
+
+    gestor, productor = asyncio.run(escenario())
+
+    assert len(calculos) == 1
+    assert [(socket, mensaje["type"], mensaje["version"]) for socket, mensaje in gestor.enviados] == [
+        ("a", "dashboard_snapshot", 1), ("b", "dashboard_snapshot", 1), ("c", "dashboard_snapshot", 1)
+    ]
+    assert productor._task.done()
+
+
+# Prueba de diferencias versionadas: nada si no cambia, JSON Patch si cambia y resync por versión
+def test_diferencias_del_dashboard():
+    import json
+    from app.utils.dashboard_stream import StatsProducer
+
+    productor = StatsProducer(None, None, interval_seconds=30)
+    base = {"total": 10, "por_programa": {"Medicina": 4, "A/B": 1}, "last_updated": "t0"}
+
+    foto = json.loads(productor.publish(base))
+    sin_cambios = productor.publish(dict(base, last_updated="t1"))
+    delta = json.loads(productor.publish(
+        {"total": 11, "por_programa": {"Medicina": 5}, "last_updated": "t2"}
+    ))
+    productor.publish({"total": 12, "por_programa": {"Medicina": 5}, "last_updated": "t3"})
+
+    assert foto["type"] == "dashboard_snapshot" and foto["version"] == 1
+    assert sin_cambios is None
+    assert (delta["base_version"], delta["version"]) == (1, 2)
+    assert delta["patch"] == [
+        {"op": "replace", "path": "/total", "value": 11},
+        {"op": "remove", "path": "/por_programa/A~1B"},
+        {"op": "replace", "path": "/por_programa/Medicina", "value": 5},
+        {"op": "replace", "path": "/last_updated", "value": "t2"},
+    ]
+    # Desde la versión 1 faltan dos diferencias; desde la 3, nada; una versión desconocida recibe foto
+    assert [json.loads(m)["version"] for m in productor.messages_since(1)] == [2, 3]
+    assert productor.messages_since(3) == []
+    assert json.loads(productor.messages_since(99)[0])["type"] == "dashboard_snapshot"
+
+
+# Prueba de colas por cliente: los mensajes con clave se fusionan y un cliente atascado se desconecta
+def test_colas_por_cliente():
+    import asyncio
+    from app.utils.dashboard_stream import ConnectionManager
+
+    class Socket:
+        def __init__(self, bloqueado=False):
+            self.bloqueado = bloqueado
+            self.recibidos = []
+            self.cierre = None
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, mensaje):
+            if self.bloqueado:
+                await asyncio.sleep(10)
+            self.recibidos.append(mensaje)
+
+        async def close(self, code):
+            self.cierre = code
+
+    async def escenario():
+        gestor = ConnectionManager(queue_size=4, send_timeout=0.05)
+        normal, atascado = Socket(), Socket(bloqueado=True)
+        await gestor.connect(normal)
+        await gestor.connect(atascado)
+        for i in range(5):
+            await gestor.broadcast(f"stats {i}", key="stats")
+        for i in range(3):
+            await gestor.broadcast(f"aviso {i}")
+        await asyncio.sleep(0.2)
+        return gestor, normal, atascado
+
+    gestor, normal, atascado = asyncio.run(escenario())
+
+    # Las estadísticas pendientes se reemplazan: solo llega la última
+    assert normal.recibidos == ["stats 4", "aviso 0", "aviso 1", "aviso 2"]
+    assert atascado.cierre == 1013
+    assert list(gestor.active_connections) == [normal]
+    assert gestor.dropped == 3 and gestor.slow_disconnects == 1
+
+
+# Prueba de parámetros del histograma: materias por alias o columna, y bordes crecientes
+def test_parametros_de_histograma():
+    from app.utils.score_histograms import resolve_subjects, validate_edges
+
+    assert resolve_subjects(["ptj_matematicas", "sociales", "Matematicas"]) == ["matematicas", "ciencias_sociales"]
+    assert validate_edges(["0", 50, 100.0]) == [0.0, 50.0, 100.0]
+    for materias in (["nombre"], []):
+        with pytest.raises(ValueError):
+            resolve_subjects(materias)
+    for bordes in ([10], [0, 50, 50], ["a", "b"]):
+        with pytest.raises(ValueError):
+            validate_edges(bordes)
+
+
+# Prueba del modelo de riesgo: un PGA bajo aumenta el riesgo y los faltantes no dependen del lote
+def test_matriz_de_riesgo():
+    import pandas as pd
+    from app.utils.dropout_risk import FEATURES, SOURCE_COLUMNS, LogisticRiskModel, build_feature_matrix, risk_model
+
+    base = {column: None for column in SOURCE_COLUMNS}
+    estudiantes = pd.DataFrame([
+        dict(base, pga_acumulado=4.5, nro_materias_cursadas=10, nro_materias_reprobadas=0,
+             nro_materias_aprobadas=10, creditos_intentadas=30, creditos_ganadas=30,
+             ptj_matematicas=80.0, estrato=4, becas="Excelencia"),
+        dict(base, pga_acumulado=2.1, nro_materias_cursadas=10, nro_materias_reprobadas=5,
+             nro_materias_aprobadas=5, creditos_intentadas=30, creditos_ganadas=12,
+             ptj_matematicas=35.0, estrato=1, becas="Ninguna"),
+        dict(base, nro_materias_cursadas=0),
+    ])
+
+    matriz = build_feature_matrix(estudiantes)
+    assert matriz.shape == (3, len(FEATURES))
+    assert ((matriz >= 0) & (matriz <= 1)).all()
+
+    riesgo = risk_model.score(matriz)
+    assert riesgo[0] < 0.5 < riesgo[1]
+    # Puntuar un estudiante solo da lo mismo que puntuarlo en el lote
+    assert risk_model.score(build_feature_matrix(estudiantes.iloc[[2]]))[0] == riesgo[2]
+    with pytest.raises(ValueError):
+        LogisticRiskModel({"edad": 1.0})
+
+
+# Prueba del cubo de cohortes: profundizar dentro de un cubo en caché no consulta la base de datos
+def test_cubo_desde_cache():
+    from app.utils.cohort_cube import query_cohort_cube, resolve_dimensions, resolve_measures
+    from app.utils.stats_cache import analytics_cache
+
+    def celda(valores, cantidad, suma_pga, en_riesgo):
+        return {"nivel": frozenset(valores), "valores": valores, "cantidad": cantidad, "suma_pga": suma_pga,
+                "cantidad_pga": cantidad, "suma_icfes": None, "cantidad_icfes": 0, "en_riesgo": en_riesgo}
+
+    cubo = [
+        celda({}, 4, 12.0, 1),
+        celda({"programa": "Medicina"}, 3, 10.5, 0),
+        celda({"programa": "Derecho"}, 1, 1.5, 1),
+        celda({"estrato": 2}, 4, 12.0, 1),
+        celda({"programa": "Medicina", "estrato": 2}, 3, 10.5, 0),
+        celda({"programa": "Derecho", "estrato": 2}, 1, 1.5, 1),
+    ]
+    analytics_cache.invalidate()
+    analytics_cache.get_or_compute("cohort_cube:estrato,programa", lambda: cubo)
+
+    # db=None: cualquier consulta a la base de datos fallaría
+    resultado = query_cohort_cube(None, ["estrato"], ["cantidad", "promedio_pga"], {"programa": "Derecho"})
+    assert resultado == {"celdas": [{"estrato": 2, "cantidad": 1, "promedio_pga": 1.5}],
+                         "total": {"cantidad": 1, "promedio_pga": 1.5}}
+    resultado = query_cohort_cube(None, ["programa"], ["en_riesgo", "promedio_icfes"])
+    assert [c["programa"] for c in resultado["celdas"]] == ["Medicina", "Derecho"]
+    assert resultado["total"] == {"en_riesgo": 1, "promedio_icfes": None}
+    analytics_cache.invalidate()
+
+    assert resolve_dimensions(["Programa", "estrato", "programa"]) == ["programa", "estrato"]
+    assert resolve_measures([]) == ["cantidad", "promedio_pga", "promedio_icfes", "en_riesgo"]
+    with pytest.raises(ValueError):
+        resolve_dimensions(["edad"])
+
+
+# Prueba del WebSocket del dashboard: el cliente se da de baja aunque la conexión termine con otro error
+def test_websocket_se_da_de_baja_ante_errores(monkeypatch):
+    import asyncio
+    from app.routes import admin
+
+    bajas = []
+
+    class Productor:
+        async def subscribe(self, websocket, since=None, stream=None):
+            pass
+
+        def unsubscribe(self, websocket):
+            bajas.append(websocket)
+
+    class Socket:
+        async def receive_text(self):
+            raise RuntimeError("La conexión ya está cerrada")
+
+    monkeypatch.setattr(admin, "stats_producer", Productor())
+    socket = Socket()
+    with pytest.raises(RuntimeError):
+        asyncio.run(admin.websocket_endpoint(socket))
+
+    assert bajas == [socket]
+
+
+# Prueba de trabajos de carga: si alguna hoja falla, el trabajo no se reporta como completado
+def test_trabajo_con_hojas_fallidas(monkeypatch, tmp_path):
+    from app.utils import ingestion_jobs
+
+    def cargar(file_path, db, sheet_names, **kwargs):
+        return {
+            "total_rows": 2, "successful_inserts": 2, "errors": 0,
+            "sheets": {"209901": {"status": "completed"}, "209902": {"status": "failed", "error": "Hoja dañada"}},
+        }
+
+    monkeypatch.setattr(ingestion_jobs, "load_sheets_to_database", cargar)
+    archivo = tmp_path / "datos.xlsx"
+    archivo.write_bytes(b"")
+    gestor = ingestion_jobs.IngestionJobManager(max_workers=1)
+
+    trabajo = gestor.submit(str(archivo), ["209901", "209902"])
+    gestor._executor.shutdown(wait=True)
+    trabajo = gestor.get(trabajo["job_id"])
+
+    assert trabajo["status"] == ingestion_jobs.JOB_PARTIAL
+    assert trabajo["failed_sheets"] == ["209902"]
+    assert "209902" in trabajo["error_message"]
@@ -0,0 +1,289 @@
+"""
+Pruebas contra PostgreSQL (DATABASE_URL, con las migraciones aplicadas).
+
+Cada prueba corre dentro de una transacción que se revierte al terminar: los
+commit del código solo liberan savepoints, así la base queda como estaba.
+Si no hay base de datos disponible, las pruebas se omiten.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def db():
+    try:
+        from app.database import engine
+        connection = engine.connect()
+    except Exception as e:
+        pytest.skip(f"Sin base de datos disponible: {e}")
+    migrated = connection.execute(text("SELECT to_regclass('student_period_rollups') IS NOT NULL")).scalar()
+    connection.rollback()
+    if not migrated:
+        connection.close()
+        pytest.skip("La base de datos no tiene las migraciones aplicadas")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+def _insertar_estudiantes(db, filas):
+    from app.models.student_data import StudentData
+
+    # executemany necesita las mismas columnas en todas las filas
+    columnas = {columna for fila in filas for columna in fila}
+    db.execute(StudentData.__table__.insert(), [{columna: fila.get(columna) for columna in columnas} for fila in filas])
+
+
+# Prueba del dashboard: la consulta única entrega lo mismo que la implementación anterior, también sin usuarios
+def test_estadisticas_del_dashboard(db):
+    from app.routes.admin import compute_dashboard_stats
+    from benchmarks.bench_dashboard_stats import legacy_dashboard_stats
+
+    _insertar_estudiantes(db, [
+        {"id": "TDB0001", "programa": "Medicina", "estrato": 2, "pga_acumulado": 2.5, "ptj_matematicas": 40.0},
+        {"id": "TDB0002", "programa": "Derecho", "estrato": 3, "pga_acumulado": 4.0, "ptj_matematicas": 70.0},
+    ])
+
+    def comparar():
+        nuevo = compute_dashboard_stats(db)
+        anterior = legacy_dashboard_stats(db)
+        nuevo.pop("last_updated")
+        # El conteo en riesgo usa el riesgo de deserción guardado (ver dropout_risk), no solo el PGA
+        nuevo.pop("dropout_risk_students")
+        anterior.pop("dropout_risk_students")
+        assert nuevo == anterior
+        return nuevo
+
+    comparar()
+
+    # Sin usuarios (por ejemplo, recién cargado el Excel) los promedios siguen abarcando todo student_data
+    db.execute(text("TRUNCATE users CASCADE"))
+    vacio = comparar()
+    assert vacio["total_students"] == 0
+    assert vacio["average_gpa"] > 0 and vacio["average_icfes"] > 0
+
+
+# Prueba del riesgo de deserción: puntuar solo los IDs pedidos y, sin riesgo calculado, usar el PGA
+def test_riesgo_por_ids_y_respaldo(db):
+    from app.models.student_data import StudentData
+    from app.utils.dropout_risk import at_risk_condition, score_students
+
+    _insertar_estudiantes(db, [
+        {"id": "TDB0001", "pga_acumulado": 1.5, "nro_materias_cursadas": 8, "nro_materias_reprobadas": 6},
+        {"id": "TDB0002", "pga_acumulado": 2.0},
+        {"id": "TDB0003", "pga_acumulado": 4.5},
+    ])
+    ids = ["TDB0001", "TDB0002", "TDB0003"]
+
+    assert score_students(db, ids=["TDB0001"]) == 1
+    riesgos = dict(db.query(StudentData.id, StudentData.riesgo_desercion).filter(StudentData.id.in_(ids)).all())
+    assert riesgos["TDB0001"] > 0.5
+    assert riesgos["TDB0002"] is None and riesgos["TDB0003"] is None
+
+    # TDB0001 por su riesgo calculado, TDB0002 por el PGA mientras está pendiente
+    en_riesgo = db.query(StudentData.id).filter(StudentData.id.in_(ids), at_risk_condition()).all()
+    assert sorted(row.id for row in en_riesgo) == ["TDB0001", "TDB0002"]
+
+
+def _crear_csv(path, filas):
+    encabezados = ["Id", "Programa", "Estrato", "Pga_acomulado"]
+    lineas = [",".join(encabezados)] + [",".join("" if valor is None else str(valor) for valor in fila) for fila in filas]
+    path.write_text("\n".join(lineas) + "\n")
+    return str(path)
+
+
+def _estudiantes(db, ids):
+    filas = db.execute(
+        text("SELECT id, programa, estrato, pga_acumulado, row_fingerprint FROM student_data WHERE id = ANY(:ids)"),
+        {"ids": list(ids)}
+    ).all()
+    return {fila.id: fila for fila in filas}
+
+
+def _conteos(stats):
+    return {clave: stats[clave] for clave in ("inserted", "updated", "unchanged", "errors")}
+
+
+# Prueba de la carga con COPY: conteos por huella, IDs repetidos en el lote y nulos que no sobrescriben
+def test_carga_con_conteos_y_nulos(db, tmp_path):
+    from app.utils.excel_loader import load_excel_to_database
+
+    primera = _crear_csv(tmp_path / "primera.csv", [
+        ["TDB0001", "Medicina", 2, 3.5],
+        ["TDB0002", "Derecho", 3, 4.0],
+        # Repetido en el mismo lote: gana la última fila, como en la foto del periodo
+        ["TDB0001", "Medicina", None, 3.8],
+    ])
+    stats = load_excel_to_database(primera, db, sheet_name="209901")
+    assert stats["total_rows"] == 3
+    assert _conteos(stats) == {"inserted": 2, "updated": 0, "unchanged": 0, "errors": 0}
+    assert _estudiantes(db, ["TDB0001"])["TDB0001"][1:4] == ("Medicina", None, 3.8)
+    foto = db.execute(text(
+        "SELECT estrato, pga_acumulado, row_fingerprint FROM student_data_snapshots WHERE period = '209901' AND id = 'TDB0001'"
+    )).one()
+    assert tuple(foto) == (None, 3.8, _estudiantes(db, ["TDB0001"])["TDB0001"].row_fingerprint)
+
+    # La misma hoja otra vez: nada cambia
+    stats = load_excel_to_database(primera, db, sheet_name="209901")
+    assert _conteos(stats) == {"inserted": 0, "updated": 0, "unchanged": 2, "errors": 0}
+
+    segunda = _crear_csv(tmp_path / "segunda.csv", [
+        ["TDB0001", "Medicina", 4, None],
+        ["TDB0002", "Derecho", 3, 4.0],
+        ["TDB0003", "Derecho", 1, 2.9],
+    ])
+    stats = load_excel_to_database(segunda, db, sheet_name="209901")
+    assert _conteos(stats) == {"inserted": 1, "updated": 1, "unchanged": 1, "errors": 0}
+    estudiantes = _estudiantes(db, ["TDB0001", "TDB0003"])
+    # El PGA vacío no borra el anterior; el estrato sí se actualiza
+    assert estudiantes["TDB0001"][1:4] == ("Medicina", 4, 3.8)
+    assert estudiantes["TDB0003"][1:4] == ("Derecho", 1, 2.9)
+
+
+# Prueba de aislamiento de filas: una fila inválida se rechaza y el resto del lote se escribe
+def test_carga_aislando_filas_invalidas(db, tmp_path):
+    from app.utils.excel_loader import load_excel_to_database
+
+    archivo = _crear_csv(tmp_path / "datos.csv", [
+        ["TDB0001", "Medicina", 2, 3.5],
+        ["TDB0002", "Derecho", 99999999999, 4.0],
+        [None, "Derecho", 3, 4.0],
+        ["TDB0003", "Derecho", 1, 2.9],
+    ])
+    stats = load_excel_to_database(archivo, db, sheet_name="209901")
+
+    assert _conteos(stats) == {"inserted": 2, "updated": 0, "unchanged": 0, "errors": 2}
+    assert stats["successful_inserts"] == 2
+    # Las filas se numeran como en el archivo (la fila 1 es el encabezado)
+    rechazadas = sorted(stats["rejected_rows"], key=lambda fila: fila["row"])
+    assert [(fila["row"], fila["id"]) for fila in rechazadas] == [(3, "TDB0002"), (4, None)]
+    assert "out of range" in rechazadas[0]["reason"]
+    assert sorted(_estudiantes(db, ["TDB0001", "TDB0002", "TDB0003"])) == ["TDB0001", "TDB0003"]
+
+
+# Prueba de la foto por periodo: la carga crea la partición y los agregados; los percentiles salen de la foto
+def test_foto_y_agregados_del_periodo(db, tmp_path):
+    from app.utils.excel_loader import (
+        delete_missing_snapshot_rows, load_excel_to_database, refresh_period_rollup, snapshot_partition_name
+    )
+
+    archivo = _crear_csv(tmp_path / "datos.csv", [
+        ["TDB0001", "Medicina", 2, 2.0],
+        ["TDB0002", "Medicina", 2, 3.0],
+        ["TDB0003", "Medicina", 2, 4.0],
+        ["TDB0004", "Medicina", 2, 5.0],
+        ["TDB0005", "Derecho", 3, None],
+    ])
+    load_excel_to_database(archivo, db, sheet_name="209901")
+
+    particion = snapshot_partition_name("209901")
+    assert db.execute(text("SELECT to_regclass(:nombre) IS NOT NULL"), {"nombre": particion}).scalar()
+    assert db.execute(text(f"SELECT count(*) FROM {particion}")).scalar() == 5
+
+    def agregados():
+        filas = db.execute(text("""
+            SELECT programa, student_count, pga_acumulado_count, pga_acumulado_mean, pga_acumulado_variance,
+                   pga_acumulado_p25, pga_acumulado_median, pga_acumulado_p75
+            FROM student_period_rollups WHERE period = '209901'
+        """)).all()
+        return {fila.programa: fila for fila in filas}
+
+    medicina = agregados()["Medicina"]
+    assert (medicina.student_count, medicina.pga_acumulado_count) == (4, 4)
+    assert medicina.pga_acumulado_mean == pytest.approx(3.5)
+    assert medicina.pga_acumulado_variance == pytest.approx(5 / 3)
+    assert (medicina.pga_acumulado_p25, medicina.pga_acumulado_median, medicina.pga_acumulado_p75) == pytest.approx((2.75, 3.5, 4.25))
+    # Un programa sin PGA cuenta sus estudiantes, pero no tiene estadísticos
+    derecho = agregados()["Derecho"]
+    assert (derecho.student_count, derecho.pga_acumulado_count, derecho.pga_acumulado_median) == (1, 0, None)
+
+    # Los estudiantes que ya no están en la hoja salen de la foto y de los agregados
+    assert delete_missing_snapshot_rows(db, "209901", {"TDB0001", "TDB0002"}) == 3
+    assert refresh_period_rollup(db, "209901") == 1
+    medicina = agregados()["Medicina"]
+    assert (medicina.student_count, medicina.pga_acumulado_median) == (2, pytest.approx(2.5))
+
+
+# Prueba de carga de varias hojas: cada hoja es un periodo y el más reciente define los datos vigentes
+def test_carga_de_varias_hojas(db, tmp_path):
+    from openpyxl import Workbook
+    from app.utils.excel_loader import load_sheets_to_database
+
+    workbook = Workbook()
+    for indice, (hoja, filas) in enumerate([
+        ("209902", [["TDB0001", "Derecho", 3, 4.1], ["TDB0002", "Derecho", 2, 3.0]]),
+        # Una fila vacía antes de una fila inválida: se reporta la fila de la hoja
+        ("209901", [["TDB0001", "Medicina", 2, 3.5], [None] * 4, ["TDB0009", "Medicina", 99999999999, 3.0]]),
+    ]):
+        worksheet = workbook.active if indice == 0 else workbook.create_sheet()
+        worksheet.title = hoja
+        worksheet.append(["Id", "Programa", "Estrato", "Pga_acomulado"])
+        for fila in filas:
+            worksheet.append(fila)
+    archivo = tmp_path / "periodos.xlsx"
+    workbook.save(archivo)
+
+    stats = load_sheets_to_database(str(archivo), db, max_processes=2)
+
+    assert {hoja: datos["status"] for hoja, datos in stats["sheets"].items()} == {"209901": "completed", "209902": "completed"}
+    assert (stats["total_rows"], stats["inserted"], stats["updated"], stats["errors"]) == (4, 2, 1, 1)
+    assert [(fila["row"], fila["id"]) for fila in stats["sheets"]["209901"]["rejected_rows"]] == [(4, "TDB0009")]
+    assert _estudiantes(db, ["TDB0001"])["TDB0001"][1:4] == ("Derecho", 3, 4.1)
+    periodos = db.execute(text(
+        "SELECT period, programa FROM student_data_snapshots WHERE id = 'TDB0001' ORDER BY period"
+    )).all()
+    assert [tuple(fila) for fila in periodos] == [("209901", "Medicina"), ("209902", "Derecho")]
+
+
+# Prueba de la carga inicial (seed): misma fusión que la carga administrativa, sin huella y aislando filas
+def test_fusion_del_seed(db, tmp_path, monkeypatch):
+    import app.seed_database
+    from app.seed_database import load_excel_data_to_db
+
+    _insertar_estudiantes(db, [{"id": "TDB0001", "programa": "Medicina", "estrato": 2, "pga_acumulado": 3.0,
+                                "row_fingerprint": 1234}])
+    (tmp_path / "data").mkdir()
+    _crear_csv(tmp_path / "data" / "estudiantes.csv", [
+        ["TDB0001", None, 5, None],
+        ["TDB0002", "Derecho", 99999999999, 4.0],
+        ["TDB0003", "Derecho", 1, 2.9],
+    ])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app.seed_database, "seed_session", lambda conn: db)
+
+    assert load_excel_data_to_db(None)
+
+    estudiantes = _estudiantes(db, ["TDB0001", "TDB0002", "TDB0003"])
+    assert sorted(estudiantes) == ["TDB0001", "TDB0003"]
+    # Los nulos no sobrescriben y la huella se invalida para la próxima carga
+    assert tuple(estudiantes["TDB0001"][1:]) == ("Medicina", 5, 3.0, None)
+
+
+# Prueba de recarga forzada: si falla, la carga completada anterior y sus estadísticas se conservan
+def test_recarga_forzada_fallida(db):
+    from app.utils.excel_loader import (
+        IMPORT_FAILED, ImportCheckpoint, find_completed_import, find_interrupted_import, record_completed_import
+    )
+
+    record_completed_import(db, "tdb-hash", "209901", "datos.xlsx", {"total_rows": 5})
+    checkpoint = ImportCheckpoint.begin(db, "tdb-hash", ["209901"], "datos.xlsx", None, "job-1")
+    assert checkpoint.replaces_completed and not checkpoint.resumable
+    assert find_completed_import(db, "tdb-hash") is None
+    checkpoint.fail(db, "Error de prueba")
+
+    previa = find_completed_import(db, "tdb-hash")
+    assert previa is not None and previa.statistics == {"total_rows": 5}
+    assert previa.checkpoint is None and previa.error_message == "Error de prueba"
+    assert find_interrupted_import(db, "tdb-hash") is None
+
+    # Una carga nueva que falla sí queda pendiente de reanudar
+    checkpoint = ImportCheckpoint.begin(db, "tdb-nuevo", ["209901"], "otro.xlsx", None, "job-2")
+    checkpoint.fail(db, "Error de prueba")
+    interrumpida = find_interrupted_import(db, "tdb-nuevo")
+    assert checkpoint.resumable and interrumpida.status == IMPORT_FAILED